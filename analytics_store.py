@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Embedded Analytical Store for Mentor Evaluation System
+- Materializes mentor metrics into SQLite (mentor, evaluation, dimension_score)
+- Indexed on school, department, evaluation count and score columns
+- Query helpers and a CLI so whole-dataset analytics run in SQL
+  instead of json.load + Python loops
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+from typing import Dict, List, Optional
+
+from generate_web_data import DIMENSIONS, normalize_mentor
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mentor (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    school TEXT NOT NULL,
+    department TEXT NOT NULL,
+    evaluation_count INTEGER NOT NULL,
+    total_score REAL NOT NULL,
+    engine TEXT,
+    overall_recommendation TEXT
+);
+
+CREATE TABLE IF NOT EXISTS evaluation (
+    id INTEGER PRIMARY KEY,
+    mentor_id TEXT NOT NULL REFERENCES mentor(id),
+    seq INTEGER NOT NULL,
+    comment TEXT NOT NULL,
+    dimensions TEXT
+);
+
+CREATE TABLE IF NOT EXISTS dimension_score (
+    mentor_id TEXT NOT NULL REFERENCES mentor(id),
+    dimension TEXT NOT NULL,
+    score REAL NOT NULL,
+    reason TEXT,
+    PRIMARY KEY (mentor_id, dimension)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_mentor_school ON mentor(school, department);
+CREATE INDEX IF NOT EXISTS idx_mentor_department ON mentor(department);
+CREATE INDEX IF NOT EXISTS idx_mentor_total_score ON mentor(total_score);
+CREATE INDEX IF NOT EXISTS idx_mentor_evaluation_count ON mentor(evaluation_count);
+CREATE INDEX IF NOT EXISTS idx_evaluation_mentor ON evaluation(mentor_id, seq);
+CREATE INDEX IF NOT EXISTS idx_dimension_score ON dimension_score(dimension, score, mentor_id);
+"""
+
+# Columns a mentor query may be ordered by
+ORDER_COLUMNS = {
+    'totalScore': 'm.total_score',
+    'evaluationCount': 'm.evaluation_count',
+    'name': 'm.name'
+}
+
+
+class AnalyticsStore:
+    """SQLite-backed store of mentor metrics and raw evaluations"""
+
+    def __init__(self, path: str = 'mentor_analytics.db'):
+        """
+        Args:
+            path: SQLite database file
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def materialize(self, mentor_metrics: Dict, source: str = '') -> Dict:
+        """
+        Replace the store contents with a metrics dict
+
+        Accepts both the rule engine and the Qwen metrics format.
+
+        Returns:
+            Row counts per table
+        """
+        mentor_rows = []
+        evaluation_rows = []
+        score_rows = []
+
+        for mentor_id, data in mentor_metrics.items():
+            detail = normalize_mentor(mentor_id, data)
+            engine = (data.get('provenance') or {}).get('engine')
+
+            mentor_rows.append((
+                mentor_id, detail['name'], detail['school'], detail['department'],
+                detail['evaluationCount'], detail['totalScore'], engine,
+                detail['overallRecommendation']
+            ))
+
+            for seq, evaluation in enumerate(detail['evaluations']):
+                dimensions = evaluation['dimensions']
+                evaluation_rows.append((
+                    mentor_id, seq, evaluation['comment'],
+                    json.dumps(dimensions, ensure_ascii=False) if dimensions else None
+                ))
+
+            reasons = detail['dimensionReasons'] or {}
+            for dim, score in (detail['dimensionScores'] or {}).items():
+                score_rows.append((mentor_id, dim, score, reasons.get(dim)))
+
+        with self.conn:
+            self.conn.execute("DELETE FROM dimension_score")
+            self.conn.execute("DELETE FROM evaluation")
+            self.conn.execute("DELETE FROM mentor")
+            self.conn.executemany("INSERT INTO mentor VALUES (?, ?, ?, ?, ?, ?, ?, ?)", mentor_rows)
+            self.conn.executemany(
+                "INSERT INTO evaluation (mentor_id, seq, comment, dimensions) VALUES (?, ?, ?, ?)",
+                evaluation_rows
+            )
+            self.conn.executemany("INSERT INTO dimension_score VALUES (?, ?, ?, ?)", score_rows)
+            self.conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [
+                ('source', source),
+                ('materialized_at', time.strftime('%Y-%m-%d %H:%M:%S'))
+            ])
+        self.conn.execute("ANALYZE")
+
+        return {
+            'mentor': len(mentor_rows),
+            'evaluation': len(evaluation_rows),
+            'dimension_score': len(score_rows)
+        }
+
+    def query(self, sql: str, params=()) -> List[Dict]:
+        """Run a read query and return rows as dicts"""
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def find_mentors(
+        self,
+        school: str = None,
+        department: str = None,
+        min_evaluations: int = None,
+        below: Dict[str, float] = None,
+        above: Dict[str, float] = None,
+        order_by: str = 'totalScore',
+        descending: bool = True,
+        limit: int = 50
+    ) -> List[Dict]:
+        """
+        Mentors matching school/department/evaluation-count and per-dimension score bounds
+
+        Example: find_mentors(school='东南大学', below={'学生补助': 4}, min_evaluations=5)
+
+        Args:
+            below: Dimension -> exclusive upper bound on its score
+            above: Dimension -> inclusive lower bound on its score
+        """
+        if order_by not in ORDER_COLUMNS:
+            raise ValueError(f"order_by must be one of {sorted(ORDER_COLUMNS)}")
+
+        joins = []
+        where = []
+        params = []
+
+        # One join per dimension bound; each is served by idx_dimension_score
+        bounds = [(dim, '<', v) for dim, v in (below or {}).items()] + \
+                 [(dim, '>=', v) for dim, v in (above or {}).items()]
+        for i, (dim, op, value) in enumerate(bounds):
+            if dim not in DIMENSIONS:
+                raise ValueError(f"unknown dimension: {dim}")
+            joins.append(
+                f"JOIN dimension_score d{i} ON d{i}.mentor_id = m.id "
+                f"AND d{i}.dimension = ? AND d{i}.score {op} ?"
+            )
+            params.extend([dim, value])
+
+        if school:
+            where.append("m.school = ?")
+            params.append(school)
+        if department:
+            where.append("m.department = ?")
+            params.append(department)
+        if min_evaluations is not None:
+            where.append("m.evaluation_count >= ?")
+            params.append(min_evaluations)
+
+        sql = "SELECT m.id, m.name, m.school, m.department, m.evaluation_count, m.total_score, m.engine FROM mentor m"
+        if joins:
+            sql += " " + " ".join(joins)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {ORDER_COLUMNS[order_by]} {'DESC' if descending else 'ASC'} LIMIT ?"
+        params.append(limit)
+
+        return self.query(sql, params)
+
+    def mentor_scores(self, mentor_ids: List[str]) -> Dict[str, Dict[str, float]]:
+        """Dimension scores for a set of mentors"""
+        if not mentor_ids:
+            return {}
+        placeholders = ','.join('?' * len(mentor_ids))
+        scores = {}
+        for row in self.conn.execute(
+            f"SELECT mentor_id, dimension, score FROM dimension_score WHERE mentor_id IN ({placeholders})",
+            mentor_ids
+        ):
+            scores.setdefault(row['mentor_id'], {})[row['dimension']] = row['score']
+        return scores
+
+    def school_summary(self, min_mentors: int = 1, limit: int = 50) -> List[Dict]:
+        """Per-school mentor count, evaluation count and average score"""
+        return self.query(
+            """
+            SELECT school,
+                   COUNT(*) AS mentors,
+                   SUM(evaluation_count) AS evaluations,
+                   ROUND(AVG(total_score), 2) AS avg_score
+            FROM mentor
+            GROUP BY school
+            HAVING COUNT(*) >= ?
+            ORDER BY mentors DESC
+            LIMIT ?
+            """,
+            (min_mentors, limit)
+        )
+
+    def dimension_stats(self, school: str = None) -> List[Dict]:
+        """Per-dimension coverage, mean, min and max, optionally for one school"""
+        sql = """
+            SELECT d.dimension,
+                   COUNT(*) AS mentors,
+                   ROUND(AVG(d.score), 2) AS avg_score,
+                   MIN(d.score) AS min_score,
+                   MAX(d.score) AS max_score
+            FROM dimension_score d
+        """
+        params = []
+        if school:
+            sql += " JOIN mentor m ON m.id = d.mentor_id WHERE m.school = ?"
+            params.append(school)
+        sql += " GROUP BY d.dimension"
+        rows = {row['dimension']: row for row in self.query(sql, params)}
+        return [rows[dim] for dim in DIMENSIONS if dim in rows]
+
+    def evaluations(self, mentor_id: str) -> List[Dict]:
+        """Raw evaluations of one mentor, in original order"""
+        rows = self.query(
+            "SELECT seq, comment, dimensions FROM evaluation WHERE mentor_id = ? ORDER BY seq",
+            (mentor_id,)
+        )
+        for row in rows:
+            row['dimensions'] = json.loads(row['dimensions']) if row['dimensions'] else {}
+        return rows
+
+
+def materialize_metrics(mentor_metrics: Dict, db_path: str = 'mentor_analytics.db', source: str = ''):
+    """Materialize a metrics dict into the analytics store (used by the export paths)"""
+    start = time.time()
+    with AnalyticsStore(db_path) as store:
+        counts = store.materialize(mentor_metrics, source=source)
+    print(f"✓ Materialized {counts['mentor']} mentors, {counts['evaluation']} evaluations, "
+          f"{counts['dimension_score']} dimension scores → {db_path} ({time.time() - start:.1f}s)")
+
+
+def parse_bounds(values: Optional[List[str]]) -> Dict[str, float]:
+    """Parse ["学生补助=4", ...] into {"学生补助": 4.0}"""
+    bounds = {}
+    for value in values or []:
+        dim, sep, number = value.partition('=')
+        if not sep:
+            raise argparse.ArgumentTypeError(f"expected 维度=分数, got {value}")
+        bounds[dim.strip()] = float(number)
+    return bounds
+
+
+def print_rows(rows: List[Dict]):
+    """Print query results as a tab-separated table"""
+    if not rows:
+        print("(no rows)")
+        return
+    columns = list(rows[0].keys())
+    print('\t'.join(columns))
+    for row in rows:
+        print('\t'.join('' if row[c] is None else str(row[c]) for c in columns))
+
+
+def main():
+    """Command line interface"""
+    parser = argparse.ArgumentParser(description='Analytics store for mentor metrics')
+    parser.add_argument('--db', default='mentor_analytics.db', help='SQLite file (default: mentor_analytics.db)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help='Materialize a metrics JSON file')
+    build.add_argument('metrics_file')
+
+    mentors = sub.add_parser('mentors', help='Find mentors by school, department and dimension bounds')
+    mentors.add_argument('--school')
+    mentors.add_argument('--department')
+    mentors.add_argument('--min-evals', type=int)
+    mentors.add_argument('--below', action='append', metavar='维度=分数',
+                         help='Dimension score strictly below a bound (repeatable)')
+    mentors.add_argument('--above', action='append', metavar='维度=分数',
+                         help='Dimension score at or above a bound (repeatable)')
+    mentors.add_argument('--order', choices=sorted(ORDER_COLUMNS), default='totalScore')
+    mentors.add_argument('--asc', action='store_true')
+    mentors.add_argument('--limit', type=int, default=50)
+
+    schools = sub.add_parser('schools', help='Per-school summary')
+    schools.add_argument('--min-mentors', type=int, default=1)
+    schools.add_argument('--limit', type=int, default=50)
+
+    dims = sub.add_parser('dims', help='Per-dimension statistics')
+    dims.add_argument('--school')
+
+    sql = sub.add_parser('sql', help='Run an arbitrary read-only SQL query')
+    sql.add_argument('query')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        with open(args.metrics_file, 'r', encoding='utf-8') as f:
+            mentor_metrics = json.load(f)
+        materialize_metrics(mentor_metrics, args.db, source=args.metrics_file)
+        return
+
+    if not os.path.exists(args.db):
+        print(f"❌ {args.db} not found, run: python3 analytics_store.py build mentor_metrics.json")
+        sys.exit(1)
+
+    start = time.time()
+    with AnalyticsStore(args.db) as store:
+        if args.command == 'mentors':
+            rows = store.find_mentors(
+                school=args.school,
+                department=args.department,
+                min_evaluations=args.min_evals,
+                below=parse_bounds(args.below),
+                above=parse_bounds(args.above),
+                order_by=args.order,
+                descending=not args.asc,
+                limit=args.limit
+            )
+        elif args.command == 'schools':
+            rows = store.school_summary(args.min_mentors, args.limit)
+        elif args.command == 'dims':
+            rows = store.dimension_stats(args.school)
+        else:
+            store.conn.execute("PRAGMA query_only = ON")
+            rows = store.query(args.query)
+
+    print_rows(rows)
+    print(f"\n{len(rows)} rows in {(time.time() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Read API Server for Mentor Evaluation System
+- Loads mentor metrics once into in-memory indexes (by id, school,
+  department, and pre-sorted per dimension)
+- Serves paginated, filtered and sorted queries under /api/
+- Serves the same paths as the static site under /data/ so docs/js
+  can point at it instead of GitHub Pages
+- LRU response cache with ETag / 304 Not Modified
+- Standard library only (asyncio)
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+import argparse
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from generate_web_data import (
+    DIMENSIONS,
+    build_frame,
+    frame_row,
+    group_by,
+    mentor_summary,
+    generate_school_data,
+    generate_mentor_list_by_school,
+    encode_mentor_lists,
+    generate_distributions,
+    generate_metadata,
+    load_exported_metrics
+)
+
+
+# Largest page a single /api/mentors request may return
+MAX_PAGE_SIZE = 500
+
+STATUS_TEXT = {
+    200: 'OK',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed'
+}
+
+
+class ApiError(Exception):
+    """Error returned to the client as a JSON body"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class MentorStore:
+    """Immutable in-memory mentor index"""
+
+    SORT_FIELDS = ['totalScore', 'evaluationCount', 'name'] + DIMENSIONS
+
+    def __init__(self, mentor_metrics: Dict):
+        """
+        Args:
+            mentor_metrics: Metrics dict keyed by mentor id (rule engine or Qwen format)
+        """
+        frame = build_frame(mentor_metrics)
+        school_groups = group_by(frame, 'school')
+
+        self.details = {}
+        self.summaries = {}
+        for index, mentor_id in enumerate(frame['id']):
+            detail = frame_row(frame, index)
+            self.details[mentor_id] = detail
+            self.summaries[mentor_id] = {**mentor_summary(detail), 'school': detail['school']}
+
+        self.by_school = {
+            school: {frame['id'][i] for i in rows}
+            for school, rows in school_groups.items()
+        }
+        self.by_department = {
+            department: {frame['id'][i] for i in rows}
+            for department, rows in group_by(frame, 'department').items()
+        }
+
+        # Every sort order is computed once; queries only walk these lists
+        self.sorted_ids = {
+            field: sorted(self.summaries, key=lambda mid, f=field: self._sort_key(mid, f))
+            for field in self.SORT_FIELDS
+        }
+
+        self.schools = generate_school_data(frame, school_groups)
+        # Same columnar payload as the static export; per-school paths serve one block of it
+        self.mentors_by_school = encode_mentor_lists(generate_mentor_list_by_school(frame, school_groups))
+        self.distributions = generate_distributions(frame, school_groups)
+        self.metadata = generate_metadata(frame, self.schools)
+
+    def _sort_key(self, mentor_id: str, field: str):
+        """Ascending sort key; mentors without a dimension score sort below every score"""
+        summary = self.summaries[mentor_id]
+        if field == 'name':
+            return (summary['name'], mentor_id)
+        if field in ('totalScore', 'evaluationCount'):
+            return (summary[field], mentor_id)
+        return (summary['dimensionScores'].get(field, -1.0), mentor_id)
+
+    @classmethod
+    def from_metrics_file(cls, path: str) -> 'MentorStore':
+        """Build the store from a mentor_metrics*.json file"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def from_data_dir(cls, data_dir: str) -> 'MentorStore':
+        """Build the store from exported docs/data/mentors/*.json detail files"""
+        return cls(load_exported_metrics(data_dir))
+
+    def query(
+        self,
+        school: str = None,
+        department: str = None,
+        q: str = None,
+        min_score: float = None,
+        sort: str = 'evaluationCount',
+        order: str = 'desc',
+        page: int = 1,
+        page_size: int = 20
+    ) -> Dict:
+        """
+        Filtered, sorted, paginated mentor summaries
+
+        Returns:
+            {'total', 'page', 'pageSize', 'mentors'}
+        """
+        if sort not in self.sorted_ids:
+            raise ApiError(400, f"unknown sort field: {sort}")
+        if order not in ('asc', 'desc'):
+            raise ApiError(400, "order must be asc or desc")
+
+        candidates = None
+        if school:
+            candidates = self.by_school.get(school, set())
+        if department:
+            dept_ids = self.by_department.get(department, set())
+            candidates = dept_ids if candidates is None else candidates & dept_ids
+
+        # A small candidate set is cheaper to sort than to find in the global order
+        if candidates is not None and len(candidates) * 8 < len(self.summaries):
+            ordered = sorted(candidates, key=lambda mid: self._sort_key(mid, sort))
+        else:
+            ordered = self.sorted_ids[sort]
+            if candidates is not None:
+                ordered = [mid for mid in ordered if mid in candidates]
+
+        if order == 'desc':
+            ordered = ordered[::-1]
+
+        if q or min_score is not None:
+            needle = (q or '').lower()
+            ordered = [
+                mid for mid in ordered
+                if (not needle
+                    or needle in self.summaries[mid]['name'].lower()
+                    or needle in self.summaries[mid]['department'].lower())
+                and (min_score is None or self.summaries[mid]['totalScore'] >= min_score)
+            ]
+
+        start = (page - 1) * page_size
+        return {
+            'total': len(ordered),
+            'page': page,
+            'pageSize': page_size,
+            'mentors': [self.summaries[mid] for mid in ordered[start:start + page_size]]
+        }
+
+
+class ResponseCache:
+    """LRU cache of encoded response bodies and their ETags"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        """Cached (body, etag) or None"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+        self.entries.move_to_end(key)
+        self.stats['hits'] += 1
+        return entry
+
+    def put(self, key: str, body: bytes) -> Tuple[bytes, str]:
+        """Store a body and return it with its ETag"""
+        etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self.entries[key] = (body, etag)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return body, etag
+
+
+class MentorApiServer:
+    """Minimal HTTP/1.1 JSON server over a MentorStore"""
+
+    def __init__(self, store: MentorStore, cache_size: int = 1024):
+        self.store = store
+        self.cache = ResponseCache(cache_size)
+
+    def route(self, path: str, params: Dict[str, str]):
+        """Resolve a request path to a JSON-serializable payload"""
+        store = self.store
+
+        # Static-site compatible paths
+        if path == '/data/metadata.json':
+            return store.metadata
+        if path == '/data/schools.json':
+            return store.schools
+        if path == '/data/mentors_by_school.json':
+            return store.mentors_by_school
+        if path == '/data/distributions.json':
+            return store.distributions
+        if path.startswith('/data/mentors_by_school/') and path.endswith('.json'):
+            school = path[len('/data/mentors_by_school/'):-len('.json')]
+            if school not in store.mentors_by_school['schools']:
+                raise ApiError(404, f"unknown school: {school}")
+            return store.mentors_by_school['schools'][school]
+        if path.startswith('/data/mentors/') and path.endswith('.json'):
+            return self._detail(path[len('/data/mentors/'):-len('.json')])
+
+        # Query API
+        if path == '/api/schools':
+            return store.schools
+        if path == '/api/mentors':
+            return store.query(
+                school=params.get('school'),
+                department=params.get('department'),
+                q=params.get('q'),
+                min_score=self._float_param(params, 'minScore'),
+                sort=params.get('sort', 'evaluationCount'),
+                order=params.get('order', 'desc'),
+                page=self._int_param(params, 'page', 1, 1),
+                page_size=min(self._int_param(params, 'pageSize', 20, 1), MAX_PAGE_SIZE)
+            )
+        if path.startswith('/api/mentors/'):
+            return self._detail(path[len('/api/mentors/'):])
+
+        raise ApiError(404, f"not found: {path}")
+
+    def _detail(self, mentor_id: str) -> Dict:
+        detail = self.store.details.get(mentor_id)
+        if detail is None:
+            raise ApiError(404, f"unknown mentor: {mentor_id}")
+        return detail
+
+    @staticmethod
+    def _int_param(params: Dict, name: str, default: int, minimum: int) -> int:
+        try:
+            value = int(params.get(name, default))
+        except ValueError:
+            raise ApiError(400, f"{name} must be an integer")
+        return max(value, minimum)
+
+    @staticmethod
+    def _float_param(params: Dict, name: str) -> Optional[float]:
+        if name not in params:
+            return None
+        try:
+            return float(params[name])
+        except ValueError:
+            raise ApiError(400, f"{name} must be a number")
+
+    def respond(self, method: str, target: str, headers: Dict[str, str]) -> Tuple[int, bytes, Dict]:
+        """
+        Build (status, body, extra headers) for a request
+
+        Successful bodies are cached by path and normalized query string.
+        """
+        if method not in ('GET', 'HEAD'):
+            return self._error(405, f"method not allowed: {method}")
+
+        parts = urlsplit(target)
+        path = unquote(parts.path)
+        params = {k: v[0] for k, v in parse_qs(parts.query).items()}
+
+        if path == '/api/health':
+            body = json.dumps({
+                'mentors': len(self.store.details),
+                'cacheEntries': len(self.cache.entries),
+                **self.cache.stats
+            }).encode('utf-8')
+            return 200, body, {}
+
+        key = path + '?' + '&'.join(f"{k}={v}" for k, v in sorted(params.items()))
+        cached = self.cache.get(key)
+        if cached is None:
+            try:
+                payload = self.route(path, params)
+            except ApiError as e:
+                return self._error(e.status, e.message)
+            body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            cached = self.cache.put(key, body)
+
+        body, etag = cached
+        if headers.get('if-none-match') == etag:
+            return 304, b'', {'ETag': etag}
+        return 200, body, {'ETag': etag}
+
+    @staticmethod
+    def _error(status: int, message: str) -> Tuple[int, bytes, Dict]:
+        return status, json.dumps({'error': message}, ensure_ascii=False).encode('utf-8'), {}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests on one connection until the client closes it"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                status, body, extra = self.respond(method, target, headers)
+                keep_alive = (version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close')
+
+                response_headers = {
+                    'Content-Type': 'application/json; charset=utf-8',
+                    'Content-Length': str(len(body)),
+                    'Cache-Control': 'no-cache',
+                    'Access-Control-Allow-Origin': '*',
+                    'Access-Control-Expose-Headers': 'ETag',
+                    'Connection': 'keep-alive' if keep_alive else 'close',
+                    **extra
+                }
+                head = f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n" + ''.join(
+                    f"{k}: {v}\r\n" for k, v in response_headers.items()
+                ) + "\r\n"
+
+                writer.write(head.encode('latin-1'))
+                if method != 'HEAD':
+                    writer.write(body)
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description='Read API server for mentor evaluation data')
+    parser.add_argument('--metrics', default='mentor_metrics.json',
+                        help='Metrics file to serve (default: mentor_metrics.json)')
+    parser.add_argument('--data-dir', default='docs/data',
+                        help='Exported site data, used when the metrics file does not exist')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--cache-size', type=int, default=1024,
+                        help='Responses kept in the LRU cache (default: 1024)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Mentor Evaluation Read API")
+    print("=" * 60)
+
+    print("\n📂 Loading mentor data...")
+    if os.path.exists(args.metrics):
+        store = MentorStore.from_metrics_file(args.metrics)
+        source = args.metrics
+    else:
+        store = MentorStore.from_data_dir(args.data_dir)
+        source = os.path.join(args.data_dir, 'mentors')
+    print(f"✓ Indexed {len(store.details)} mentors from {source} "
+          f"({len(store.by_school)} schools, {len(store.by_department)} departments)")
+
+    server = MentorApiServer(store, cache_size=args.cache_size)
+    tcp_server = await asyncio.start_server(server.handle_connection, args.host, args.port)
+
+    print(f"\n🚀 Serving on http://{args.host}:{args.port}")
+    print(f"   Point the site at it with: window.MENTOR_API_BASE = 'http://{args.host}:{args.port}'")
+
+    async with tcp_server:
+        await tcp_server.serve_forever()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped")
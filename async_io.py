@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Off-Loop I/O for the Async Qwen Pipeline
+- AsyncJsonWriter: bounded queue of JSON files written by one background
+  task in worker threads, with one fsync pass per group of files
+- EventLoopLagMonitor: measures how late the event loop wakes up, to show
+  whether in-flight requests are being stalled by local work
+"""
+
+import os
+import json
+import time
+import asyncio
+from typing import Dict, List, Tuple
+
+
+def write_json_file(path: str, data, **dump_kwargs):
+    """Write a JSON file atomically (temporary file + rename); blocking"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, **dump_kwargs)
+    os.replace(tmp_path, path)
+
+
+class AsyncJsonWriter:
+    """Background writer for JSON files produced inside the event loop"""
+
+    def __init__(self, max_pending: int = 64, group_size: int = 16, fsync: bool = True):
+        """
+        Args:
+            max_pending: Queued files before write() waits (backpressure)
+            group_size: Files written per worker-thread call and fsync pass
+            fsync: Flush file contents to disk before renaming them into place
+        """
+        self.max_pending = max_pending
+        self.group_size = group_size
+        self.fsync = fsync
+        self.queue = None
+        self.task = None
+
+        self.stats = {'files': 0, 'groups': 0, 'bytes': 0, 'errors': 0,
+                      'write_seconds': 0.0, 'max_pending': 0}
+
+    def start(self):
+        """Start the writer task on the running event loop"""
+        self.queue = asyncio.Queue(self.max_pending)
+        self.task = asyncio.ensure_future(self._run())
+
+    async def write(self, path: str, data, **dump_kwargs):
+        """Queue a file; serialization and disk I/O happen off the event loop"""
+        await self.queue.put((path, data, dump_kwargs))
+        self.stats['max_pending'] = max(self.stats['max_pending'], self.queue.qsize())
+
+    async def close(self):
+        """Write everything still queued and stop the writer task"""
+        if self.task is None:
+            return
+        await self.queue.put(None)
+        await self.task
+        self.task = None
+
+    async def _run(self):
+        closing = False
+        while not closing:
+            group = [await self.queue.get()]
+            while len(group) < self.group_size and not self.queue.empty():
+                group.append(self.queue.get_nowait())
+            if group[-1] is None:
+                closing = True
+                group.pop()
+            if group:
+                try:
+                    await asyncio.to_thread(self._write_group, group)
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    print(f"  ⚠️ Background write failed: {e}")
+
+    def _write_group(self, group: List[Tuple[str, object, Dict]]):
+        """Serialize, write and fsync a group of files (worker thread)"""
+        start = time.perf_counter()
+        written = []
+        for path, data, dump_kwargs in group:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            body = json.dumps(data, ensure_ascii=False, **dump_kwargs).encode('utf-8')
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            written.append((tmp_path, path))
+            self.stats['bytes'] += len(body)
+
+        # One durability pass for the whole group instead of one per write
+        if self.fsync:
+            for tmp_path, _ in written:
+                fd = os.open(tmp_path, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+
+        for tmp_path, path in written:
+            os.replace(tmp_path, path)
+
+        self.stats['files'] += len(written)
+        self.stats['groups'] += 1
+        self.stats['write_seconds'] += time.perf_counter() - start
+
+    def report(self):
+        """Print writer summary"""
+        s = self.stats
+        print(f"\n💾 Background writer:")
+        print(f"   Files: {s['files']} in {s['groups']} groups ({s['bytes'] / 1024:.0f} KB, "
+              f"{s['write_seconds']:.2f}s in worker threads, {s['errors']} failed groups)")
+        print(f"   Peak queue: {s['max_pending']}/{self.max_pending}")
+
+
+class EventLoopLagMonitor:
+    """Samples event-loop scheduling delay"""
+
+    def __init__(self, interval: float = 0.05):
+        """
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.samples = []
+        self.task = None
+
+    def start(self):
+        """Start sampling on the running event loop"""
+        self.task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """Stop sampling"""
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(loop.time() - start - self.interval, 0.0))
+
+    def summary(self) -> Dict[str, float]:
+        """Lag percentiles in milliseconds"""
+        if not self.samples:
+            return {'samples': 0, 'p50': 0.0, 'p99': 0.0, 'max': 0.0}
+        ordered = sorted(self.samples)
+
+        def percentile(q):
+            return ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000
+
+        return {
+            'samples': len(ordered),
+            'p50': percentile(0.5),
+            'p99': percentile(0.99),
+            'max': ordered[-1] * 1000
+        }
+
+    def report(self):
+        """Print lag summary"""
+        s = self.summary()
+        print(f"\n⏱️ Event loop lag ({s['samples']} samples every {self.interval * 1000:.0f}ms):")
+        print(f"   p50 {s['p50']:.1f}ms, p99 {s['p99']:.1f}ms, max {s['max']:.1f}ms")
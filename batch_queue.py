@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lease-Based Batch Queue for Distributed Qwen Scoring
+- A coordinator enqueues the batches of a run into a shared SQLite file
+- Workers (processes or hosts, each with its own API key) lease batches,
+  renew the lease with heartbeats while scoring, and store results
+- Leases of crashed workers expire and are reclaimed by others; a fencing
+  token (the lease attempt) rejects results from a worker whose lease was
+  taken over, so no batch is stored twice
+- The coordinator assembles the final metrics from the stored results
+
+SQLite relies on file locking: use a local disk for several processes, or a
+shared filesystem with working POSIX locks for several hosts.
+"""
+
+import os
+import json
+import time
+import socket
+import sqlite3
+import asyncio
+import hashlib
+import argparse
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS batch (
+    id INTEGER PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated REAL
+);
+
+CREATE TABLE IF NOT EXISTS result (
+    mentor_id TEXT PRIMARY KEY,
+    batch_id INTEGER,
+    metric TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_batch_status ON batch(status, id);
+"""
+
+# Batch states
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def default_worker_id() -> str:
+    """Worker name unique per host and process"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class BatchQueue:
+    """SQLite queue of mentor batches with lease / heartbeat semantics"""
+
+    def __init__(self, path: str = 'qwen_batch_queue.db', lease_seconds: float = 300.0, max_attempts: int = 3):
+        """
+        Args:
+            path: SQLite file shared by coordinator and workers
+            lease_seconds: Lease duration; a batch whose lease is not renewed
+                           within this time is handed to another worker
+            max_attempts: Leases per batch before it is marked failed
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        # Autocommit; write transactions are opened explicitly with BEGIN IMMEDIATE.
+        # Async workers call in from executor threads, serialized by self.lock.
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.lock = threading.RLock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write(self):
+        """Write transaction holding the database lock from the start"""
+        return _Transaction(self.conn, self.lock)
+
+    @staticmethod
+    def fingerprint(batches: List[List[Dict]]) -> str:
+        """Identity of a run: mentor ids in batch order"""
+        digest = hashlib.sha1()
+        for batch in batches:
+            digest.update(('|'.join(m['id'] for m in batch) + '\n').encode('utf-8'))
+        return digest.hexdigest()
+
+    def enqueue(self, batches: List[List[Dict]], results: Dict = None) -> bool:
+        """
+        Add the batches of a run (coordinator)
+
+        Re-enqueueing the same run resumes it; a different run needs a new file.
+
+        Args:
+            batches: Mentor dicts per batch, in scheduling order
+            results: Metrics known without scoring (e.g. neutral or reused), stored as-is
+
+        Returns:
+            True if the batches were added, False if the run was resumed
+        """
+        fingerprint = self.fingerprint(batches)
+        with self._write():
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+            if row is not None:
+                if row[0] != fingerprint:
+                    raise ValueError(f"{self.path} holds a different run; use a new queue file")
+                return False
+
+            now = time.time()
+            self.conn.executemany(
+                "INSERT INTO batch (id, payload, updated) VALUES (?, ?, ?)",
+                [(i, json.dumps(batch, ensure_ascii=False), now) for i, batch in enumerate(batches)]
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO result VALUES (?, NULL, ?)",
+                [(mid, json.dumps(metric, ensure_ascii=False)) for mid, metric in (results or {}).items()]
+            )
+            self.conn.execute("INSERT INTO meta VALUES ('fingerprint', ?)", (fingerprint,))
+        return True
+
+    def lease(self, worker: str) -> Optional[Tuple[int, List[Dict], int]]:
+        """
+        Lease the next pending batch, or reclaim one whose lease expired
+
+        Returns:
+            (batch id, mentors, lease token) or None if nothing is available
+        """
+        now = time.time()
+        with self._write():
+            # Batches whose every lease expired (e.g. they crash their workers) are given up
+            self.conn.execute(
+                "UPDATE batch SET status = ?, worker = NULL, lease_expires = NULL, error = 'lease expired', "
+                "updated = ? WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, now, LEASED, now, self.max_attempts)
+            )
+            row = self.conn.execute(
+                "SELECT id, payload, attempts FROM batch "
+                "WHERE status = ? OR (status = ? AND lease_expires < ?) ORDER BY id LIMIT 1",
+                (PENDING, LEASED, now)
+            ).fetchone()
+            if row is None:
+                return None
+            batch_id, payload, attempts = row
+            token = attempts + 1
+            self.conn.execute(
+                "UPDATE batch SET status = ?, worker = ?, lease_expires = ?, attempts = ?, updated = ? "
+                "WHERE id = ?",
+                (LEASED, worker, now + self.lease_seconds, token, now, batch_id)
+            )
+        return batch_id, json.loads(payload), token
+
+    def heartbeat(self, batch_id: int, worker: str, token: int) -> bool:
+        """Renew a lease; False if it expired and was taken over"""
+        now = time.time()
+        with self._write():
+            cursor = self.conn.execute(
+                "UPDATE batch SET lease_expires = ?, updated = ? "
+                "WHERE id = ? AND status = ? AND worker = ? AND attempts = ?",
+                (now + self.lease_seconds, now, batch_id, LEASED, worker, token)
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, batch_id: int, worker: str, token: int, metrics: Dict) -> bool:
+        """
+        Store the metrics of a leased batch and mark it done
+
+        Returns:
+            False (nothing stored) if the lease no longer belongs to this worker
+        """
+        with self._write():
+            cursor = self.conn.execute(
+                "UPDATE batch SET status = ?, lease_expires = NULL, error = NULL, updated = ? "
+                "WHERE id = ? AND status = ? AND worker = ? AND attempts = ?",
+                (DONE, time.time(), batch_id, LEASED, worker, token)
+            )
+            if cursor.rowcount != 1:
+                return False
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO result VALUES (?, ?, ?)",
+                [(mid, batch_id, json.dumps(metric, ensure_ascii=False)) for mid, metric in metrics.items()]
+            )
+        return True
+
+    def fail(self, batch_id: int, worker: str, token: int, error: str) -> bool:
+        """Release a leased batch after an error; it is retried until max_attempts"""
+        status = FAILED if token >= self.max_attempts else PENDING
+        with self._write():
+            cursor = self.conn.execute(
+                "UPDATE batch SET status = ?, worker = NULL, lease_expires = NULL, error = ?, updated = ? "
+                "WHERE id = ? AND status = ? AND worker = ? AND attempts = ?",
+                (status, error, time.time(), batch_id, LEASED, worker, token)
+            )
+        return cursor.rowcount == 1
+
+    def progress(self) -> Dict[str, int]:
+        """Batch counts per state"""
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        with self.lock:
+            for status, count in self.conn.execute("SELECT status, COUNT(*) FROM batch GROUP BY status"):
+                counts[status] = count
+        return counts
+
+    def drained(self) -> bool:
+        """True once every batch is done or failed (False until a run is enqueued)"""
+        with self.lock:
+            if self.conn.execute("SELECT 1 FROM meta WHERE key = 'fingerprint'").fetchone() is None:
+                return False
+        counts = self.progress()
+        return counts[PENDING] == 0 and counts[LEASED] == 0
+
+    def results(self) -> Dict:
+        """All stored metrics keyed by mentor id"""
+        with self.lock:
+            rows = self.conn.execute("SELECT mentor_id, metric FROM result").fetchall()
+        return {mentor_id: json.loads(metric) for mentor_id, metric in rows}
+
+    def workers(self) -> List[Tuple[str, int, float]]:
+        """Active leases: (worker, batch id, seconds until expiry)"""
+        now = time.time()
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT worker, id, lease_expires FROM batch WHERE status = ? ORDER BY worker, id", (LEASED,)
+            ).fetchall()
+        return [(worker, batch_id, expires - now) for worker, batch_id, expires in rows]
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT / ROLLBACK under the connection lock"""
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.RLock):
+        self.conn = conn
+        self.lock = lock
+
+    def __enter__(self):
+        self.lock.acquire()
+        try:
+            self.conn.execute("BEGIN IMMEDIATE")
+        except Exception:
+            self.lock.release()
+            raise
+        return self.conn
+
+    def __exit__(self, exc_type, *exc):
+        try:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.lock.release()
+
+
+async def heartbeat_loop(queue: BatchQueue, batch_id: int, worker: str, token: int):
+    """Renew a lease every third of its duration until cancelled"""
+    while True:
+        await asyncio.sleep(queue.lease_seconds / 3)
+        if not await asyncio.to_thread(queue.heartbeat, batch_id, worker, token):
+            print(f"  ⚠️ Lease on batch {batch_id} lost; its result will be discarded")
+            return
+
+
+def main():
+    """Command line interface"""
+    parser = argparse.ArgumentParser(description='Lease-based batch queue for distributed Qwen scoring')
+    parser.add_argument('--queue', default='qwen_batch_queue.db', help='SQLite queue file (default: qwen_batch_queue.db)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    work = sub.add_parser('work', help='Score batches from the queue until it is drained')
+    work.add_argument('--concurrency', type=int, default=5)
+    work.add_argument('--worker-id', default=None)
+    work.add_argument('--lease', type=float, default=300.0, help='Lease seconds (default: 300)')
+
+    sub.add_parser('status', help='Show batch counts and active leases')
+
+    args = parser.parse_args()
+
+    if args.command == 'status':
+        with BatchQueue(args.queue) as queue:
+            counts = queue.progress()
+            total = sum(counts.values())
+            print(f"Batches: {total} ({counts[DONE]} done, {counts[LEASED]} leased, "
+                  f"{counts[PENDING]} pending, {counts[FAILED]} failed)")
+            for worker, batch_id, remaining in queue.workers():
+                print(f"  {worker}: batch {batch_id} (lease {'expired' if remaining < 0 else f'{remaining:.0f}s left'})")
+        return
+
+    # pandas and the OpenAI client are only needed by workers
+    from data_processor_qwen_batch import QwenBatchProcessor
+    from qwen_client_pool import QwenClientPool
+
+    # Several keys / endpoints from qwen_endpoints.json or DASHSCOPE_API_KEYS, else one key
+    client_pool = QwenClientPool.from_environment()
+    api_key = None
+    if client_pool is None:
+        api_key = os.environ.get('DASHSCOPE_API_KEY') or input("请输入您的阿里云API Key (sk-xxx): ").strip()
+        if not api_key.startswith('sk-'):
+            print("❌ Invalid API key!")
+            return
+
+    processor = QwenBatchProcessor(api_key, client_pool=client_pool)
+    with BatchQueue(args.queue, lease_seconds=args.lease) as queue:
+        results = asyncio.run(processor.run_worker(
+            queue, worker_id=args.worker_id, concurrency=args.concurrency
+        ))
+    print(f"\n✅ Worker finished: {sum(1 for r in results if r['success'])}/{len(results)} batches succeeded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Comment Preprocessor for LLM Submission
+- Drops empty and placeholder comments (nan / 未知)
+- Strips boilerplate such as "利益相关：..." disclosures
+- Collapses near-duplicate reposts with MinHash over character shingles
+- Tracks estimated token savings
+"""
+
+import re
+import zlib
+from typing import Dict, List, Tuple
+
+
+# Placeholder values produced by fillna / str(nan) that carry no information
+PLACEHOLDER_COMMENTS = {'', 'nan', 'NaN', 'None', 'null', '未知', '不了解', '不清楚', '无'}
+
+# Dimension labels used in the structured comment template
+DIMENSION_LABELS = '导师能力|经费发放|学生补助|与学生关系|工作时间|学生毕业去向'
+
+BOILERPLATE_PATTERNS = [
+    # Conflict-of-interest disclosure, runs until the next dimension label
+    re.compile(rf'利益相关[：:].*?(?=(?:{DIMENSION_LABELS})[：:]|$)', re.S),
+    # Dimension fields the author left as "don't know"
+    re.compile(rf'(?:{DIMENSION_LABELS})[：:]\s*(?:不了解|不清楚|未知|无可奉告)[。，,.\s]*(?=(?:{DIMENSION_LABELS})[：:]|$)'),
+]
+
+NORMALIZE_PATTERN = re.compile(r'[\s\W_]+', re.U)
+CJK_PATTERN = re.compile(r'[　-〿一-鿿＀-￯]')
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate: one per CJK character, one per four other characters"""
+    cjk = len(CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and drop whitespace/punctuation for similarity comparison"""
+    return NORMALIZE_PATTERN.sub('', text.lower())
+
+
+class MinHasher:
+    """
+    One-permutation MinHash signatures over character shingles
+
+    Each shingle is hashed once and assigned to a bin; a bin keeps its minimum
+    hash. This is deterministic across runs and cheap enough for pure Python.
+    """
+
+    EMPTY = -1
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+
+    def shingles(self, text: str) -> set:
+        """Character shingles of normalized text"""
+        text = normalize_text(text)
+        if len(text) <= self.shingle_size:
+            return {text} if text else set()
+        return {text[i:i + self.shingle_size] for i in range(len(text) - self.shingle_size + 1)}
+
+    def signature(self, text: str) -> List[int]:
+        """MinHash signature; bins without any shingle hold EMPTY"""
+        signature = [self.EMPTY] * self.num_perm
+        for shingle in self.shingles(text):
+            h = zlib.crc32(shingle.encode('utf-8'))
+            bin_idx, value = h % self.num_perm, h // self.num_perm
+            current = signature[bin_idx]
+            if current == self.EMPTY or value < current:
+                signature[bin_idx] = value
+        return signature
+
+    @classmethod
+    def similarity(cls, sig_a: List[int], sig_b: List[int]) -> float:
+        """Estimated Jaccard similarity, ignoring bins empty in both signatures"""
+        if not sig_a or len(sig_a) != len(sig_b):
+            return 0.0
+        used = 0
+        matches = 0
+        for a, b in zip(sig_a, sig_b):
+            if a == cls.EMPTY and b == cls.EMPTY:
+                continue
+            used += 1
+            if a == b:
+                matches += 1
+        return matches / used if used else 0.0
+
+
+class CommentPreprocessor:
+    """Clean and deduplicate comments before they are pasted into a prompt"""
+
+    def __init__(self, similarity_threshold: float = 0.8, max_comments: int = 10):
+        """
+        Args:
+            similarity_threshold: Estimated Jaccard similarity at which two comments are duplicates
+            max_comments: Comments per mentor that the prompt would include (for savings accounting)
+        """
+        self.similarity_threshold = similarity_threshold
+        self.max_comments = max_comments
+        self.hasher = MinHasher()
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset accumulated statistics"""
+        self.stats = {
+            'mentors': 0,
+            'skipped_mentors': 0,
+            'comments_in': 0,
+            'comments_kept': 0,
+            'placeholders': 0,
+            'duplicates': 0,
+            'tokens_before': 0,
+            'tokens_after': 0
+        }
+
+    def clean_comment(self, comment: str) -> str:
+        """Strip boilerplate from one comment; returns '' if nothing usable is left"""
+        text = str(comment).strip()
+        if text in PLACEHOLDER_COMMENTS:
+            return ''
+
+        for pattern in BOILERPLATE_PATTERNS:
+            text = pattern.sub('', text)
+
+        text = re.sub(r'\s+', ' ', text).strip(' ，,。.;；')
+        if text in PLACEHOLDER_COMMENTS or not normalize_text(text):
+            return ''
+
+        return text
+
+    def preprocess(self, comments: List[str]) -> List[str]:
+        """
+        Clean and deduplicate a mentor's comments
+
+        Near-duplicates collapse onto the first occurrence, keeping the longer text.
+        """
+        kept = []
+        signatures = []
+
+        for comment in comments:
+            text = self.clean_comment(comment)
+            if not text:
+                self.stats['placeholders'] += 1
+                continue
+
+            signature = self.hasher.signature(text)
+            duplicate_of = None
+            for i, other in enumerate(signatures):
+                if MinHasher.similarity(signature, other) >= self.similarity_threshold:
+                    duplicate_of = i
+                    break
+
+            if duplicate_of is None:
+                kept.append(text)
+                signatures.append(signature)
+            else:
+                self.stats['duplicates'] += 1
+                if len(text) > len(kept[duplicate_of]):
+                    kept[duplicate_of] = text
+                    signatures[duplicate_of] = signature
+
+        self.stats['comments_in'] += len(comments)
+        self.stats['comments_kept'] += len(kept)
+        self.stats['tokens_before'] += sum(
+            estimate_tokens(str(c)) for c in comments[:self.max_comments]
+        )
+        self.stats['tokens_after'] += sum(
+            estimate_tokens(c) for c in kept[:self.max_comments]
+        )
+
+        return kept
+
+    def prepare_mentors(self, mentors: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Attach cleaned comments to each mentor
+
+        The original 'comments' are kept for evaluation counts and export;
+        the cleaned list is stored as 'prompt_comments'.
+
+        Returns:
+            (mentors with usable text, mentors with nothing to send)
+        """
+        usable = []
+        empty = []
+
+        for mentor in mentors:
+            self.stats['mentors'] += 1
+            prompt_comments = self.preprocess(mentor['comments'])
+            prepared = {**mentor, 'prompt_comments': prompt_comments}
+
+            if prompt_comments:
+                usable.append(prepared)
+            else:
+                self.stats['skipped_mentors'] += 1
+                empty.append(prepared)
+
+        return usable, empty
+
+    @staticmethod
+    def neutral_metric(mentor: Dict, dimensions: List[str]) -> Dict:
+        """Neutral scores for a mentor without usable comment text"""
+        return {
+            'id': mentor['id'],
+            'name': mentor['name'],
+            'school': mentor['school'],
+            'department': mentor['department'],
+            'evaluationCount': len(mentor['comments']),
+            'dimensionScores': {dim: 5.0 for dim in dimensions},
+            'dimensionReasons': {dim: '无有效评价内容' for dim in dimensions},
+            'totalScore': 5.0,
+            'overallRecommendation': '暂无有效评价，建议通过其他渠道了解',
+            'evaluations': [{'comment': c, 'dimensions': {}} for c in mentor['comments']],
+            'provenance': {'engine': 'neutral', 'reason': 'no_usable_text'}
+        }
+
+    def report(self):
+        """Print preprocessing and token savings summary"""
+        s = self.stats
+        saved = s['tokens_before'] - s['tokens_after']
+        ratio = saved / s['tokens_before'] * 100 if s['tokens_before'] else 0.0
+        per_mentor_before = s['tokens_before'] / s['mentors'] if s['mentors'] else 0.0
+        per_mentor_after = s['tokens_after'] / s['mentors'] if s['mentors'] else 0.0
+
+        print(f"\n🧹 Comment preprocessing:")
+        print(f"   Comments: {s['comments_in']} → {s['comments_kept']} "
+              f"({s['placeholders']} empty/placeholder, {s['duplicates']} near-duplicates)")
+        print(f"   Mentors skipped (no usable text): {s['skipped_mentors']}/{s['mentors']}")
+        print(f"   Comment tokens: {s['tokens_before']} → {s['tokens_after']} "
+              f"(saved {saved}, {ratio:.1f}%)")
+        print(f"   Tokens per mentor: {per_mentor_before:.1f} → {per_mentor_after:.1f}")
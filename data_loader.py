@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Column-Pruned, Semi-Join Loading of the Mentor / Evaluation Spreadsheets
+- Reads only the columns the pipelines consume
+- Keeps only mentors that have at least one evaluation (semi-join on 编号)
+  before the evaluations are merged with mentor info
+- Fills missing text per column instead of across whole frames, so ids keep
+  their dtype, and stores 学校 / 专业 as categoricals
+"""
+
+import time
+from typing import Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+
+ID_COLUMN = '编号'
+
+# Columns consumed by data_processor*.py
+MENTOR_COLUMNS = [ID_COLUMN, '姓名', '学校', '专业']
+EVALUATION_COLUMNS = [ID_COLUMN, '评价']
+
+# Low-cardinality text stored as pandas categoricals
+CATEGORICAL_COLUMNS = ['学校', '专业']
+
+MISSING = '未知'
+
+
+def _read(path: str, columns: Optional[List[str]]) -> pd.DataFrame:
+    """Read a sheet, limited to columns when given (they must all exist)"""
+    return pd.read_excel(path, engine='xlrd', usecols=columns)
+
+
+def _fill_text(frame: pd.DataFrame, exclude: Iterable[str] = (ID_COLUMN,)) -> pd.DataFrame:
+    """Replace missing values with 未知 in text columns only"""
+    for column in frame.columns:
+        # object, or the str dtype pandas >= 3 infers for text
+        if column not in exclude and pd.api.types.is_string_dtype(frame[column].dtype):
+            frame[column] = frame[column].fillna(MISSING)
+    return frame
+
+
+def fill_missing(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Replace missing values with 未知 in every column
+
+    Matches the frames merged_data.csv was originally written from: numeric
+    columns with gaps become object columns, categoricals gain a 未知 category.
+    """
+    for column in frame.columns:
+        series = frame[column]
+        if not series.isna().any():
+            continue
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            if MISSING not in series.cat.categories:
+                series = series.cat.add_categories([MISSING])
+            frame[column] = series.fillna(MISSING)
+        else:
+            frame[column] = series.astype(object).fillna(MISSING)
+    return frame
+
+
+def load_evaluations(path: str, columns: Optional[List[str]] = EVALUATION_COLUMNS) -> pd.DataFrame:
+    """
+    Load evaluations
+
+    Rows without a mentor id cannot be attributed to anyone and are dropped.
+
+    Args:
+        path: 评价信息.xls
+        columns: Columns to read (None reads all)
+    """
+    evaluations = _read(path, columns)
+    evaluations = evaluations.dropna(subset=[ID_COLUMN]).reset_index(drop=True)
+    return _fill_text(evaluations)
+
+
+def load_mentors(
+    path: str,
+    ids: Optional[Iterable] = None,
+    columns: Optional[List[str]] = MENTOR_COLUMNS
+) -> pd.DataFrame:
+    """
+    Load mentor info
+
+    Args:
+        path: 导师信息.xls
+        ids: Keep only these mentor ids (None keeps all)
+        columns: Columns to read (None reads all)
+    """
+    mentors = _read(path, columns)
+    mentors = mentors.dropna(subset=[ID_COLUMN])
+    if ids is not None:
+        mentors = mentors[mentors[ID_COLUMN].isin(ids)]
+    # First row wins for duplicated ids, as the merge would otherwise duplicate evaluations
+    mentors = mentors.drop_duplicates(subset=[ID_COLUMN]).reset_index(drop=True)
+    mentors = _fill_text(mentors)
+    for column in CATEGORICAL_COLUMNS:
+        if column in mentors.columns:
+            mentors[column] = mentors[column].astype('category')
+    return mentors
+
+
+def load_evaluation_data(
+    mentor_file: str,
+    evaluation_file: str,
+    mentor_columns: Optional[List[str]] = MENTOR_COLUMNS,
+    evaluation_columns: Optional[List[str]] = EVALUATION_COLUMNS
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Load evaluations and the mentors they refer to
+
+    Returns:
+        (mentors, evaluations); mentors holds only ids present in evaluations
+    """
+    start = time.time()
+    evaluations = load_evaluations(evaluation_file, evaluation_columns)
+    mentors = load_mentors(mentor_file, evaluations[ID_COLUMN].unique(), mentor_columns)
+    print(f"✓ Loaded {len(mentors)} evaluated mentors and {len(evaluations)} evaluations "
+          f"({memory_mb(mentors) + memory_mb(evaluations):.1f} MB, {time.time() - start:.1f}s)")
+    return mentors, evaluations
+
+
+def merge_evaluations(evaluations: pd.DataFrame, mentors: pd.DataFrame) -> pd.DataFrame:
+    """Evaluations left-joined with mentor info on 编号"""
+    return pd.merge(evaluations, mentors, on=ID_COLUMN, how='left')
+
+
+def memory_mb(frame: pd.DataFrame) -> float:
+    """Resident size of a frame including string contents"""
+    return frame.memory_usage(deep=True).sum() / 1024 / 1024
@@ -5,14 +5,19 @@ Data Processor Module for Mentor Evaluation System
 Handles data merging, dimension extraction, and metric calculation
 """
 
-import pandas as pd
 import json
 import re
 from collections import defaultdict, Counter
-from typing import Dict, List, Tuple
+from typing import TYPE_CHECKING, Dict, List, Tuple
 import warnings
+from analytics_store import materialize_metrics
 warnings.filterwarnings('ignore')
 
+# pandas (through data_loader) is imported when data is loaded, so importing
+# DimensionExtractor alone stays cheap
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 class DimensionExtractor:
     """Extract evaluation dimensions from comments"""
@@ -38,6 +43,11 @@ class DimensionExtractor:
         '低', '少', '无', '苛刻', '严苛', '畜生', '奴隶', '不管'
     ]
 
+    # Sentiment filter of the detail page (ported from mentor-detail.js, which
+    # keeps them for older exports); short lists without one-character words
+    LABEL_POSITIVE_KEYWORDS = ['好', '优秀', '不错', '负责', '认真', '支持']
+    LABEL_NEGATIVE_KEYWORDS = ['差', '不好', '糟糕', '压榨', '延期', '苛刻']
+
     def extract_dimensions(self, comment: str) -> Dict[str, str]:
         """Extract dimension mentions from a comment"""
         dimensions = {}
@@ -55,6 +65,12 @@ class DimensionExtractor:
 
         return dimensions
 
+    def count_sentiment_hits(self, text: str) -> Tuple[int, int]:
+        """Count positive and negative keyword hits in text"""
+        positive_count = sum(1 for keyword in self.POSITIVE_KEYWORDS if keyword in text)
+        negative_count = sum(1 for keyword in self.NEGATIVE_KEYWORDS if keyword in text)
+        return positive_count, negative_count
+
     def analyze_sentiment(self, text: str) -> float:
         """
         Analyze sentiment of text
@@ -63,8 +79,7 @@ class DimensionExtractor:
         if not text or text == '不了解' or text == '不清楚':
             return 5.0  # Neutral for unknown
 
-        positive_count = sum(1 for keyword in self.POSITIVE_KEYWORDS if keyword in text)
-        negative_count = sum(1 for keyword in self.NEGATIVE_KEYWORDS if keyword in text)
+        positive_count, negative_count = self.count_sentiment_hits(text)
 
         # Calculate base score
         if positive_count > negative_count:
@@ -77,6 +92,36 @@ class DimensionExtractor:
         # Clamp between 0-10
         return max(0.0, min(10.0, score))
 
+    def sentiment_label(self, text: str) -> str:
+        """Classify text as 'positive', 'negative' or 'neutral' by keyword majority (detail page lists)"""
+        positive_count = sum(1 for keyword in self.LABEL_POSITIVE_KEYWORDS if keyword in text)
+        negative_count = sum(1 for keyword in self.LABEL_NEGATIVE_KEYWORDS if keyword in text)
+        if positive_count > negative_count:
+            return 'positive'
+        if negative_count > positive_count:
+            return 'negative'
+        return 'neutral'
+
+    def label_evaluations(self, comments: List[str]) -> List[Dict]:
+        """
+        Sentiment label and dimension tags for a batch of comments
+
+        Identical comments (reposts) are analyzed once.
+
+        Returns:
+            One {'sentiment': str, 'dimensions': {dimension: content}} per comment
+        """
+        labels = {}
+        results = []
+        for comment in comments:
+            if comment not in labels:
+                labels[comment] = {
+                    'sentiment': self.sentiment_label(comment),
+                    'dimensions': self.extract_dimensions(comment)
+                }
+            results.append(labels[comment])
+        return results
+
 
 class MentorDataProcessor:
     """Main data processor for mentor evaluation system"""
@@ -89,27 +134,24 @@ class MentorDataProcessor:
 
     def load_data(self, mentor_file: str, evaluation_file: str):
         """Load data from xls files"""
-        print("📂 Loading data files...")
-        self.mentor_data = pd.read_excel(mentor_file, engine='xlrd')
-        self.evaluation_data = pd.read_excel(evaluation_file, engine='xlrd')
-
-        # Clean NaN values immediately
-        self.mentor_data = self.mentor_data.fillna('未知')
-        self.evaluation_data = self.evaluation_data.fillna('未知')
+        from data_loader import fill_missing, load_evaluation_data
 
-        print(f"✓ Loaded {len(self.mentor_data)} mentors and {len(self.evaluation_data)} evaluations")
+        print("📂 Loading data files...")
+        # All columns are kept for merged_data.csv; only evaluated mentors are loaded
+        self.mentor_data, self.evaluation_data = load_evaluation_data(
+            mentor_file, evaluation_file, mentor_columns=None, evaluation_columns=None
+        )
+        # merged_data.csv keeps its 未知 placeholders in every column
+        self.mentor_data = fill_missing(self.mentor_data)
+        self.evaluation_data = fill_missing(self.evaluation_data)
 
-    def merge_data(self) -> pd.DataFrame:
+    def merge_data(self) -> 'pd.DataFrame':
         """Merge mentor info with evaluations"""
+        from data_loader import merge_evaluations
+
         print("\n🔄 Merging data...")
 
-        # Merge on 编号
-        merged = pd.merge(
-            self.evaluation_data,
-            self.mentor_data,
-            on='编号',
-            how='left'
-        )
+        merged = merge_evaluations(self.evaluation_data, self.mentor_data)
 
         self.merged_data = merged
         print(f"✓ Merged {len(merged)} records")
@@ -192,8 +234,12 @@ class MentorDataProcessor:
         self.merged_data.to_csv(output_file, index=False, encoding='utf-8-sig')
         print(f"✓ Exported {len(self.merged_data)} records")
 
-    def export_mentor_metrics(self, output_file: str = 'mentor_metrics.json'):
-        """Export calculated mentor metrics to JSON"""
+    def export_mentor_metrics(
+        self,
+        output_file: str = 'mentor_metrics.json',
+        analytics_db: str = 'mentor_analytics.db'
+    ):
+        """Export calculated mentor metrics to JSON and the analytics store"""
         metrics = self.process_evaluations()
 
         print(f"\n💾 Exporting metrics to {output_file}...")
@@ -201,6 +247,9 @@ class MentorDataProcessor:
             json.dump(metrics, f, ensure_ascii=False, indent=2)
         print(f"✓ Exported metrics for {len(metrics)} mentors")
 
+        if analytics_db:
+            materialize_metrics(metrics, analytics_db, source=output_file)
+
         return metrics
 
     def generate_summary_stats(self) -> Dict:
@@ -5,26 +5,58 @@ Enhanced Data Processor with Qwen-Plus AI Model
 Uses AI to extract more accurate evaluation dimensions
 """
 
-import pandas as pd
 import json
 import math
 from collections import defaultdict
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, List
 import warnings
 import time
-from openai import OpenAI
+import asyncio
+from analytics_store import materialize_metrics
+from comment_preprocessor import CommentPreprocessor
+from hierarchical_scoring import HierarchicalScorer
+from qwen_client_pool import DASHSCOPE_BASE_URL, QwenClientPool
+from response_parser import load_json_lenient, normalize_dimensions
 
 warnings.filterwarnings('ignore')
 
+# pandas (through data_loader) and openai are imported where they are first used
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Static instructions and output schema, sent as the system prompt so only the
+# mentor-specific part changes between requests
+SYSTEM_PROMPT = """你是一个专业的研究生导师评价分析专家。请分析用户给出的学生评论，从研究生选导师的角度，给出客观的评价。
+
+请从以下6个维度进行评分（0-10分，其中0分最差，10分最好）：
+1. 导师能力（科研能力、学术水平、指导能力）
+2. 经费情况（科研经费充足程度）
+3. 学生补助（每月补贴、工资发放情况）
+4. 师生关系（导师对学生的态度和尊重程度）
+5. 工作时间（工作强度、加班情况、休息时间，分数越高代表工作时间越合理）
+6. 毕业去向（对学生职业发展的支持和关注）
+
+评分标准：评论中没有提及的维度5分（中立）；明确提及且为正面6-10分；明确提及且为负面0-4分。
+
+必须严格按照以下JSON格式输出，不要包含任何其他文字：
+{"导师能力": {"score": 评分数字, "reason": "评分理由（不超过30字）"}, "经费情况": {...}, "学生补助": {...}, "师生关系": {...}, "工作时间": {...}, "毕业去向": {...}, "overall_recommendation": "整体建议（不超过50字）"}"""
+
 
 class QwenDimensionExtractor:
     """AI-powered dimension extractor using Qwen-Plus model"""
 
-    def __init__(self, api_key: str):
-        self.client = OpenAI(
-            api_key=api_key,
-            base_url="https://dashscope.aliyuncs.com/compatible-mode/v1",
-        )
+    def __init__(self, api_key: str, client_pool: QwenClientPool = None):
+        # A client pool spreads requests over several keys / endpoints
+        if client_pool:
+            self.client = client_pool.sync
+        else:
+            from openai import OpenAI
+
+            self.client = OpenAI(
+                api_key=api_key,
+                base_url=DASHSCOPE_BASE_URL,
+            )
         self.model = "qwen-plus"
 
         # Evaluation dimensions
@@ -37,6 +69,8 @@ class QwenDimensionExtractor:
             "毕业去向"
         ]
 
+        self.preprocessor = CommentPreprocessor()
+
     def extract_dimensions_with_ai(
         self,
         mentor_name: str,
@@ -55,69 +89,29 @@ class QwenDimensionExtractor:
             Dictionary with dimension scores and analysis
         """
 
+        # Drop placeholders and near-duplicates; nothing usable means no API call
+        comments = self.preprocessor.preprocess(comments)
+        if not comments:
+            return {
+                **{dim: {"score": 5.0, "reason": "无有效评价内容"} for dim in self.dimensions},
+                "overall_recommendation": "暂无有效评价，建议通过其他渠道了解"
+            }
+
         # Combine all comments for this mentor
         all_comments = "\n\n---\n\n".join(comments[:10])  # Limit to 10 comments to avoid token limit
 
-        prompt = f"""你是一个专业的研究生导师评价分析专家。请分析以下评论，从研究生选导师的角度，给出客观的评价。
-
-**导师信息：**
+        prompt = f"""**导师信息：**
 - 姓名：{mentor_name}
 - 学校：{school_name}
 
 **学生评价：**
-{all_comments}
-
-**任务要求：**
-请根据以上评价，从以下6个维度进行评分（0-10分，其中0分最差，10分最好）：
-
-1. 导师能力（科研能力、学术水平、指导能力）
-2. 经费情况（科研经费充足程度）
-3. 学生补助（每月补贴、工资发放情况）
-4. 师生关系（导师对学生的态度和尊重程度）
-5. 工作时间（工作强度、加班情况、休息时间，分数越高代表工作时间越合理）
-6. 毕业去向（对学生职业发展的支持和关注）
-
-**评分标准：**
-- 如果评论中没有提及某个维度，该维度评分为5分（中立）
-- 如果评论中该维度被明确提及且为正面，评分6-10分
-- 如果评论中该维度被明确提及且为负面，评分0-4分
-
-**输出格式（必须严格按照以下JSON格式）：**
-{{
-  "导师能力": {{
-    "score": 评分数字,
-    "reason": "评分理由（简短，不超过30字）"
-  }},
-  "经费情况": {{
-    "score": 评分数字,
-    "reason": "评分理由"
-  }},
-  "学生补助": {{
-    "score": 评分数字,
-    "reason": "评分理由"
-  }},
-  "师生关系": {{
-    "score": 评分数字,
-    "reason": "评分理由"
-  }},
-  "工作时间": {{
-    "score": 评分数字,
-    "reason": "评分理由"
-  }},
-  "毕业去向": {{
-    "score": 评分数字,
-    "reason": "评分理由"
-  }},
-  "overall_recommendation": "整体建议（简短，不超过50字）"
-}}
-
-请只输出JSON，不要包含任何其他文字。"""
+{all_comments}"""
 
         try:
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=[
-                    {"role": "system", "content": "你是一个专业的研究生导师评价分析专家。请严格按照JSON格式输出结果。"},
+                    {"role": "system", "content": SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.3,
@@ -126,13 +120,9 @@ class QwenDimensionExtractor:
 
             result_text = response.choices[0].message.content.strip()
 
-            # Extract JSON from response
-            if "```json" in result_text:
-                result_text = result_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in result_text:
-                result_text = result_text.split("```")[1].split("```")[0].strip()
-
-            result = json.loads(result_text)
+            # Tolerates code fences, trailing prose, bad escapes and truncation
+            result = load_json_lenient(result_text)
+            normalize_dimensions(result, self.dimensions)
             return result
 
         except Exception as e:
@@ -147,35 +137,29 @@ class QwenDimensionExtractor:
 class EnhancedMentorDataProcessor:
     """Enhanced data processor with AI-powered analysis"""
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, client_pool: QwenClientPool = None):
         self.api_key = api_key
-        self.extractor = QwenDimensionExtractor(api_key)
+        self.client_pool = client_pool
+        self.extractor = QwenDimensionExtractor(api_key, client_pool)
         self.mentor_data = None
         self.evaluation_data = None
         self.merged_data = None
 
     def load_data(self, mentor_file: str, evaluation_file: str):
         """Load data from xls files"""
-        print("📂 Loading data files...")
-        self.mentor_data = pd.read_excel(mentor_file, engine='xlrd')
-        self.evaluation_data = pd.read_excel(evaluation_file, engine='xlrd')
+        from data_loader import load_evaluation_data
 
-        # Clean NaN values
-        self.mentor_data = self.mentor_data.fillna('未知')
-        self.evaluation_data = self.evaluation_data.fillna('未知')
-
-        print(f"✓ Loaded {len(self.mentor_data)} mentors and {len(self.evaluation_data)} evaluations")
+        print("📂 Loading data files...")
+        # Only the consumed columns, and only mentors that have evaluations
+        self.mentor_data, self.evaluation_data = load_evaluation_data(mentor_file, evaluation_file)
 
-    def merge_data(self) -> pd.DataFrame:
+    def merge_data(self) -> 'pd.DataFrame':
         """Merge mentor info with evaluations"""
+        from data_loader import merge_evaluations
+
         print("\n🔄 Merging data...")
 
-        merged = pd.merge(
-            self.evaluation_data,
-            self.mentor_data,
-            on='编号',
-            how='left'
-        )
+        merged = merge_evaluations(self.evaluation_data, self.mentor_data)
 
         self.merged_data = merged
         print(f"✓ Merged {len(merged)} records")
@@ -185,7 +169,8 @@ class EnhancedMentorDataProcessor:
     def process_evaluations_with_ai(
         self,
         sample_size: int = None,
-        delay: float = 0.5
+        delay: float = 0.5,
+        hierarchical: bool = False
     ) -> Dict:
         """
         Process evaluations using AI model
@@ -193,6 +178,8 @@ class EnhancedMentorDataProcessor:
         Args:
             sample_size: Number of mentors to process (None for all)
             delay: Delay between API calls in seconds
+            hierarchical: Score mentors with more than 10 comments over all
+                          their comments via map-reduce instead of truncating
 
         Returns:
             Dictionary with mentor metrics
@@ -232,9 +219,21 @@ class EnhancedMentorDataProcessor:
         total = len(mentor_list)
         print(f"Processing {total} mentors with AI model...")
 
+        long_mentors = []
+
         for i, (mentor_id, data) in enumerate(mentor_list, 1):
             print(f"  [{i}/{total}] Processing {data['name']} ({data['school']})...", end=' ')
 
+            if hierarchical and len(data['comments']) > 10:
+                # Scored over all comments after the loop
+                long_mentors.append({
+                    'id': mentor_id,
+                    **data,
+                    'prompt_comments': self.extractor.preprocessor.preprocess(data['comments'])
+                })
+                print("→ 分块汇总")
+                continue
+
             try:
                 ai_result = self.extractor.extract_dimensions_with_ai(
                     mentor_name=data['name'],
@@ -277,12 +276,45 @@ class EnhancedMentorDataProcessor:
                 print(f"✗ Error: {e}")
                 continue
 
+        if long_mentors:
+            mentor_metrics.update(asyncio.run(self._score_hierarchical(long_mentors)))
+
         print(f"\n✓ Successfully processed {len(mentor_metrics)} mentors")
+        self.extractor.preprocessor.report()
+        if self.client_pool:
+            self.client_pool.report()
 
         return mentor_metrics
 
-    def export_metrics(self, metrics: Dict, output_file: str = 'mentor_metrics_ai.json'):
-        """Export metrics to JSON"""
+    async def _score_hierarchical(self, mentors: List[Dict]) -> Dict:
+        """Map-reduce scoring over every comment for heavily reviewed mentors"""
+        client = self.client_pool
+        if client is None:
+            from openai import AsyncOpenAI
+
+            client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=DASHSCOPE_BASE_URL,
+            )
+        scorer = HierarchicalScorer(client, self.extractor.model)
+
+        costs = [scorer.estimate_cost(m['prompt_comments']) for m in mentors]
+        print(f"\n🧩 Hierarchical mode: {len(mentors)} mentors, "
+              f"{sum(c['chunks'] for c in costs)} chunks ({sum(c['cached_chunks'] for c in costs)} cached)")
+        print(f"   Token budget: ≤{sum(c['input_tokens'] for c in costs)} input, "
+              f"≤{sum(c['max_output_tokens'] for c in costs)} output")
+
+        metrics = await scorer.score_mentors(mentors)
+        scorer.report()
+        return metrics
+
+    def export_metrics(
+        self,
+        metrics: Dict,
+        output_file: str = 'mentor_metrics_ai.json',
+        analytics_db: str = 'mentor_analytics.db'
+    ):
+        """Export metrics to JSON and materialize them into the analytics store"""
         print(f"\n💾 Exporting to {output_file}...")
 
         with open(output_file, 'w', encoding='utf-8') as f:
@@ -290,6 +322,9 @@ class EnhancedMentorDataProcessor:
 
         print(f"✓ Exported {len(metrics)} mentor metrics")
 
+        if analytics_db:
+            materialize_metrics(metrics, analytics_db, source=output_file)
+
 
 def main():
     """Main execution"""
@@ -298,15 +333,20 @@ def main():
     print("Powered by Qwen-Plus AI Model")
     print("=" * 60)
 
-    # API Key
-    api_key = input("\n请输入您的阿里云API Key (sk-xxx): ").strip()
+    # Several keys / endpoints from qwen_endpoints.json or DASHSCOPE_API_KEYS, else one key
+    client_pool = QwenClientPool.from_environment()
+    if client_pool:
+        api_key = None
+        print(f"\n🔑 Using client pool with {len(client_pool.endpoints)} endpoints")
+    else:
+        api_key = input("\n请输入您的阿里云API Key (sk-xxx): ").strip()
 
-    if not api_key or not api_key.startswith('sk-'):
-        print("❌ Invalid API key!")
-        return
+        if not api_key or not api_key.startswith('sk-'):
+            print("❌ Invalid API key!")
+            return
 
     # Initialize processor
-    processor = EnhancedMentorDataProcessor(api_key)
+    processor = EnhancedMentorDataProcessor(api_key, client_pool)
 
     # Load data
     processor.load_data('导师信息.xls', '评价信息.xls')
@@ -336,10 +376,13 @@ def main():
             print("已取消")
             return
 
+    hierarchical = input("评价数超过10条的导师是否启用分块汇总模式（覆盖全部评价）？(y/n): ").strip().lower() == 'y'
+
     # Process evaluations
     metrics = processor.process_evaluations_with_ai(
         sample_size=sample_size,
-        delay=0.5  # 0.5 second delay between requests
+        delay=0.5,  # 0.5 second delay between requests
+        hierarchical=hierarchical
     )
 
     # Export results
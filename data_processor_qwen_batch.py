@@ -4,29 +4,95 @@
 Enhanced Qwen Data Processor with Batch & Async Processing
 - Batch: 20 mentors per request
 - Async: 5 concurrent requests
+- Priority: most viewed mentors are scored first; completed batches can be
+  published to docs/data while the run continues
 - Output: Individual JSON files for review
 """
 
-import pandas as pd
+import os
 import json
 import asyncio
 import time
-from collections import defaultdict
-from typing import Dict, List
-from openai import AsyncOpenAI
-from pathlib import Path
+from collections import Counter, defaultdict, deque
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
 import warnings
+from analytics_store import materialize_metrics
+from comment_preprocessor import CommentPreprocessor
+from hierarchical_scoring import HierarchicalScorer
+from progressive_publisher import ProgressivePublisher, prioritize_mentors
+from request_hedging import HedgingPolicy
+from qwen_client_pool import DASHSCOPE_BASE_URL, QwenClientPool
+from batch_queue import BatchQueue, default_worker_id, heartbeat_loop
+from async_io import AsyncJsonWriter, EventLoopLagMonitor, write_json_file
+from qwen_archive import QwenArchive, prompt_version
+from response_parser import MentorStreamParser
+from similarity_cache import SimilarityCache, scorer_key
 warnings.filterwarnings('ignore')
 
+# pandas (through data_loader) and openai are imported where they are first used,
+# so queue status, --help and other light entry points start fast
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Comments per mentor that fit in one batch prompt; longer sets need hierarchical mode
+MAX_PROMPT_COMMENTS = 10
+
+
+# Static instructions and output schema, identical for every request so the
+# provider can reuse the prompt prefix instead of us repeating it per mentor
+BATCH_SYSTEM_PROMPT = """你是专业的研究生导师评价专家。请从研究生选导师的角度，客观分析用户给出的每一位导师的学生评价。
+
+对每位导师从以下6个维度评分（0-10分）：
+1. 导师能力（科研能力、学术水平、指导能力）
+2. 经费情况（科研经费充足程度）
+3. 学生补助（每月补贴、工资发放情况）
+4. 师生关系（导师对学生的态度和尊重程度）
+5. 工作时间（工作强度、加班情况、休息时间，分数越高代表工作时间越合理）
+6. 毕业去向（对学生职业发展的支持和关注）
+
+评分标准：没有提及的维度5分（中立）；明确正面6-10分；明确负面0-4分。
+
+必须严格按照以下JSON格式输出，输出的导师数量必须与输入一致，不要包含任何其他文字：
+{"mentors": [{"mentor_index": 1, "name": "导师姓名", "导师能力": {"score": 分数, "reason": "评分理由（不超过30字）"}, "经费情况": {...}, "学生补助": {...}, "师生关系": {...}, "工作时间": {...}, "毕业去向": {...}, "overall_recommendation": "整体建议（不超过50字）"}, ...]}"""
+
 
 class QwenBatchProcessor:
     """Batch & Async Qwen-Plus processor"""
 
-    def __init__(self, api_key: str):
-        self.client = AsyncOpenAI(
-            api_key=api_key,
-            base_url="https://dashscope.aliyuncs.com/compatible-mode/v1",
-        )
+    def __init__(
+        self,
+        api_key: Optional[str],
+        similarity_index: str = 'qwen_similarity_index.json',
+        hedge_budget: float = 0.0,
+        client_pool: QwenClientPool = None,
+        archive_path: Optional[str] = 'qwen_outputs.db'
+    ):
+        """
+        Args:
+            api_key: DashScope API key (unused when client_pool is given; None without
+                     a pool creates no client, for offline batch-job files)
+            similarity_index: Index file for reusing scores of near-identical
+                              comment sets (None disables reuse)
+            hedge_budget: Duplicate requests for batches slower than the observed
+                          p95 latency, as a fraction of batches (0 disables hedging)
+            client_pool: Spread requests over several keys / endpoints
+            archive_path: Compressed archive of raw batch responses
+                          (None writes qwen_outputs/batch_XXXX.json files instead)
+        """
+        self.client_pool = client_pool
+        if client_pool:
+            self.client = client_pool
+        elif api_key is None:
+            # Prompts and aggregation only (qwen_batch_jobs.py); no interactive calls
+            self.client = None
+        else:
+            from openai import AsyncOpenAI
+
+            self.client = AsyncOpenAI(
+                api_key=api_key,
+                base_url=DASHSCOPE_BASE_URL,
+            )
         self.model = "qwen-plus"
 
         # Evaluation dimensions
@@ -39,9 +105,23 @@ class QwenBatchProcessor:
             "毕业去向"
         ]
 
+        self.preprocessor = CommentPreprocessor()
+        # Scores are only reused when they come from the same model and system prompt
+        self.similarity_cache = SimilarityCache(
+            similarity_index, scorer=scorer_key(self.model, prompt_version(BATCH_SYSTEM_PROMPT))
+        ) if similarity_index else None
+        self.hedging = HedgingPolicy(budget=hedge_budget) if hedge_budget else None
+        self.archive = QwenArchive(archive_path) if archive_path else None
+        self.run_label = time.strftime('%Y-%m-%dT%H:%M:%S')
+
+        # Background file writer and loop lag monitor, running while batches are processed
+        self.writer = None
+        self.lag_monitor = None
+
     def create_batch_prompt(self, mentors_batch: List[Dict]) -> str:
         """
-        Create prompt for batch of mentors
+        Create the user prompt for a batch of mentors
+        (instructions and schema live in BATCH_SYSTEM_PROMPT)
 
         Args:
             mentors_batch: List of mentor dicts with name, school, comments
@@ -52,69 +132,209 @@ class QwenBatchProcessor:
 
         mentors_text = ""
         for idx, mentor in enumerate(mentors_batch, 1):
-            comments = "\n".join([f"  - {c}" for c in mentor['comments'][:10]])
-            mentors_text += f"""
-【导师 {idx}】
-姓名：{mentor['name']}
-学校：{mentor['school']}
-院系：{mentor['department']}
-评价数：{len(mentor['comments'])}
-学生评价：
-{comments}
+            comments = mentor.get('prompt_comments', mentor['comments'])
+            comments_text = "\n".join([f"  - {c}" for c in comments[:MAX_PROMPT_COMMENTS]])
+            mentors_text += (
+                f"【导师 {idx}】姓名：{mentor['name']}｜学校：{mentor['school']}｜"
+                f"院系：{mentor['department']}｜评价数：{len(mentor['comments'])}\n"
+                f"{comments_text}\n\n"
+            )
 
-"""
+        prompt = f"""请分析以下{len(mentors_batch)}位导师的评价：
 
-        prompt = f"""你是一个专业的研究生导师评价分析专家。请分析以下{len(mentors_batch)}位导师的评价，从研究生选导师的角度，给出客观的评价。
+{mentors_text}请输出{len(mentors_batch)}位导师的评分JSON。"""
 
-{mentors_text}
+        return prompt
 
-**任务要求：**
-对于每一位导师，从以下6个维度进行评分（0-10分）：
-1. 导师能力（科研能力、学术水平、指导能力）
-2. 经费情况（科研经费充足程度）
-3. 学生补助（每月补贴、工资发放情况）
-4. 师生关系（导师对学生的态度和尊重程度）
-5. 工作时间（工作强度、加班情况、休息时间，分数越高代表工作时间越合理）
-6. 毕业去向（对学生职业发展的支持和关注）
+    def request_params(self, prompt: str) -> Dict:
+        """Chat completion parameters of a batch request (also the body of offline batch-job lines)"""
+        return {
+            'model': self.model,
+            'messages': [
+                {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            'temperature': 0.3,
+            'max_tokens': 4000  # Increased for batch processing
+        }
+
+    def build_mentor_metric(self, mentor_data: Dict, mentor_result: Dict) -> Dict:
+        """
+        Convert one validated mentor object from a response into a metric entry
 
-**评分标准：**
-- 没有提及的维度：5分（中立）
-- 明确正面：6-10分
-- 明确负面：0-4分
-
-**输出格式（严格按照以下JSON格式）：**
-{{
-  "mentors": [
-    {{
-      "mentor_index": 1,
-      "name": "导师姓名",
-      "导师能力": {{"score": 分数, "reason": "评分理由（不超过30字）"}},
-      "经费情况": {{"score": 分数, "reason": "评分理由"}},
-      "学生补助": {{"score": 分数, "reason": "评分理由"}},
-      "师生关系": {{"score": 分数, "reason": "评分理由"}},
-      "工作时间": {{"score": 分数, "reason": "评分理由"}},
-      "毕业去向": {{"score": 分数, "reason": "评分理由"}},
-      "overall_recommendation": "整体建议（不超过50字）"
-    }},
-    ...
-  ]
-}}
-
-请只输出JSON，不要包含任何其他文字。确保输出{len(mentors_batch)}位导师的评分。"""
+        Args:
+            mentor_data: Mentor dict the result belongs to
+            mentor_result: Mentor object from the model response
 
-        return prompt
+        Returns:
+            Mentor metric dict
+        """
+        dimension_scores = {}
+        dimension_reasons = {}
+
+        for dim in self.dimensions:
+            if dim in mentor_result:
+                dimension_scores[dim] = float(mentor_result[dim].get('score', 5.0))
+                dimension_reasons[dim] = mentor_result[dim].get('reason', '')
+
+        # Calculate overall score
+        scores = list(dimension_scores.values())
+        total_score = sum(scores) / len(scores) if scores else 5.0
+
+        return {
+            'id': mentor_data['id'],
+            'name': mentor_data['name'],
+            'school': mentor_data['school'],
+            'department': mentor_data['department'],
+            'evaluationCount': len(mentor_data['comments']),
+            'dimensionScores': dimension_scores,
+            'dimensionReasons': dimension_reasons,
+            'totalScore': round(total_score, 2),
+            'overallRecommendation': mentor_result.get('overall_recommendation', ''),
+            'evaluations': [{'comment': c, 'dimensions': {}} for c in mentor_data['comments']]
+        }
+
+    def aggregate_batch(self, batch_mentors: List[Dict], result: Dict) -> Dict:
+        """Map the mentor objects of a batch response back to mentor metrics by mentor_index"""
+        metrics = {}
+        for mentor_result in result.get('mentors', []):
+            mentor_idx = mentor_result.get('mentor_index', 0) - 1
+            if 0 <= mentor_idx < len(batch_mentors):
+                mentor_data = batch_mentors[mentor_idx]
+                metrics[mentor_data['id']] = self.build_mentor_metric(mentor_data, mentor_result)
+        return metrics
+
+    async def _request_batch(
+        self,
+        prompt: str,
+        parser: MentorStreamParser,
+        on_mentor: Callable[[Dict], None] = None
+    ) -> Tuple[Optional[Dict], Optional[Exception]]:
+        """
+        Send one streamed batch request and feed the response into parser
+
+        Returns:
+            (usage, error); mentors that completed before an error stay in parser.mentors
+        """
+        usage = None
+        error = None
+
+        try:
+            stream = await self.client.chat.completions.create(
+                **self.request_params(prompt),
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+
+            async for chunk in stream:
+                if chunk.usage:
+                    usage = chunk.usage.model_dump()
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content or ''
+                for mentor_result in parser.feed(delta):
+                    if on_mentor:
+                        on_mentor(mentor_result)
+
+        except Exception as e:
+            error = e
+
+        # Salvaging a truncated response re-parses the whole text; keep it off the loop
+        for mentor_result in await asyncio.to_thread(parser.close):
+            if on_mentor:
+                on_mentor(mentor_result)
+
+        return usage, error
+
+    async def _hedged_request(
+        self,
+        prompt: str,
+        expected_count: int,
+        batch_id: int
+    ) -> Tuple[MentorStreamParser, Optional[Dict], Optional[Exception]]:
+        """
+        Batch request with a duplicate sent once it runs past the observed p95 latency
+
+        The first response with valid mentors wins and the other request is
+        cancelled. Mentor callbacks are left to the caller, since only the
+        winner's mentors may be used.
+        """
+        policy = self.hedging
+        policy.start_request()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        attempts = {}
+
+        def launch():
+            parser = MentorStreamParser(expected_count, self.dimensions)
+            task = asyncio.ensure_future(self._request_batch(prompt, parser))
+            attempts[task] = (parser, loop.time())
+            return task
+
+        primary = launch()
+        delay = policy.hedge_delay()
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if primary in done or not policy.acquire():
+            usage, error = await primary
+            if error is None:
+                policy.record_latency(loop.time() - start)
+            return attempts[primary][0], usage, error
+
+        print(f"  🪁 Batch {batch_id} still running after {delay:.1f}s (p95), sending a hedge request")
+        hedge = launch()
+
+        results = {}
+        winner = None
+        pending = {primary, hedge}
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in (primary, hedge):
+                if task not in done:
+                    continue
+                usage, error = results[task] = task.result()
+                parser, started = attempts[task]
+                if error is None:
+                    policy.record_latency(loop.time() - started)
+                if winner is None and error is None and parser.mentors:
+                    winner = task
+
+        for task in pending:
+            await policy.cancel(task)
+
+        # Neither response was valid: keep the one with the most salvaged mentors
+        if winner is None:
+            winner = max(results, key=lambda task: len(attempts[task][0].mentors))
+
+        loser = hedge if winner is primary else primary
+        loser_usage = results.get(loser, (None, None))[0]
+        hedge_won = winner is hedge
+        policy.record_outcome(
+            hedge_won,
+            policy.wasted_tokens(BATCH_SYSTEM_PROMPT, prompt, loser_usage, attempts[loser][0].text),
+            policy.estimate_saved(loop.time() - start) if hedge_won else 0.0
+        )
+
+        usage, error = results[winner]
+        return attempts[winner][0], usage, error
 
     async def process_batch_async(
         self,
         mentors_batch: List[Dict],
-        batch_id: int
+        batch_id: int,
+        on_mentor: Callable[[Dict], None] = None
     ) -> Dict:
         """
         Process a batch of mentors asynchronously
 
+        The response is streamed and parsed incrementally: each mentor object
+        is validated and handed to on_mentor as soon as it closes, so partial
+        output survives truncation or trailing garbage. With hedging enabled,
+        mentors are handed over once the winning response is known.
+
         Args:
             mentors_batch: List of mentor dicts
             batch_id: Batch identifier
+            on_mentor: Optional callback for each validated mentor object
 
         Returns:
             Dictionary with results for all mentors in batch
@@ -122,54 +342,150 @@ class QwenBatchProcessor:
 
         prompt = self.create_batch_prompt(mentors_batch)
 
-        try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "你是专业的研究生导师评价专家。必须严格按照JSON格式输出，输出的导师数量必须与输入一致。"},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=4000  # Increased for batch processing
-            )
-
-            result_text = response.choices[0].message.content.strip()
-
-            # Extract JSON from response
-            if "```json" in result_text:
-                result_text = result_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in result_text:
-                result_text = result_text.split("```")[1].split("```")[0].strip()
-
-            result = json.loads(result_text)
-
-            # Save raw response for review
-            output_dir = Path("qwen_outputs")
-            output_dir.mkdir(exist_ok=True)
-
-            with open(output_dir / f"batch_{batch_id:04d}.json", 'w', encoding='utf-8') as f:
-                json.dump({
+        if self.hedging:
+            parser, usage, error = await self._hedged_request(prompt, len(mentors_batch), batch_id)
+            if on_mentor:
+                for mentor_result in parser.mentors:
+                    on_mentor(mentor_result)
+        else:
+            parser = MentorStreamParser(len(mentors_batch), self.dimensions)
+            usage, error = await self._request_batch(prompt, parser, on_mentor)
+
+        if error is not None:
+            if not parser.mentors:
+                print(f"  ✗ Batch {batch_id} error: {error}")
+                return {
                     'batch_id': batch_id,
-                    'mentors': [m['name'] for m in mentors_batch],
-                    'response': result
-                }, f, ensure_ascii=False, indent=2)
-
-            return {'batch_id': batch_id, 'result': result, 'success': True}
-
-        except Exception as e:
-            print(f"  ✗ Batch {batch_id} error: {e}")
+                    'error': str(error),
+                    'success': False,
+                    'mentors': [m['name'] for m in mentors_batch]
+                }
+            # Keep whatever mentors completed before the stream broke
+            print(f"  ⚠️ Batch {batch_id} interrupted after {len(parser.mentors)} mentors: {error}")
+
+        if not parser.mentors:
+            print(f"  ✗ Batch {batch_id} error: no valid mentor objects in response")
             return {
                 'batch_id': batch_id,
-                'error': str(e),
+                'error': 'no valid mentor objects in response',
+                'raw_text': parser.text,
                 'success': False,
                 'mentors': [m['name'] for m in mentors_batch]
             }
 
+        result = {'mentors': parser.mentors}
+
+        # Save raw response for review (serialized and written off the event loop)
+        output = {
+            'batch_id': batch_id,
+            'mentors': [m['name'] for m in mentors_batch],
+            'mentor_ids': [m['id'] for m in mentors_batch],
+            'parse_stats': parser.stats,
+            'usage': usage,
+            'response': result
+        }
+        output_path = os.path.join("qwen_outputs", f"batch_{batch_id:04d}.json")
+        if self.archive:
+            await asyncio.to_thread(
+                self.archive.append, output,
+                model=self.model, prompt_version=prompt_version(BATCH_SYSTEM_PROMPT), run=self.run_label
+            )
+        elif self.writer:
+            await self.writer.write(output_path, output, indent=2)
+        else:
+            await asyncio.to_thread(write_json_file, output_path, output, indent=2)
+
+        return {
+            'batch_id': batch_id,
+            'result': result,
+            'success': True,
+            'parse_stats': parser.stats,
+            'usage': usage
+        }
+
+    def _start_background_io(self):
+        """Start the event-loop lag monitor, and the batch file writer when there is no archive"""
+        # Archived responses never reach qwen_outputs/, so the writer would sit idle
+        if not self.archive:
+            self.writer = AsyncJsonWriter()
+            self.writer.start()
+        self.lag_monitor = EventLoopLagMonitor()
+        self.lag_monitor.start()
+
+    async def _stop_background_io(self):
+        """Flush pending batch files and report writer and loop lag statistics"""
+        if self.writer:
+            await self.writer.close()
+        await self.lag_monitor.stop()
+        if self.writer:
+            self.writer.report()
+        self.lag_monitor.report()
+        self.writer = None
+        self.lag_monitor = None
+
+    async def _execute_batches(
+        self,
+        batches: List[Tuple[int, List[Dict]]],
+        mentor_metrics: Dict,
+        collector: Callable,
+        concurrency: int,
+        publisher: ProgressivePublisher = None,
+        queue: BatchQueue = None
+    ) -> Tuple[int, int, List[Dict]]:
+        """
+        Run the model batches locally or through a shared queue
+
+        Returns:
+            (successful batches, failed batches, batch results of this process)
+        """
+        total_batches = len(batches)
+        if queue is not None:
+            # Distributed: other workers lease batches from the same queue
+            if await asyncio.to_thread(queue.enqueue, [batch for _, batch in batches], mentor_metrics):
+                print(f"   Enqueued {total_batches} batches in {queue.path}")
+            else:
+                print(f"   Resuming queue {queue.path}: {queue.progress()}")
+            results = await self.run_worker(
+                queue, concurrency=concurrency,
+                on_batch=publisher.submit if publisher else None
+            )
+            mentor_metrics.update(await asyncio.to_thread(queue.results))
+            counts = await asyncio.to_thread(queue.progress)
+            success_count = counts['done']
+            error_count = counts['failed']
+        else:
+            # Workers pull batches in priority order; at most `concurrency` are in flight
+            results = []
+            pending_batches = deque(batches)
+
+            async def worker():
+                while pending_batches:
+                    batch_id, batch = pending_batches.popleft()
+                    print(f"  [{batch_id+1}/{total_batches}] Processing batch {batch_id+1} ({len(batch)} mentors)...")
+                    result = await self.process_batch_async(batch, batch_id, on_mentor=collector(batch))
+                    print(f"  [{batch_id+1}/{total_batches}] {'✓' if result['success'] else '✗'} Batch {batch_id+1} completed")
+                    results.append(result)
+                    if publisher:
+                        publisher.submit({
+                            m['id']: mentor_metrics[m['id']] for m in batch if m['id'] in mentor_metrics
+                        })
+
+            # Execute all batches
+            await asyncio.gather(*[worker() for _ in range(min(concurrency, total_batches))])
+            success_count = sum(1 for r in results if r['success'])
+            error_count = total_batches - success_count
+
+        return success_count, error_count, results
+
     async def process_all_batches(
         self,
         all_mentors: List[Dict],
         batch_size: int = 20,
-        concurrency: int = 5
+        concurrency: int = 5,
+        hierarchical: bool = False,
+        prioritize: bool = True,
+        publisher: ProgressivePublisher = None,
+        queue: BatchQueue = None
     ) -> Dict:
         """
         Process all mentors in batches with controlled concurrency
@@ -178,12 +494,42 @@ class QwenBatchProcessor:
             all_mentors: List of all mentor dicts
             batch_size: Number of mentors per batch (default: 20)
             concurrency: Number of concurrent requests (default: 5)
+            hierarchical: Score mentors with more than MAX_PROMPT_COMMENTS comments
+                          over all their comments via map-reduce instead of truncating
+            prioritize: Schedule mentors by expected page traffic instead of input order
+            publisher: Streams completed batches into the web export during the run
+            queue: Shared batch queue; this process becomes the coordinator,
+                   scores batches alongside other workers and assembles their results
 
         Returns:
             Dictionary with all mentor metrics
         """
 
-        # Split into batches
+        school_sizes = Counter(m['school'] for m in all_mentors)
+
+        # Drop placeholders and near-duplicates; mentors with no usable text skip the model
+        self.preprocessor.reset_stats()
+        all_mentors, empty_mentors = self.preprocessor.prepare_mentors(all_mentors)
+        usable_mentors = all_mentors
+
+        # Reuse scores of near-identical comment sets (already indexed or repeated in this run)
+        reused, followers = {}, {}
+        if self.similarity_cache:
+            all_mentors, reused, followers = self.similarity_cache.partition(all_mentors)
+
+        # Mentors whose comments do not fit into one batch slot
+        long_mentors = [m for m in all_mentors if len(m['prompt_comments']) > MAX_PROMPT_COMMENTS]
+        if hierarchical:
+            all_mentors = [m for m in all_mentors if len(m['prompt_comments']) <= MAX_PROMPT_COMMENTS]
+        elif long_mentors:
+            print(f"\n⚠️ {len(long_mentors)} mentors have more than {MAX_PROMPT_COMMENTS} comments; "
+                  f"only the first {MAX_PROMPT_COMMENTS} are scored (enable hierarchical mode for full coverage)")
+
+        # Most viewed mentors first, so they are refreshed early in a long run
+        if prioritize:
+            all_mentors = prioritize_mentors(all_mentors, school_sizes)
+
+        # Split into batches (batch order is scheduling order)
         batches = []
         for i in range(0, len(all_mentors), batch_size):
             batch = all_mentors[i:i + batch_size]
@@ -193,109 +539,180 @@ class QwenBatchProcessor:
         print(f"\n📦 Processing {len(all_mentors)} mentors in {total_batches} batches")
         print(f"   Batch size: {batch_size}, Concurrency: {concurrency}\n")
 
-        # Process batches with concurrency limit
-        results = []
-        semaphore = asyncio.Semaphore(concurrency)
-
-        async def process_with_semaphore(batch_id, batch):
-            async with semaphore:
-                print(f"  [{batch_id+1}/{total_batches}] Processing batch {batch_id+1} ({len(batch)} mentors)...")
-                result = await self.process_batch_async(batch, batch_id)
-                print(f"  [{batch_id+1}/{total_batches}] {'✓' if result['success'] else '✗'} Batch {batch_id+1} completed")
-                return result
-
-        # Execute all batches
-        results = await asyncio.gather(*[
-            process_with_semaphore(batch_id, batch)
-            for batch_id, batch in batches
-        ])
-
-        # Aggregate results
-        mentor_metrics = {}
-        success_count = 0
-        error_count = 0
+        # Mentors are aggregated as soon as their object closes in the stream
+        mentor_metrics = {
+            mentor['id']: CommentPreprocessor.neutral_metric(mentor, self.dimensions)
+            for mentor in empty_mentors
+        }
+        mentor_metrics.update(reused)
+        if publisher:
+            publisher.submit(mentor_metrics)
+
+        def collector(batch):
+            def collect(mentor_result):
+                mentor_data = batch[mentor_result['mentor_index'] - 1]
+                mentor_metrics[mentor_data['id']] = self.build_mentor_metric(mentor_data, mentor_result)
+            return collect
+
+        self._start_background_io()
+        try:
+            success_count, error_count, results = await self._execute_batches(
+                batches, mentor_metrics, collector, concurrency, publisher, queue
+            )
+        finally:
+            await self._stop_background_io()
 
+        # Summarize results
+        parse_totals = {}
         for batch_result in results:
-            if batch_result['success']:
-                success_count += 1
-                batch_id = batch_result['batch_id']
-                batch_mentors = batches[batch_id][1]
-
-                # Map results back to mentors
-                for mentor_result in batch_result['result'].get('mentors', []):
-                    mentor_idx = mentor_result.get('mentor_index', 0) - 1
-                    if 0 <= mentor_idx < len(batch_mentors):
-                        mentor_data = batch_mentors[mentor_idx]
-                        mentor_id = mentor_data['id']
-
-                        # Extract scores and reasons
-                        dimension_scores = {}
-                        dimension_reasons = {}
-
-                        for dim in self.dimensions:
-                            if dim in mentor_result:
-                                dimension_scores[dim] = float(mentor_result[dim].get('score', 5.0))
-                                dimension_reasons[dim] = mentor_result[dim].get('reason', '')
-
-                        # Calculate overall score
-                        scores = list(dimension_scores.values())
-                        total_score = sum(scores) / len(scores) if scores else 5.0
-
-                        mentor_metrics[mentor_id] = {
-                            'id': mentor_id,
-                            'name': mentor_data['name'],
-                            'school': mentor_data['school'],
-                            'department': mentor_data['department'],
-                            'evaluationCount': len(mentor_data['comments']),
-                            'dimensionScores': dimension_scores,
-                            'dimensionReasons': dimension_reasons,
-                            'totalScore': round(total_score, 2),
-                            'overallRecommendation': mentor_result.get('overall_recommendation', ''),
-                            'evaluations': [{'comment': c, 'dimensions': {}} for c in mentor_data['comments']]
-                        }
-            else:
-                error_count += 1
+            for key, value in batch_result.get('parse_stats', {}).items():
+                parse_totals[key] = parse_totals.get(key, 0) + value
+
+        # Map-reduce over every comment for heavily reviewed mentors
+        scorer = None
+        if hierarchical and long_mentors:
+            scorer = HierarchicalScorer(self.client, self.model, concurrency=concurrency)
+            costs = [scorer.estimate_cost(m['prompt_comments']) for m in long_mentors]
+            print(f"\n🧩 Hierarchical mode: {len(long_mentors)} mentors, "
+                  f"{sum(c['chunks'] for c in costs)} chunks ({sum(c['cached_chunks'] for c in costs)} cached)")
+            print(f"   Token budget: ≤{sum(c['input_tokens'] for c in costs)} input, "
+                  f"≤{sum(c['max_output_tokens'] for c in costs)} output")
+            mentor_metrics.update(await scorer.score_mentors(long_mentors))
+
+        if self.similarity_cache:
+            mentor_metrics.update(self.similarity_cache.resolve(followers, mentor_metrics))
+            self.similarity_cache.record(usable_mentors, mentor_metrics)
+            self.similarity_cache.save()
+
+        if publisher:
+            publisher.submit(mentor_metrics)
+            await publisher.flush()
 
         print(f"\n✅ Processing complete!")
         print(f"   Success: {success_count}/{total_batches} batches")
         print(f"   Errors: {error_count}/{total_batches} batches")
         print(f"   Mentors processed: {len(mentor_metrics)}")
+        if parse_totals:
+            print(f"   Response objects: {parse_totals.get('accepted', 0)} accepted, "
+                  f"{parse_totals.get('repaired', 0)} repaired, {parse_totals.get('rejected', 0)} rejected, "
+                  f"{parse_totals.get('salvaged', 0)} salvaged from truncated output")
+        self.preprocessor.report()
+        if scorer:
+            scorer.report()
+        if self.similarity_cache:
+            self.similarity_cache.report()
+        if self.hedging:
+            self.hedging.report()
+        if self.client_pool:
+            self.client_pool.report()
+        if publisher:
+            publisher.report()
 
         return mentor_metrics
 
+    async def run_worker(
+        self,
+        queue: BatchQueue,
+        worker_id: str = None,
+        concurrency: int = 5,
+        poll_interval: float = 5.0,
+        on_batch: Callable[[Dict], None] = None
+    ) -> List[Dict]:
+        """
+        Score batches leased from a shared queue until it is drained
+
+        Each in-flight batch keeps its lease alive with heartbeats; results are
+        stored only while the lease is still held, so a batch reclaimed by
+        another worker is never stored twice.
+
+        Args:
+            queue: Shared batch queue
+            worker_id: Worker name (default: host-pid)
+            concurrency: Batches in flight in this process
+            poll_interval: Seconds between checks while other workers hold the remaining leases
+            on_batch: Optional callback with the metrics of each stored batch
+
+        Returns:
+            Batch results processed by this worker
+        """
+        worker_id = worker_id or default_worker_id()
+        results = []
+
+        # Standalone workers run their own writer and lag monitor
+        owns_io = self.lag_monitor is None
+        if owns_io:
+            self._start_background_io()
+        print(f"\n👷 Worker {worker_id}: leasing batches from {queue.path} ({concurrency} in flight)")
+
+        async def slot():
+            while True:
+                # SQLite may wait on other processes' locks; keep it off the event loop
+                lease = await asyncio.to_thread(queue.lease, worker_id)
+                if lease is None:
+                    if await asyncio.to_thread(queue.drained):
+                        return
+                    # Remaining batches are leased elsewhere; wait in case a lease expires
+                    await asyncio.sleep(poll_interval)
+                    continue
+
+                batch_id, batch, token = lease
+                batch_metrics = {}
+
+                def collect(mentor_result):
+                    mentor_data = batch[mentor_result['mentor_index'] - 1]
+                    batch_metrics[mentor_data['id']] = self.build_mentor_metric(mentor_data, mentor_result)
+
+                print(f"  [{batch_id+1}] Processing batch {batch_id+1} ({len(batch)} mentors, attempt {token})...")
+                heartbeat = asyncio.ensure_future(heartbeat_loop(queue, batch_id, worker_id, token))
+                try:
+                    result = await self.process_batch_async(batch, batch_id, on_mentor=collect)
+                finally:
+                    heartbeat.cancel()
+                results.append(result)
+
+                if not result['success']:
+                    await asyncio.to_thread(queue.fail, batch_id, worker_id, token, result['error'])
+                    print(f"  [{batch_id+1}] ✗ Batch {batch_id+1} failed; released for retry")
+                elif await asyncio.to_thread(queue.complete, batch_id, worker_id, token, batch_metrics):
+                    print(f"  [{batch_id+1}] ✓ Batch {batch_id+1} stored")
+                    if on_batch:
+                        on_batch(batch_metrics)
+                else:
+                    print(f"  [{batch_id+1}] ⚠️ Batch {batch_id+1} was reclaimed by another worker; result discarded")
+
+        try:
+            await asyncio.gather(*[slot() for _ in range(concurrency)])
+        finally:
+            if owns_io:
+                await self._stop_background_io()
+        return results
+
 
 class EnhancedMentorDataProcessor:
     """Enhanced data processor with batch + async AI"""
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, hedge_budget: float = 0.0, client_pool: QwenClientPool = None):
         self.api_key = api_key
-        self.processor = QwenBatchProcessor(api_key)
+        self.processor = QwenBatchProcessor(api_key, hedge_budget=hedge_budget, client_pool=client_pool)
         self.mentor_data = None
         self.evaluation_data = None
         self.merged_data = None
 
     def load_data(self, mentor_file: str, evaluation_file: str):
         """Load data from xls files"""
-        print("📂 Loading data files...")
-        self.mentor_data = pd.read_excel(mentor_file, engine='xlrd')
-        self.evaluation_data = pd.read_excel(evaluation_file, engine='xlrd')
+        from data_loader import load_evaluation_data
 
-        # Clean NaN values
-        self.mentor_data = self.mentor_data.fillna('未知')
-        self.evaluation_data = self.evaluation_data.fillna('未知')
-
-        print(f"✓ Loaded {len(self.mentor_data)} mentors and {len(self.evaluation_data)} evaluations")
+        print("📂 Loading data files...")
+        # Only the consumed columns, and only mentors that have evaluations
+        self.mentor_data, self.evaluation_data = load_evaluation_data(mentor_file, evaluation_file)
 
-    def merge_data(self) -> pd.DataFrame:
+    def merge_data(self) -> 'pd.DataFrame':
         """Merge mentor info with evaluations"""
+        from data_loader import merge_evaluations
+
         print("\n🔄 Merging data...")
 
-        merged = pd.merge(
-            self.evaluation_data,
-            self.mentor_data,
-            on='编号',
-            how='left'
-        )
+        merged = merge_evaluations(self.evaluation_data, self.mentor_data)
 
         self.merged_data = merged
         print(f"✓ Merged {len(merged)} records")
@@ -339,7 +756,10 @@ class EnhancedMentorDataProcessor:
         self,
         sample_size: int = None,
         batch_size: int = 20,
-        concurrency: int = 5
+        concurrency: int = 5,
+        hierarchical: bool = False,
+        publisher: ProgressivePublisher = None,
+        queue: BatchQueue = None
     ) -> Dict:
         """Process evaluations with AI"""
         mentors_list = self.prepare_mentors_data(sample_size)
@@ -347,13 +767,21 @@ class EnhancedMentorDataProcessor:
         metrics = await self.processor.process_all_batches(
             mentors_list,
             batch_size=batch_size,
-            concurrency=concurrency
+            concurrency=concurrency,
+            hierarchical=hierarchical,
+            publisher=publisher,
+            queue=queue
         )
 
         return metrics
 
-    def export_metrics(self, metrics: Dict, output_file: str = 'mentor_metrics_qwen_batch.json'):
-        """Export metrics to JSON"""
+    def export_metrics(
+        self,
+        metrics: Dict,
+        output_file: str = 'mentor_metrics_qwen_batch.json',
+        analytics_db: str = 'mentor_analytics.db'
+    ):
+        """Export metrics to JSON and materialize them into the analytics store"""
         print(f"\n💾 Exporting to {output_file}...")
 
         with open(output_file, 'w', encoding='utf-8') as f:
@@ -361,6 +789,9 @@ class EnhancedMentorDataProcessor:
 
         print(f"✓ Exported {len(metrics)} mentor metrics")
 
+        if analytics_db:
+            materialize_metrics(metrics, analytics_db, source=output_file)
+
 
 async def main():
     """Main execution"""
@@ -368,15 +799,23 @@ async def main():
     print("Qwen Batch & Async Processor")
     print("=" * 60)
 
-    # API Key
-    api_key = input("\n请输入您的阿里云API Key (sk-xxx): ").strip()
+    # Several keys / endpoints from qwen_endpoints.json or DASHSCOPE_API_KEYS, else one key
+    client_pool = QwenClientPool.from_environment()
+    if client_pool:
+        api_key = None
+        print(f"\n🔑 Using client pool with {len(client_pool.endpoints)} endpoints")
+    else:
+        api_key = input("\n请输入您的阿里云API Key (sk-xxx): ").strip()
+
+        if not api_key or not api_key.startswith('sk-'):
+            print("❌ Invalid API key!")
+            return
 
-    if not api_key or not api_key.startswith('sk-'):
-        print("❌ Invalid API key!")
-        return
+    # Hedge batches that run past the observed p95 latency
+    hedge = input("是否为超过 p95 延迟的批次发送对冲请求（额外调用不超过 10%）？(y/n): ").strip().lower() == 'y'
 
     # Initialize processor
-    processor = EnhancedMentorDataProcessor(api_key)
+    processor = EnhancedMentorDataProcessor(api_key, hedge_budget=0.1 if hedge else 0.0, client_pool=client_pool)
 
     # Load data
     processor.load_data('导师信息.xls', '评价信息.xls')
@@ -406,13 +845,30 @@ async def main():
             print("已取消")
             return
 
+    hierarchical = input(f"评价数超过{MAX_PROMPT_COMMENTS}条的导师是否启用分块汇总模式（覆盖全部评价）？(y/n): ").strip().lower() == 'y'
+
+    # Mentors not rescored yet keep their published scores, so only publish on top of a full export
+    publisher = None
+    if os.path.exists('mentor_metrics.json'):
+        if input("是否在处理过程中将已完成的批次逐步发布到 docs/data？(y/n): ").strip().lower() == 'y':
+            publisher = ProgressivePublisher.from_metrics_file('mentor_metrics.json')
+
+    # Distributed mode: more workers join with `python3 batch_queue.py --queue <file> work`
+    queue = None
+    queue_path = input("分布式模式队列文件（留空为单机模式，例如 qwen_batch_queue.db）: ").strip()
+    if queue_path:
+        queue = BatchQueue(queue_path)
+
     start_time = time.time()
 
     # Process evaluations
     metrics = await processor.process_with_ai(
         sample_size=sample_size,
         batch_size=20,
-        concurrency=5
+        concurrency=5,
+        hierarchical=hierarchical,
+        publisher=publisher,
+        queue=queue
     )
 
     elapsed = time.time() - start_time
@@ -441,7 +897,7 @@ async def main():
     print("=" * 60)
     print(f"\n生成的文件:")
     print(f"  - {output_file}")
-    print(f"  - qwen_outputs/batch_*.json ({len(metrics) // 20 + 1} files)")
+    print(f"  - qwen_outputs.db (raw responses; python3 qwen_archive.py mentor <id>)")
     print(f"\n处理的导师数: {len(metrics)}")
     print(f"耗时: {elapsed:.1f} 秒 ({elapsed/60:.1f} 分钟)")
     print(f"平均每位导师: {elapsed/len(metrics):.2f} 秒")
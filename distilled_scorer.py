@@ -0,0 +1,549 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Distilled CPU Scorer Trained on Qwen Outputs
+- Hashed character 1-3-gram features of a mentor's cleaned comments
+- One closed-form ridge regressor per dimension for the score, and one for
+  whether Qwen scored that dimension at all (it omits dimensions without evidence)
+- Trained from existing Qwen metrics (metrics file or exported docs/data);
+  a deterministic hash split by mentor id is held out to report agreement
+- Scores the full dataset in seconds without network access; output is in
+  the Qwen metrics format with provenance engine 'distilled'
+
+NumPy is imported inside the functions that need it.
+"""
+
+import os
+import json
+import time
+import zlib
+import argparse
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from data_processor import DimensionExtractor
+from comment_preprocessor import CommentPreprocessor, normalize_text
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+DIMENSIONS = list(DimensionExtractor.DIMENSIONS.keys())
+
+# Engines whose scores are not Qwen labels and must not be learned from
+NON_QWEN_ENGINES = {'rules', 'neutral', 'distilled'}
+
+SCORE_RANGE = (0.0, 10.0)
+
+
+def mentor_text(comments: List[str], preprocessor: CommentPreprocessor) -> str:
+    """Cleaned, exactly deduplicated comments of a mentor as one normalized string"""
+    seen = []
+    for comment in comments:
+        text = normalize_text(preprocessor.clean_comment(comment))
+        if text and text not in seen:
+            seen.append(text)
+    # Separator keeps n-grams from spanning two comments
+    return '|'.join(seen)
+
+
+def in_holdout(mentor_id: str, fraction: float) -> bool:
+    """Stable train/holdout assignment of a mentor"""
+    return zlib.crc32(str(mentor_id).encode('utf-8')) % 1000 < fraction * 1000
+
+
+def metric_mentor(mentor_id: str, data: Dict) -> Dict:
+    """Mentor dict (id, name, school, department, comments) of one metrics entry, in either format"""
+    return {
+        'id': data.get('id', mentor_id),
+        'name': data.get('name', ''),
+        'school': data.get('school', ''),
+        'department': data.get('department', ''),
+        'comments': [e.get('comment', '') for e in data.get('evaluations', [])]
+    }
+
+
+def training_examples(metrics: Dict) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Mentors and their Qwen dimension scores from a metrics dict
+
+    Rule, neutral and distilled results are skipped. Mentors Qwen scored
+    without any dimension stay in: they teach the presence models.
+
+    Returns:
+        (mentors with id and comments, dimensionScores per mentor)
+    """
+    mentors = []
+    labels = []
+    for mentor_id, data in metrics.items():
+        engine = (data.get('provenance') or {}).get('engine')
+        if engine in NON_QWEN_ENGINES or 'total_score' in data:
+            continue
+        mentors.append(metric_mentor(mentor_id, data))
+        scores = data.get('dimensionScores') or {}
+        labels.append({dim: scores[dim] for dim in DIMENSIONS if dim in scores})
+    return mentors, labels
+
+
+class HashedNgramVectorizer:
+    """Character n-grams hashed into a fixed number of buckets (CSR output)"""
+
+    # Multiplier of the rolling n-gram hash; arithmetic wraps modulo 2**64
+    PRIME = 1099511628211
+
+    def __init__(self, n_features: int = 4096, ngram_range: Tuple[int, int] = (1, 3)):
+        """
+        Args:
+            n_features: Hash buckets (feature dimension)
+            ngram_range: Smallest and largest n-gram length
+        """
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+
+    def transform(self, texts: List[str]) -> Tuple['np.ndarray', 'np.ndarray', 'np.ndarray']:
+        """
+        Sublinear (log1p) counts, L2-normalized per row
+
+        All texts are hashed at once as one code point array (stable across
+        processes, unlike hash()); n-grams spanning two texts are dropped.
+
+        Returns:
+            (indptr, indices, values) of an n_texts x n_features CSR matrix
+        """
+        import numpy as np
+
+        # NUL never survives normalize_text, so it is a safe text separator
+        joined = '\0'.join(texts) + '\0'
+        codes = np.frombuffer(joined.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        lengths = np.fromiter((len(t) + 1 for t in texts), dtype=np.int64, count=len(texts))
+        row_of = np.repeat(np.arange(len(texts), dtype=np.uint64), lengths)
+
+        keys = []
+        low, high = self.ngram_range
+        with np.errstate(over='ignore'):
+            for n in range(low, high + 1):
+                count = len(codes) - n + 1
+                if count <= 0:
+                    continue
+                h = np.full(count, n, dtype=np.uint64)
+                valid = np.ones(count, dtype=bool)
+                for j in range(n):
+                    window = codes[j:j + count]
+                    h = h * np.uint64(self.PRIME) + window
+                    valid &= window != 0
+                # Final avalanche so that the modulo uses all bits
+                h ^= h >> np.uint64(29)
+                h *= np.uint64(0xbf58476d1ce4e5b9)
+                h ^= h >> np.uint64(32)
+                buckets = h % np.uint64(self.n_features)
+                keys.append(row_of[:count][valid] * np.uint64(self.n_features) + buckets[valid])
+
+        # Sorted unique (row, bucket) pairs are the CSR layout
+        pairs, counts = np.unique(np.concatenate(keys) if keys else np.zeros(0, np.uint64), return_counts=True)
+        rows = (pairs // np.uint64(self.n_features)).astype(np.int64)
+        indices = (pairs % np.uint64(self.n_features)).astype(np.int64)
+
+        values = np.log1p(counts.astype(np.float64))
+        norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=len(texts)))
+        values /= np.where(norms > 0, norms, 1.0)[rows]
+
+        indptr = np.searchsorted(rows, np.arange(len(texts) + 1))
+        return indptr.astype(np.int64), indices, values
+
+
+class DistilledScorer:
+    """Per-dimension ridge regressors over hashed n-grams, distilled from Qwen scores"""
+
+    def __init__(self, n_features: int = 4096, alpha: float = 1.0, holdout: float = 0.2):
+        """
+        Args:
+            n_features: Hash buckets of the n-gram features
+            alpha: Ridge regularization strength
+            holdout: Fraction of mentors (by id hash) kept out of training
+        """
+        self.vectorizer = HashedNgramVectorizer(n_features)
+        self.alpha = alpha
+        self.holdout = holdout
+        self.path = None
+
+        # n_features x (score, presence) per dimension, and their intercepts
+        self.weights = None
+        self.intercepts = None
+
+        self.preprocessor = CommentPreprocessor()
+        self.stats = {'trained_on': 0, 'scored': 0, 'featurize_seconds': 0.0, 'seconds': 0.0}
+
+    def featurize(self, mentors: List[Dict]):
+        """CSR features of mentors' comments"""
+        start = time.time()
+        texts = [mentor_text(m['comments'], self.preprocessor) for m in mentors]
+        features = self.vectorizer.transform(texts)
+        self.stats['featurize_seconds'] += time.time() - start
+        return features
+
+    # ------------------------------------------------------------------
+    # Sparse helpers (NumPy only)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _row_ids(indptr: 'np.ndarray') -> 'np.ndarray':
+        import numpy as np
+
+        return np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+
+    def _gram(self, features, rows: 'np.ndarray', chunk: int = 1024) -> 'np.ndarray':
+        """X[rows]^T X[rows], built from dense row chunks"""
+        import numpy as np
+
+        indptr, indices, values = features
+        d = self.vectorizer.n_features
+        gram = np.zeros((d, d))
+        for start in range(0, len(rows), chunk):
+            block = np.zeros((len(rows[start:start + chunk]), d), dtype=np.float32)
+            for local, row in enumerate(rows[start:start + chunk]):
+                lo, hi = indptr[row], indptr[row + 1]
+                block[local, indices[lo:hi]] = values[lo:hi]
+            gram += block.T @ block
+        return gram
+
+    def _transpose_dot(self, features, targets: 'np.ndarray') -> 'np.ndarray':
+        """X^T targets for a targets vector with one value per row"""
+        import numpy as np
+
+        indptr, indices, values = features
+        weights = values * np.repeat(targets, np.diff(indptr))
+        return np.bincount(indices, weights=weights, minlength=self.vectorizer.n_features)
+
+    def _dot(self, features, weights: 'np.ndarray') -> 'np.ndarray':
+        """X @ weights for an n_features x k weight matrix"""
+        import numpy as np
+
+        indptr, indices, values = features
+        rows = self._row_ids(indptr)
+        n = len(indptr) - 1
+        return np.stack([
+            np.bincount(rows, weights=values * weights[indices, j], minlength=n)
+            for j in range(weights.shape[1])
+        ], axis=1)
+
+    def _solve(self, gram: 'np.ndarray', features, targets: 'np.ndarray', mask: 'np.ndarray') -> Tuple['np.ndarray', 'np.ndarray']:
+        """
+        Ridge regression with intercept over the masked rows
+
+        gram must already be X[mask]^T X[mask]; centering is applied in closed
+        form. targets is n_rows x k, all k columns share one solve.
+
+        Returns:
+            (n_features x k weights, k intercepts)
+        """
+        import numpy as np
+
+        n = int(mask.sum())
+        column_means = self._transpose_dot(features, mask.astype(np.float64)) / n
+        target_means = targets[mask].mean(axis=0)
+        xty = np.stack([
+            self._transpose_dot(features, np.where(mask, targets[:, j], 0.0))
+            for j in range(targets.shape[1])
+        ], axis=1)
+
+        centered = gram - n * np.outer(column_means, column_means)
+        centered[np.diag_indices_from(centered)] += self.alpha
+        weights = np.linalg.solve(centered, xty - n * np.outer(column_means, target_means))
+        return weights, target_means - column_means @ weights
+
+    # ------------------------------------------------------------------
+    # Training / inference
+    # ------------------------------------------------------------------
+
+    def fit(self, mentors: List[Dict], labels: List[Dict]) -> 'DistilledScorer':
+        """
+        Fit score and presence regressors for every dimension
+
+        Args:
+            mentors: Mentor dicts with comments
+            labels: Qwen dimensionScores per mentor (missing dimension = not scored)
+        """
+        import numpy as np
+
+        start = time.time()
+        features = self.featurize(mentors)
+        n = len(mentors)
+        everyone = np.ones(n, dtype=bool)
+
+        full_gram = self._gram(features, np.arange(n))
+        weights = np.zeros((self.vectorizer.n_features, 2 * len(DIMENSIONS)))
+        intercepts = np.zeros(2 * len(DIMENSIONS))
+
+        k = len(DIMENSIONS)
+        present = np.array([[dim in label for dim in DIMENSIONS] for label in labels], dtype=bool).reshape(n, k)
+        scores = np.array([[float(label.get(dim, 0.0)) for dim in DIMENSIONS] for label in labels]).reshape(n, k)
+
+        for d in range(k):
+            if present[:, d].any():
+                # Gram over scored mentors = full Gram minus the (few) unscored rows
+                gram = full_gram - self._gram(features, np.flatnonzero(~present[:, d]))
+                w, b = self._solve(gram, features, scores[:, d:d + 1], present[:, d])
+                weights[:, d], intercepts[d] = w[:, 0], b[0]
+            else:
+                intercepts[d] = 5.0
+
+        # Presence models all use every mentor, so they share the full Gram
+        weights[:, k:], intercepts[k:] = self._solve(full_gram, features, present.astype(np.float64), everyone)
+
+        self.weights = weights
+        self.intercepts = intercepts
+        self.stats['trained_on'] = n
+        self.stats['seconds'] += time.time() - start
+        return self
+
+    def predict(self, mentors: List[Dict]) -> Tuple['np.ndarray', 'np.ndarray']:
+        """
+        Returns:
+            (scores, presence) arrays of shape n_mentors x n_dimensions;
+            presence is the predicted probability-like value Qwen scores the dimension
+        """
+        import numpy as np
+
+        if self.weights is None:
+            raise RuntimeError('Model is not trained; run fit() or load()')
+
+        start = time.time()
+        output = self._dot(self.featurize(mentors), self.weights) + self.intercepts
+        self.stats['scored'] += len(mentors)
+        self.stats['seconds'] += time.time() - start
+
+        k = len(DIMENSIONS)
+        return np.clip(output[:, :k], *SCORE_RANGE), output[:, k:]
+
+    def score(self, mentors: List[Dict]) -> Dict:
+        """
+        Score mentors
+
+        provenance.confidence is the smallest distance of a presence value from
+        the 0.5 cut (scaled to 0-1): low values mean the model is unsure which
+        dimensions the comments cover (hybrid_triage.py sends those to Qwen).
+
+        Returns:
+            Metrics dict keyed by mentor id in the Qwen output format
+        """
+        import numpy as np
+
+        scores, presence = self.predict(mentors)
+        model = os.path.basename(self.path) if self.path else 'in-memory'
+        confidence = np.clip(2 * np.abs(presence - 0.5), 0.0, 1.0).min(axis=1) if len(mentors) else []
+
+        metrics = {}
+        for i, mentor in enumerate(mentors):
+            dimension_scores = {
+                dim: round(float(scores[i, d]), 1)
+                for d, dim in enumerate(DIMENSIONS)
+                if presence[i, d] >= 0.5
+            }
+            values = list(dimension_scores.values())
+            metrics[mentor['id']] = {
+                'id': mentor['id'],
+                'name': mentor['name'],
+                'school': mentor['school'],
+                'department': mentor['department'],
+                'evaluationCount': len(mentor['comments']),
+                'dimensionScores': dimension_scores,
+                'dimensionReasons': {},
+                'totalScore': round(sum(values) / len(values), 2) if values else 5.0,
+                'overallRecommendation': '',
+                'evaluations': [{'comment': c, 'dimensions': {}} for c in mentor['comments']],
+                'provenance': {'engine': 'distilled', 'model': model,
+                               'confidence': round(float(confidence[i]), 3)}
+            }
+
+        return metrics
+
+    def agreement(self, mentors: List[Dict], labels: List[Dict]) -> Dict:
+        """
+        Agreement of predictions with Qwen labels
+
+        Returns:
+            {dimension or 'totalScore': {'n', 'mae', 'pearson', 'within_1', 'presence_accuracy'}}
+        """
+        import numpy as np
+
+        def compare(predicted, expected) -> Dict:
+            predicted = np.asarray(predicted, dtype=np.float64)
+            expected = np.asarray(expected, dtype=np.float64)
+            if not len(expected):
+                return {'n': 0, 'mae': None, 'pearson': None, 'within_1': None}
+            pearson = None
+            if len(expected) > 1 and predicted.std() > 0 and expected.std() > 0:
+                pearson = round(float(np.corrcoef(predicted, expected)[0, 1]), 3)
+            return {
+                'n': len(expected),
+                'mae': round(float(np.abs(predicted - expected).mean()), 3),
+                'pearson': pearson,
+                'within_1': round(float((np.abs(predicted - expected) <= 1.0).mean()), 3)
+            }
+
+        scores, presence = self.predict(mentors)
+        result = {}
+        for d, dim in enumerate(DIMENSIONS):
+            rows = [i for i, label in enumerate(labels) if dim in label]
+            result[dim] = compare(scores[rows, d], [labels[i][dim] for i in rows])
+            result[dim]['presence_accuracy'] = round(float(np.mean(
+                [(presence[i, d] >= 0.5) == (dim in label) for i, label in enumerate(labels)]
+            )), 3) if labels else None
+
+        # Total score as Qwen computes it: mean over the dimensions it scored
+        rows = [i for i, label in enumerate(labels) if label]
+        result['totalScore'] = compare(
+            [np.mean([scores[i, DIMENSIONS.index(dim)] for dim in labels[i]]) for i in rows],
+            [np.mean(list(labels[i].values())) for i in rows]
+        )
+        return result
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path: str = 'distilled_model.npz'):
+        """Save weights and settings (NumPy .npz)"""
+        import numpy as np
+
+        settings = {
+            'dimensions': DIMENSIONS,
+            'n_features': self.vectorizer.n_features,
+            'ngram_range': list(self.vectorizer.ngram_range),
+            'alpha': self.alpha,
+            'holdout': self.holdout,
+            'trained_on': self.stats['trained_on'],
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, weights=self.weights.astype(np.float32),
+                                intercepts=self.intercepts, settings=json.dumps(settings))
+        self.path = path
+
+    @classmethod
+    def load(cls, path: str = 'distilled_model.npz') -> 'DistilledScorer':
+        """Load a model saved with save()"""
+        import numpy as np
+
+        with np.load(path) as data:
+            settings = json.loads(str(data['settings']))
+            if settings['dimensions'] != DIMENSIONS:
+                raise ValueError(f"{path} was trained for dimensions {settings['dimensions']}")
+            scorer = cls(settings['n_features'], settings['alpha'], settings['holdout'])
+            scorer.vectorizer.ngram_range = tuple(settings['ngram_range'])
+            scorer.weights = data['weights'].astype(np.float64)
+            scorer.intercepts = data['intercepts']
+        scorer.stats['trained_on'] = settings['trained_on']
+        scorer.path = path
+        return scorer
+
+    def report(self, agreement: Optional[Dict] = None):
+        """Print timing and, when given, agreement with Qwen"""
+        s = self.stats
+        print(f"\n🧪 Distilled scorer:")
+        print(f"   Trained on: {s['trained_on']} mentors, scored: {s['scored']}")
+        print(f"   Time: {s['seconds']:.2f}s (featurizing {s['featurize_seconds']:.2f}s)")
+        if not agreement:
+            return
+
+        print(f"\n📏 Agreement with Qwen:")
+        print(f"   {'dimension':<10} {'n':>6} {'MAE':>6} {'r':>6} {'±1':>6} {'present':>8}")
+        for dim, row in agreement.items():
+            if not row['n']:
+                print(f"   {dim:<10} {0:>6}")
+                continue
+            pearson = f"{row['pearson']:.3f}" if row['pearson'] is not None else '-'
+            presence = f"{row['presence_accuracy']:.3f}" if row.get('presence_accuracy') is not None else ''
+            print(f"   {dim:<10} {row['n']:>6} {row['mae']:>6.2f} {pearson:>6} "
+                  f"{row['within_1'] * 100:>5.1f}% {presence:>8}")
+
+
+def load_metrics(metrics_file: Optional[str], data_dir: Optional[str]) -> Dict:
+    """Metrics from a metrics file, or rebuilt from exported docs/data"""
+    if metrics_file:
+        with open(metrics_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    from generate_web_data import load_exported_metrics
+
+    return load_exported_metrics(data_dir)
+
+
+def split(mentors: List[Dict], labels: List[Dict], holdout: float, want_holdout: bool) -> Tuple[List[Dict], List[Dict]]:
+    """Mentors (and labels) on one side of the holdout split"""
+    pairs = [(m, l) for m, l in zip(mentors, labels) if in_holdout(m['id'], holdout) == want_holdout]
+    return [m for m, _ in pairs], [l for _, l in pairs]
+
+
+def main():
+    """Command line interface"""
+    parser = argparse.ArgumentParser(description='Distilled CPU scorer trained on Qwen outputs')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    def add_source(command, required: bool):
+        source = command.add_mutually_exclusive_group(required=required)
+        source.add_argument('--metrics', help='mentor_metrics_*.json with Qwen scores')
+        source.add_argument('--data-dir', help='Exported site data (e.g. docs/data)')
+        command.add_argument('--model', default='distilled_model.npz')
+
+    train = sub.add_parser('train', help='Fit on Qwen scores and report holdout agreement')
+    add_source(train, required=True)
+    train.add_argument('--features', type=int, default=4096, help='Hash buckets (default: 4096)')
+    train.add_argument('--alpha', type=float, default=1.0, help='Ridge strength (default: 1.0)')
+    train.add_argument('--holdout', type=float, default=0.2, help='Held-out fraction (default: 0.2)')
+
+    evaluate = sub.add_parser('evaluate', help='Agreement with Qwen on the held-out mentors')
+    add_source(evaluate, required=True)
+    evaluate.add_argument('--all', action='store_true', help='Include training mentors')
+
+    score = sub.add_parser('score', help='Score mentors (metrics file / docs/data, or the XLS files)')
+    add_source(score, required=False)
+    score.add_argument('--output', help='Output file (default: mentor_metrics_distilled_<n>.json)')
+
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Distilled Scorer (hashed n-grams + ridge, CPU)")
+    print("=" * 60)
+
+    if args.command == 'score':
+        scorer = DistilledScorer.load(args.model)
+        if args.metrics or args.data_dir:
+            # Every mentor, whichever engine scored it; labels only matter for train / evaluate
+            mentors = [metric_mentor(k, v) for k, v in load_metrics(args.metrics, args.data_dir).items()]
+        else:
+            from data_processor_qwen_batch import EnhancedMentorDataProcessor
+
+            processor = EnhancedMentorDataProcessor(None)
+            processor.load_data('导师信息.xls', '评价信息.xls')
+            mentors = processor.prepare_mentors_data()
+
+        metrics = scorer.score(mentors)
+        output_file = args.output or f'mentor_metrics_distilled_{len(metrics)}.json'
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(metrics, f, ensure_ascii=False, indent=2)
+        print(f"✓ Scored {len(metrics)} mentors → {output_file}")
+        scorer.report()
+        return
+
+    mentors, labels = training_examples(load_metrics(args.metrics, args.data_dir))
+    print(f"✓ Loaded {len(mentors)} Qwen-scored mentors")
+
+    if args.command == 'train':
+        scorer = DistilledScorer(args.features, args.alpha, args.holdout)
+        train_mentors, train_labels = split(mentors, labels, args.holdout, want_holdout=False)
+        scorer.fit(train_mentors, train_labels)
+        scorer.save(args.model)
+        print(f"✓ Trained on {len(train_mentors)} mentors → {args.model}")
+    else:
+        scorer = DistilledScorer.load(args.model)
+
+    if args.command == 'evaluate' and args.all:
+        test_mentors, test_labels = mentors, labels
+    else:
+        test_mentors, test_labels = split(mentors, labels, scorer.holdout, want_holdout=True)
+    print(f"✓ Comparing on {len(test_mentors)} mentors")
+
+    scorer.report(scorer.agreement(test_mentors, test_labels))
+
+
+if __name__ == "__main__":
+    main()
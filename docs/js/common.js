@@ -2,27 +2,114 @@
  * Common utilities for Mentor Evaluation System
  */
 
+// Optional read API server (api_server.py); static files are used when unset.
+// Set window.MENTOR_API_BASE before this script, or localStorage 'mentorApiBase'.
+const API_BASE = (window.MENTOR_API_BASE || localStorage.getItem('mentorApiBase') || '').replace(/\/$/, '');
+const DATA_ROOT = API_BASE ? `${API_BASE}/data` : 'data';
+
 // API endpoints
 const API = {
-    METADATA: 'data/metadata.json',
-    SCHOOLS: 'data/schools.json',
-    MENTORS_BY_SCHOOL: 'data/mentors_by_school.json',
-    getMentorDetail: (mentorId) => `data/mentors/${mentorId}.json`
+    METADATA: `${DATA_ROOT}/metadata.json`,
+    SCHOOLS: `${DATA_ROOT}/schools.json`,
+    MENTORS_BY_SCHOOL: `${DATA_ROOT}/mentors_by_school.json`,
+    DISTRIBUTIONS: `${DATA_ROOT}/distributions.json`,
+    getSchoolMentors: (school) => `${DATA_ROOT}/mentors_by_school/${encodeURIComponent(school)}.json`,
+    getMentorDetail: (mentorId) => `${DATA_ROOT}/mentors/${mentorId}.json`,
+    getEvaluationPage: (mentorId, page) => `${DATA_ROOT}/mentor_pages/${mentorId}_${page}.json`,
+    queryMentors: (params) => `${API_BASE}/api/mentors?${new URLSearchParams(params)}`
 };
 
 // Cache for loaded data
 const DataCache = {
     metadata: null,
     schools: null,
-    mentorsBySchool: null
+    mentorsBySchool: null,
+    distributions: null,
+    version: null
+};
+
+// sessionStorage key marking that metadata.json was revalidated this session
+const REVALIDATED_KEY = 'mentorDataRevalidated';
+
+/**
+ * Persistent cache in IndexedDB, shared by all pages
+ *
+ * Entries are keyed by URL and tagged with the data version from metadata.json;
+ * an entry is only served while its version is current. All methods resolve
+ * quietly (undefined / no-op) when IndexedDB is unavailable.
+ */
+const PersistentCache = {
+    DB_NAME: 'mentor-evaluations',
+    STORE: 'responses',
+    dbPromise: null,
+
+    open() {
+        if (!this.dbPromise) {
+            this.dbPromise = new Promise((resolve) => {
+                if (!window.indexedDB) {
+                    resolve(null);
+                    return;
+                }
+                const request = indexedDB.open(this.DB_NAME, 1);
+                request.onupgradeneeded = () => {
+                    request.result.createObjectStore(this.STORE);
+                };
+                request.onsuccess = () => resolve(request.result);
+                request.onerror = () => resolve(null);
+                request.onblocked = () => resolve(null);
+            });
+        }
+        return this.dbPromise;
+    },
+
+    async transaction(mode, operation) {
+        const db = await this.open();
+        if (!db) return undefined;
+        return new Promise((resolve) => {
+            try {
+                const tx = db.transaction(this.STORE, mode);
+                const request = operation(tx.objectStore(this.STORE));
+                tx.oncomplete = () => resolve(request ? request.result : undefined);
+                tx.onerror = () => resolve(undefined);
+                tx.onabort = () => resolve(undefined);
+            } catch (error) {
+                resolve(undefined);
+            }
+        });
+    },
+
+    get(key) {
+        return this.transaction('readonly', store => store.get(key));
+    },
+
+    set(key, version, value) {
+        return this.transaction('readwrite', store => store.put({ version, value }, key));
+    },
+
+    /**
+     * Delete every entry not tagged with the given version
+     */
+    deleteStale(version) {
+        return this.transaction('readwrite', store => {
+            store.openCursor().onsuccess = (event) => {
+                const cursor = event.target.result;
+                if (!cursor) return;
+                if (cursor.value.version !== version) {
+                    cursor.delete();
+                }
+                cursor.continue();
+            };
+            return null;
+        });
+    }
 };
 
 /**
  * Fetch JSON data with error handling
  */
-async function fetchJSON(url) {
+async function fetchJSON(url, options = {}) {
     try {
-        const response = await fetch(url);
+        const response = await fetch(url, options);
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
@@ -33,14 +120,87 @@ async function fetchJSON(url) {
     }
 }
 
+/**
+ * Data version of a metadata object (older exports have no version field)
+ */
+function dataVersionOf(metadata) {
+    return metadata.version || metadata.generatedAt || '';
+}
+
+/**
+ * Current data version, resolved once per page
+ *
+ * Served from the persisted metadata when available; metadata.json is then
+ * re-checked in the background at most once per browser session.
+ */
+function getDataVersion() {
+    if (!DataCache.version) {
+        DataCache.version = resolveDataVersion();
+    }
+    return DataCache.version;
+}
+
+async function resolveDataVersion() {
+    const cached = await PersistentCache.get(API.METADATA);
+    if (cached) {
+        DataCache.metadata = cached.value;
+        if (!sessionStorage.getItem(REVALIDATED_KEY)) {
+            setTimeout(() => revalidateMetadata(cached.version), 0);
+        }
+        return cached.version;
+    }
+
+    const metadata = await fetchJSON(API.METADATA);
+    const version = dataVersionOf(metadata);
+    DataCache.metadata = metadata;
+    sessionStorage.setItem(REVALIDATED_KEY, version);
+    await PersistentCache.set(API.METADATA, version, metadata);
+    return version;
+}
+
+/**
+ * Background check for a new export; stale entries are dropped so the
+ * next load of each file fetches the new version
+ */
+async function revalidateMetadata(cachedVersion) {
+    sessionStorage.setItem(REVALIDATED_KEY, cachedVersion);
+    try {
+        const response = await fetch(API.METADATA, { cache: 'no-cache' });
+        if (!response.ok) return;
+        const metadata = await response.json();
+        const version = dataVersionOf(metadata);
+        sessionStorage.setItem(REVALIDATED_KEY, version);
+
+        if (version !== cachedVersion) {
+            await PersistentCache.set(API.METADATA, version, metadata);
+            await PersistentCache.deleteStale(version);
+        }
+    } catch (error) {
+        // Offline: keep serving the cached version, retry next session
+        sessionStorage.removeItem(REVALIDATED_KEY);
+    }
+}
+
+/**
+ * Fetch JSON through the persistent cache
+ */
+async function cachedFetchJSON(url, options = {}) {
+    const version = await getDataVersion();
+    const cached = await PersistentCache.get(url);
+    if (cached && cached.version === version) {
+        return cached.value;
+    }
+
+    const value = await fetchJSON(url, options);
+    PersistentCache.set(url, version, value);
+    return value;
+}
+
 /**
  * Load metadata
  */
 async function loadMetadata() {
-    if (DataCache.metadata) {
-        return DataCache.metadata;
-    }
-    DataCache.metadata = await fetchJSON(API.METADATA);
+    await getDataVersion();
     return DataCache.metadata;
 }
 
@@ -51,28 +211,394 @@ async function loadSchools() {
     if (DataCache.schools) {
         return DataCache.schools;
     }
-    DataCache.schools = await fetchJSON(API.SCHOOLS);
+    DataCache.schools = await cachedFetchJSON(API.SCHOOLS);
     return DataCache.schools;
 }
 
+/**
+ * Expand one school of the columnar mentors_by_school.json payload
+ *
+ * Columns are parallel arrays; scores follow metadata.dimensions and
+ * percentiles ['totalScore', ...dimensions], with null for missing values.
+ * Already expanded lists (older exports) are returned unchanged.
+ *
+ * @param {Object|Array} block - {departments, id, name, department, evaluationCount, totalScore, scores, percentiles}
+ * @param {string[]} dimensions - Dimension order from metadata.json
+ * @returns {Array} Mentor entries as generate_mentor_list_by_school() builds them
+ */
+function decodeMentorList(block, dimensions) {
+    if (Array.isArray(block)) {
+        return block;
+    }
+    const metrics = ['totalScore', ...dimensions];
+    const mentors = new Array(block.id.length);
+    for (let i = 0; i < mentors.length; i++) {
+        const dimensionScores = {};
+        const scores = block.scores[i];
+        for (let d = 0; d < dimensions.length; d++) {
+            if (scores[d] !== null) dimensionScores[dimensions[d]] = scores[d];
+        }
+        const percentiles = {};
+        const ranks = block.percentiles[i];
+        for (let m = 0; m < metrics.length; m++) {
+            if (ranks[m] !== null) percentiles[metrics[m]] = ranks[m];
+        }
+        mentors[i] = {
+            id: block.id[i],
+            name: block.name[i],
+            department: block.departments[block.department[i]],
+            evaluationCount: block.evaluationCount[i],
+            totalScore: block.totalScore[i],
+            dimensionScores,
+            percentiles
+        };
+    }
+    return mentors;
+}
+
 /**
  * Load mentors by school
+ *
+ * Columnar payloads are decoded into the per-mentor entries the pages use.
  */
 async function loadMentorsBySchool() {
     if (DataCache.mentorsBySchool) {
         return DataCache.mentorsBySchool;
     }
-    DataCache.mentorsBySchool = await fetchJSON(API.MENTORS_BY_SCHOOL);
-    return DataCache.mentorsBySchool;
+    const payload = await cachedFetchJSON(API.MENTORS_BY_SCHOOL);
+    if (!payload.format) {
+        // Older exports: school -> list of entries
+        DataCache.mentorsBySchool = payload;
+        return payload;
+    }
+
+    const { dimensions } = await loadMetadata();
+    const decoded = {};
+    for (const [school, block] of Object.entries(payload.schools)) {
+        decoded[school] = decodeMentorList(block, dimensions);
+    }
+    DataCache.mentorsBySchool = decoded;
+    return decoded;
+}
+
+/**
+ * Load score distribution summaries (histograms and quantiles per school and globally)
+ *
+ * Resolves to null for exports without distributions.json.
+ */
+async function loadDistributions() {
+    if (DataCache.distributions) {
+        return DataCache.distributions;
+    }
+    try {
+        DataCache.distributions = await cachedFetchJSON(API.DISTRIBUTIONS);
+    } catch (error) {
+        return null;
+    }
+    return DataCache.distributions;
+}
+
+/**
+ * Approximate percentile rank (0-100) of a score from a distribution summary
+ *
+ * Counts the histogram bins below the score and interpolates within its bin.
+ *
+ * @param {Object} distributions - Parsed distributions.json
+ * @param {Object} summary - One summary ({count, histogram, ...})
+ * @param {number} score
+ * @returns {number|null}
+ */
+function percentileFromDistribution(distributions, summary, score) {
+    if (!distributions || !summary || !summary.count) {
+        return null;
+    }
+    const { min, max, count } = distributions.bins;
+    const width = (max - min) / count;
+    const position = Math.min(Math.max((score - min) / width, 0), count - 1e-9);
+    const bin = Math.floor(position);
+
+    let below = 0;
+    for (let i = 0; i < bin; i++) {
+        below += summary.histogram[i];
+    }
+    below += summary.histogram[bin] * (position - bin);
+    return Math.round(100 * below / summary.count);
+}
+
+/**
+ * Load the mentor list of one school
+ *
+ * The API server returns just that school; the static site only has the full map.
+ */
+async function loadSchoolMentors(school) {
+    if (API_BASE) {
+        try {
+            const block = await cachedFetchJSON(API.getSchoolMentors(school));
+            const { dimensions } = await loadMetadata();
+            return decodeMentorList(block, dimensions);
+        } catch (error) {
+            return [];
+        }
+    }
+    const mentorsBySchool = await loadMentorsBySchool();
+    return mentorsBySchool[school] || [];
+}
+
+/**
+ * Paginated, filtered, sorted mentor query (requires the API server)
+ *
+ * @param {Object} params - school, department, q, minScore, sort, order, page, pageSize
+ * @returns {Promise<{total: number, page: number, pageSize: number, mentors: Array}>}
+ */
+async function queryMentors(params) {
+    if (!API_BASE) {
+        throw new Error('queryMentors requires MENTOR_API_BASE');
+    }
+    return await fetchJSON(API.queryMentors(params));
 }
 
 /**
  * Load individual mentor detail
  */
 async function loadMentorDetail(mentorId) {
-    return await fetchJSON(API.getMentorDetail(mentorId));
+    return await cachedFetchJSON(API.getMentorDetail(mentorId));
+}
+
+/**
+ * Windowed renderer for card grids
+ *
+ * Only cards in or near the viewport exist in the DOM; two spacer elements
+ * stand in for the rows above and below. Cards are keyed, so re-sorting or
+ * filtering reuses existing nodes and only creates the ones that are new.
+ * Render cost depends on the viewport size, not on the number of items.
+ */
+class VirtualGrid {
+    /**
+     * @param {HTMLElement} container - CSS grid element (page scrolls, not the grid)
+     * @param {Object} options
+     * @param {Function} options.renderItem - item => card HTML string
+     * @param {Function} options.keyOf - item => stable key
+     * @param {string} options.emptyHTML - shown when there are no items
+     * @param {number} options.estimatedRowHeight - row height (px) before the first measurement
+     * @param {number} options.overscanRows - rows rendered beyond each viewport edge
+     * @param {Function} options.onRangeChange - called with the items in the viewport after the window moves
+     */
+    constructor(container, { renderItem, keyOf, emptyHTML = '', estimatedRowHeight = 240, overscanRows = 3, onRangeChange = null }) {
+        this.container = container;
+        this.renderItem = renderItem;
+        this.keyOf = keyOf;
+        this.onRangeChange = onRangeChange;
+        this.emptyHTML = emptyHTML;
+        this.rowHeight = estimatedRowHeight;
+        this.overscanRows = overscanRows;
+
+        this.items = [];
+        this.nodes = new Map();  // key -> {element, item}
+        this.columns = 1;
+        this.range = [0, 0];
+        this.frame = null;
+        this.template = document.createElement('template');
+
+        this.spacerTop = this.createSpacer();
+        this.spacerBottom = this.createSpacer();
+        this.emptyElement = document.createElement('div');
+        this.emptyElement.style.gridColumn = '1 / -1';
+
+        this.container.replaceChildren(this.spacerTop, this.spacerBottom);
+
+        this.onScroll = () => this.scheduleUpdate();
+        this.onResize = () => {
+            this.columns = this.measureColumns();
+            this.scheduleUpdate(true);
+        };
+        window.addEventListener('scroll', this.onScroll, { passive: true });
+        window.addEventListener('resize', this.onResize);
+    }
+
+    createSpacer() {
+        const spacer = document.createElement('div');
+        spacer.style.gridColumn = '1 / -1';
+        spacer.style.height = '0px';
+        spacer.setAttribute('aria-hidden', 'true');
+        return spacer;
+    }
+
+    /**
+     * Replace the item list and patch the visible window
+     */
+    setItems(items) {
+        this.items = items;
+        this.columns = this.measureColumns();
+
+        if (items.length === 0) {
+            this.emptyElement.innerHTML = this.emptyHTML;
+            this.container.insertBefore(this.emptyElement, this.spacerBottom);
+        } else if (this.emptyElement.parentNode) {
+            this.emptyElement.remove();
+        }
+
+        this.update(true);
+    }
+
+    measureColumns() {
+        const template = getComputedStyle(this.container).gridTemplateColumns;
+        const count = template && template !== 'none' ? template.split(' ').length : 1;
+        return Math.max(1, count);
+    }
+
+    scheduleUpdate(force = false) {
+        this.forceUpdate = this.forceUpdate || force;
+        if (this.frame) return;
+        this.frame = requestAnimationFrame(() => {
+            this.frame = null;
+            const force = this.forceUpdate;
+            this.forceUpdate = false;
+            this.update(force);
+        });
+    }
+
+    /**
+     * Render the rows intersecting the viewport (plus overscan)
+     */
+    update(force = false) {
+        const totalRows = Math.ceil(this.items.length / this.columns);
+        const top = this.container.getBoundingClientRect().top;
+
+        // Past the estimated end (row heights are averages), keep the last rows rendered
+        const visibleRows = Math.ceil(window.innerHeight / this.rowHeight) + 1;
+        const firstVisible = Math.min(
+            Math.floor(Math.max(0, -top) / this.rowHeight),
+            Math.max(0, totalRows - visibleRows)
+        );
+        const startRow = Math.max(0, firstVisible - this.overscanRows);
+        const endRow = Math.min(totalRows, firstVisible + visibleRows + this.overscanRows);
+
+        if (!force && startRow === this.range[0] && endRow === this.range[1]) {
+            return;
+        }
+        this.range = [startRow, endRow];
+
+        const start = startRow * this.columns;
+        const end = Math.min(this.items.length, endRow * this.columns);
+        const visible = new Map();
+        let previous = this.spacerTop;
+
+        for (let i = start; i < end; i++) {
+            const item = this.items[i];
+            const key = this.keyOf(item);
+            let node = this.nodes.get(key);
+
+            if (!node) {
+                node = { element: this.createElement(item), item };
+            } else if (node.item !== item) {
+                const element = this.createElement(item);
+                node.element.replaceWith(element);
+                node = { element, item };
+            }
+            visible.set(key, node);
+
+            // Only move nodes that are out of order
+            if (previous.nextSibling !== node.element) {
+                this.container.insertBefore(node.element, previous.nextSibling);
+            }
+            previous = node.element;
+        }
+
+        for (const [key, node] of this.nodes) {
+            if (!visible.has(key)) {
+                node.element.remove();
+            }
+        }
+        this.nodes = visible;
+
+        this.measureRowHeight(endRow - startRow);
+        this.spacerTop.style.height = `${startRow * this.rowHeight}px`;
+        this.spacerBottom.style.height = `${(totalRows - endRow) * this.rowHeight}px`;
+
+        if (this.onRangeChange) {
+            // Items in the viewport proper, without overscan
+            this.onRangeChange(this.items.slice(
+                firstVisible * this.columns,
+                Math.min(this.items.length, (firstVisible + visibleRows) * this.columns)
+            ));
+        }
+    }
+
+    createElement(item) {
+        this.template.innerHTML = this.renderItem(item).trim();
+        return this.template.content.firstElementChild;
+    }
+
+    /**
+     * Average rendered row height including the row gap
+     */
+    measureRowHeight(rows) {
+        if (rows < 1 || this.nodes.size === 0) return;
+        const elements = [...this.nodes.values()].map(node => node.element);
+        const first = elements[0].getBoundingClientRect();
+        const last = elements[elements.length - 1].getBoundingClientRect();
+        const gap = parseFloat(getComputedStyle(this.container).rowGap) || 0;
+        const height = (last.bottom - first.top + gap) / rows;
+        if (height > 0) {
+            this.rowHeight = height;
+        }
+    }
+
+    destroy() {
+        window.removeEventListener('scroll', this.onScroll);
+        window.removeEventListener('resize', this.onResize);
+        if (this.frame) cancelAnimationFrame(this.frame);
+    }
 }
 
+/**
+ * Load one page (>= 2) of a mentor's evaluations; page 1 is in the detail file
+ */
+async function loadEvaluationPage(mentorId, page) {
+    return await cachedFetchJSON(API.getEvaluationPage(mentorId, page));
+}
+
+// Mentor ids already prefetched on this page
+const prefetchedMentors = new Set();
+
+/**
+ * Prefetch mentor detail files at idle priority
+ *
+ * Each file lands in the persistent cache (and the service worker cache),
+ * so opening the detail page needs no network round trip. Skipped when the
+ * user has asked the browser to save data.
+ */
+function prefetchMentorDetails(mentorIds, limit = 12) {
+    if (navigator.connection && navigator.connection.saveData) return;
+
+    const queue = mentorIds.filter(id => !prefetchedMentors.has(id)).slice(0, limit);
+    queue.forEach(id => prefetchedMentors.add(id));
+
+    const idle = window.requestIdleCallback || (callback => setTimeout(callback, 200));
+    const next = () => {
+        const id = queue.shift();
+        if (!id) return;
+        cachedFetchJSON(API.getMentorDetail(id), { priority: 'low' })
+            .catch(() => prefetchedMentors.delete(id))
+            .finally(() => idle(next));
+    };
+    idle(next);
+}
+
+/**
+ * Register the service worker (static site only; docs/sw.js)
+ */
+function registerServiceWorker() {
+    if (API_BASE || !('serviceWorker' in navigator) || location.protocol === 'file:') return;
+    window.addEventListener('load', () => {
+        navigator.serviceWorker.register('sw.js').catch(error => {
+            console.warn('Service worker registration failed:', error);
+        });
+    });
+}
+
+registerServiceWorker();
+
 /**
  * Format number with commas
  */
@@ -1,15 +1,19 @@
 /**
- * Data Submission Module (Future Implementation)
+ * Data Submission Module
  *
- * This module is reserved for anonymous data submission functionality.
- * It provides the interface for users to add new schools, mentors, and evaluations.
- *
- * TO BE IMPLEMENTED IN FUTURE VERSIONS
+ * Anonymous data submission: evaluations are sent to the ingest service
+ * (ingest_service.py); school and mentor submission are not implemented yet.
  */
 
+// Ingest service base URL; set window.MENTOR_INGEST_BASE or localStorage 'mentorIngestBase'
+const INGEST_BASE = (
+    (typeof window !== 'undefined' && window.MENTOR_INGEST_BASE) ||
+    (typeof localStorage !== 'undefined' && localStorage.getItem('mentorIngestBase')) ||
+    ''
+).replace(/\/$/, '');
+
 /**
  * Data submission API endpoints
- * These will be connected to a backend service in the future
  */
 const SubmissionAPI = {
     // School submission endpoint
@@ -26,11 +30,22 @@ const SubmissionAPI = {
         throw new Error('Submission feature not yet implemented');
     },
 
-    // Evaluation submission endpoint
+    // Evaluation submission endpoint; resolves to {seq, status, batchSeconds}.
+    // The evaluation shows up on the site after the service's next micro-batch.
     submitEvaluation: async (evaluationData) => {
-        // TODO: Implement backend integration
-        console.log('Evaluation submission (not implemented):', evaluationData);
-        throw new Error('Submission feature not yet implemented');
+        if (!INGEST_BASE) {
+            throw new Error('提交服务未配置（MENTOR_INGEST_BASE）');
+        }
+        const response = await fetch(`${INGEST_BASE}/api/submissions/evaluations`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(evaluationData)
+        });
+        const result = await response.json().catch(() => ({}));
+        if (!response.ok) {
+            throw new Error(result.error || `HTTP ${response.status}`);
+        }
+        return result;
     }
 };
 
@@ -181,7 +196,7 @@ const FormValidation = {
 };
 
 /**
- * Example usage (for future implementation)
+ * Example usage
  *
  * // Submit a new evaluation
  * async function submitNewEvaluation() {
@@ -193,8 +208,8 @@ const FormValidation = {
  *
  *     try {
  *         evaluation.validate();
- *         await SubmissionAPI.submitEvaluation(evaluation.toJSON());
- *         alert('提交成功！');
+ *         const { batchSeconds } = await SubmissionAPI.submitEvaluation(evaluation.toJSON());
+ *         alert(`提交成功！约 ${batchSeconds} 秒后可见`);
  *     } catch (error) {
  *         alert('提交失败：' + error.message);
  *     }
@@ -205,8 +220,8 @@ const FormValidation = {
  * Future features to implement:
  *
  * 1. Backend Integration
- *    - Set up a backend service (Node.js/Python/etc.)
- *    - Create API endpoints for data submission
+ *    - Evaluations: done (ingest_service.py)
+ *    - School and mentor submission endpoints
  *    - Add authentication/authorization
  *
  * 2. Data Moderation
@@ -220,8 +235,8 @@ const FormValidation = {
  *    - Implement success/error notifications
  *
  * 4. Data Management
- *    - Automatic data aggregation
- *    - Incremental updates to JSON files
+ *    - Automatic data aggregation (done for evaluations)
+ *    - Incremental updates to JSON files (done for evaluations)
  *    - Database integration for scalability
  *
  * 5. Security Features
@@ -6,6 +6,8 @@ let mentorData = null;
 let radarChart = null;
 let displayedEvaluations = 10;
 let currentFilter = 'all';
+let loadedPages = 1;
+let pageLoading = null;
 
 /**
  * Initialize page
@@ -28,6 +30,7 @@ async function init() {
         initializeRadarChart();
         renderEvaluations();
         generateSuggestions();
+        renderPercentiles();
 
         // Setup event listeners
         setupEventListeners();
@@ -119,6 +122,7 @@ function renderDimensionLegend(dimensionScores, dimensionReasons = {}) {
                             <span class="legend-label">${escapeHtml(name)}</span>
                             <span class="legend-score" style="color: ${getScoreColor(score)}">
                                 ${formatScore(score)}
+                                <span class="legend-percentile" data-dimension="${escapeHtml(name)}"></span>
                             </span>
                         </div>
                         ${reason ? `
@@ -133,9 +137,103 @@ function renderDimensionLegend(dimensionScores, dimensionReasons = {}) {
 }
 
 /**
- * Render evaluations
+ * Fill in school percentiles
+ *
+ * Uses the exact ranks exported with the school's mentor list (the same
+ * numbers the list page shows); exports without them fall back to the
+ * score distribution histograms.
  */
-function renderEvaluations() {
+async function renderPercentiles() {
+    const percentiles = await exactPercentiles() || await histogramPercentiles();
+    if (!percentiles) return;
+
+    if (percentiles.totalScore !== undefined && percentiles.totalScore !== null) {
+        document.getElementById('statSchoolPercentile').textContent = `超过 ${percentiles.totalScore}%`;
+    }
+
+    document.querySelectorAll('.legend-percentile').forEach(element => {
+        const percentile = percentiles[element.dataset.dimension];
+        if (percentile !== undefined && percentile !== null) {
+            element.textContent = `P${percentile}`;
+            element.title = `超过本校 ${percentile}% 导师`;
+        }
+    });
+}
+
+/**
+ * Percentiles precomputed for this mentor in mentors_by_school.json
+ */
+async function exactPercentiles() {
+    try {
+        const mentors = await loadSchoolMentors(mentorData.school);
+        const entry = mentors.find(mentor => mentor.id === mentorData.id);
+        return entry && entry.percentiles ? entry.percentiles : null;
+    } catch (error) {
+        return null;
+    }
+}
+
+/**
+ * Approximate percentiles from the per-school histograms in distributions.json
+ */
+async function histogramPercentiles() {
+    const distributions = await loadDistributions();
+    const school = distributions && distributions.schools[mentorData.school];
+    if (!school) return null;
+
+    const percentiles = {
+        totalScore: percentileFromDistribution(distributions, school.totalScore, mentorData.totalScore)
+    };
+    for (const [name, score] of Object.entries(mentorData.dimensionScores || {})) {
+        if (score !== null && score !== undefined) {
+            percentiles[name] = percentileFromDistribution(distributions, school[name], score);
+        }
+    }
+    return percentiles;
+}
+
+/**
+ * Number of evaluation pages in the export (older exports inline everything)
+ */
+function totalEvaluationPages() {
+    return mentorData.evaluationPages || 1;
+}
+
+/**
+ * Fetch the next page of evaluations; concurrent calls share one request
+ */
+function loadNextEvaluationPage() {
+    if (loadedPages >= totalEvaluationPages()) {
+        return Promise.resolve(false);
+    }
+    if (!pageLoading) {
+        pageLoading = loadEvaluationPage(mentorData.id, loadedPages + 1)
+            .then(page => {
+                mentorData.evaluations.push(...page);
+                loadedPages += 1;
+                return true;
+            })
+            .finally(() => {
+                pageLoading = null;
+            });
+    }
+    return pageLoading;
+}
+
+/**
+ * Number of evaluations matching a filter across all pages
+ */
+function filteredTotal(filter) {
+    const counts = mentorData.sentimentCounts;
+    if (filter === 'all') return mentorData.evaluationCount;
+    if (counts && filter in counts) return counts[filter];
+    return filterEvaluations(mentorData.evaluations, filter).length;
+}
+
+/**
+ * Render evaluations, fetching further pages until enough match the filter
+ */
+async function renderEvaluations() {
     const evaluations = mentorData.evaluations;
 
     if (!evaluations || evaluations.length === 0) {
@@ -146,6 +244,15 @@ function renderEvaluations() {
 
     // Filter evaluations
     let filtered = filterEvaluations(evaluations, currentFilter);
+    while (filtered.length < displayedEvaluations && loadedPages < totalEvaluationPages()) {
+        try {
+            await loadNextEvaluationPage();
+        } catch (error) {
+            showError('加载更多评价失败，请稍后重试');
+            break;
+        }
+        filtered = filterEvaluations(mentorData.evaluations, currentFilter);
+    }
 
     // Show limited number
     const toShow = filtered.slice(0, displayedEvaluations);
@@ -170,11 +277,12 @@ function renderEvaluations() {
     document.getElementById('evaluationsList').innerHTML = html;
 
     // Show "Show More" button if needed
+    const total = filteredTotal(currentFilter);
     const showMoreContainer = document.getElementById('showMoreContainer');
-    if (filtered.length > displayedEvaluations) {
+    if (total > toShow.length) {
         showMoreContainer.style.display = 'block';
         document.getElementById('showMoreBtn').textContent =
-            `查看更多评价 (${filtered.length - displayedEvaluations} 条)`;
+            `查看更多评价 (${total - toShow.length} 条)`;
     } else {
         showMoreContainer.style.display = 'none';
     }
@@ -182,27 +290,35 @@ function renderEvaluations() {
 
 /**
  * Filter evaluations by sentiment
+ *
+ * Labels are precomputed at export time; evaluations from older exports
+ * are labelled once here and the label is kept on the object.
  */
 function filterEvaluations(evaluations, filter) {
     if (filter === 'all') return evaluations;
 
     return evaluations.filter(eval => {
-        const comment = eval.comment.toLowerCase();
-
-        const positiveKeywords = ['好', '优秀', '不错', '负责', '认真', '支持'];
-        const negativeKeywords = ['差', '不好', '糟糕', '压榨', '延期', '苛刻'];
+        if (!eval.sentiment) {
+            eval.sentiment = legacySentiment(eval.comment);
+        }
+        return eval.sentiment === filter;
+    });
+}
 
-        const positiveCount = positiveKeywords.filter(k => comment.includes(k)).length;
-        const negativeCount = negativeKeywords.filter(k => comment.includes(k)).length;
+/**
+ * Keyword sentiment for evaluations exported without a label
+ * (same lists as DimensionExtractor.LABEL_*_KEYWORDS in data_processor.py)
+ */
+function legacySentiment(comment) {
+    const positiveKeywords = ['好', '优秀', '不错', '负责', '认真', '支持'];
+    const negativeKeywords = ['差', '不好', '糟糕', '压榨', '延期', '苛刻'];
 
-        if (filter === 'positive') {
-            return positiveCount > negativeCount;
-        } else if (filter === 'negative') {
-            return negativeCount > positiveCount;
-        }
+    const positiveCount = positiveKeywords.filter(k => comment.includes(k)).length;
+    const negativeCount = negativeKeywords.filter(k => comment.includes(k)).length;
 
-        return true;
-    });
+    if (positiveCount > negativeCount) return 'positive';
+    if (negativeCount > positiveCount) return 'negative';
+    return 'neutral';
 }
 
 /**
@@ -301,10 +417,21 @@ function setupEventListeners() {
     });
 
     // Show more button
-    document.getElementById('showMoreBtn').addEventListener('click', () => {
+    const showMore = () => {
         displayedEvaluations += 10;
         renderEvaluations();
-    });
+    };
+    document.getElementById('showMoreBtn').addEventListener('click', showMore);
+
+    // Load the next page automatically when the button scrolls into view
+    if ('IntersectionObserver' in window) {
+        const observer = new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting) && !pageLoading) {
+                showMore();
+            }
+        }, { rootMargin: '200px' });
+        observer.observe(document.getElementById('showMoreContainer'));
+    }
 }
 
 /**
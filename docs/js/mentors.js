@@ -5,6 +5,10 @@
 let allMentors = [];
 let currentSchool = '';
 let currentSort = 'evaluationCount';
+let mentorGrid = null;
+
+// Visible mentors whose detail files are prefetched at idle time
+const PREFETCH_COUNT = 12;
 
 /**
  * Initialize page
@@ -24,8 +28,7 @@ async function init() {
         document.title = `${currentSchool} - 导师列表`;
 
         // Load mentors for this school
-        const mentorsBySchool = await loadMentorsBySchool();
-        allMentors = mentorsBySchool[currentSchool] || [];
+        allMentors = await loadSchoolMentors(currentSchool);
 
         if (allMentors.length === 0) {
             showError('该学校暂无导师数据');
@@ -61,54 +64,72 @@ function updateStats(mentors) {
 }
 
 /**
- * Render mentors grid
+ * Render mentors grid (windowed; see VirtualGrid in common.js)
  */
 function renderMentors(mentors) {
-    const grid = document.getElementById('mentorsGrid');
-
-    if (mentors.length === 0) {
-        grid.innerHTML = '<div class="loading">未找到匹配的导师</div>';
-        return;
+    if (!mentorGrid) {
+        mentorGrid = new VirtualGrid(document.getElementById('mentorsGrid'), {
+            renderItem: mentorCardHTML,
+            keyOf: mentor => mentor.id,
+            emptyHTML: '<div class="loading">未找到匹配的导师</div>',
+            // Warm the detail files of the cards the user is looking at
+            onRangeChange: debounce(rendered => {
+                prefetchMentorDetails(rendered.map(mentor => mentor.id), PREFETCH_COUNT);
+            }, 500)
+        });
     }
+    mentorGrid.setItems(mentors);
+}
 
-    grid.innerHTML = mentors.map(mentor => {
-        const dimensionTags = Object.entries(mentor.dimensionScores || {})
-            .slice(0, 3)  // Show first 3 dimensions
-            .map(([name, score]) => `
-                <div class="dimension-tag">
-                    <span class="dimension-tag-name">${escapeHtml(name)}</span>
-                    <span class="dimension-tag-score">${formatScore(score)}</span>
+/**
+ * HTML for one mentor card
+ */
+function mentorCardHTML(mentor) {
+    // Precomputed at export time; older exports have no percentiles
+    const percentile = mentor.percentiles ? mentor.percentiles.totalScore : undefined;
+    const dimensionTags = Object.entries(mentor.dimensionScores || {})
+        .slice(0, 3)  // Show first 3 dimensions
+        .map(([name, score]) => `
+            <div class="dimension-tag"${mentor.percentiles && mentor.percentiles[name] !== undefined
+                ? ` title="超过本校 ${mentor.percentiles[name]}% 导师"` : ''}>
+                <span class="dimension-tag-name">${escapeHtml(name)}</span>
+                <span class="dimension-tag-score">${formatScore(score)}</span>
+            </div>
+        `).join('');
+
+    return `
+        <a href="mentor-detail.html?id=${encodeURIComponent(mentor.id)}" class="mentor-card">
+            <div class="mentor-card-header">
+                <div class="mentor-info">
+                    <h3>${escapeHtml(mentor.name)}</h3>
+                    <div class="mentor-department">${escapeHtml(mentor.department || '未知院系')}</div>
                 </div>
-            `).join('');
-
-        return `
-            <a href="mentor-detail.html?id=${encodeURIComponent(mentor.id)}" class="mentor-card">
-                <div class="mentor-card-header">
-                    <div class="mentor-info">
-                        <h3>${escapeHtml(mentor.name)}</h3>
-                        <div class="mentor-department">${escapeHtml(mentor.department || '未知院系')}</div>
-                    </div>
-                    <div class="mentor-score-badge">
-                        <div>${formatScore(mentor.totalScore)}</div>
-                        <div class="score-label">${getScoreLabel(mentor.totalScore)}</div>
-                    </div>
+                <div class="mentor-score-badge">
+                    <div>${formatScore(mentor.totalScore)}</div>
+                    <div class="score-label">${getScoreLabel(mentor.totalScore)}</div>
                 </div>
+            </div>
 
-                ${dimensionTags ? `<div class="dimension-preview">${dimensionTags}</div>` : ''}
+            ${dimensionTags ? `<div class="dimension-preview">${dimensionTags}</div>` : ''}
 
-                <div class="mentor-stats">
-                    <div class="mentor-stat">
-                        <div class="mentor-stat-value">${formatNumber(mentor.evaluationCount)}</div>
-                        <div class="mentor-stat-label">评价数</div>
-                    </div>
+            <div class="mentor-stats">
+                <div class="mentor-stat">
+                    <div class="mentor-stat-value">${formatNumber(mentor.evaluationCount)}</div>
+                    <div class="mentor-stat-label">评价数</div>
+                </div>
+                <div class="mentor-stat">
+                    <div class="mentor-stat-value">${Object.keys(mentor.dimensionScores || {}).length}</div>
+                    <div class="mentor-stat-label">维度</div>
+                </div>
+                ${percentile !== undefined ? `
                     <div class="mentor-stat">
-                        <div class="mentor-stat-value">${Object.keys(mentor.dimensionScores || {}).length}</div>
-                        <div class="mentor-stat-label">维度</div>
+                        <div class="mentor-stat-value">${percentile}%</div>
+                        <div class="mentor-stat-label">超过本校</div>
                     </div>
-                </div>
-            </a>
-        `;
-    }).join('');
+                ` : ''}
+            </div>
+        </a>
+    `;
 }
 
 /**
@@ -153,7 +174,7 @@ const handleSearch = debounce((event) => {
     const filtered = filterMentors(allMentors, query);
     const sorted = sortMentors(filtered, currentSort);
     renderMentors(sorted);
-}, 300);
+}, 200);
 
 /**
  * Handle sort change
@@ -4,6 +4,7 @@
 
 let allSchools = [];
 let currentSort = 'mentorCount';
+let schoolGrid = null;
 
 /**
  * Initialize page
@@ -37,17 +38,25 @@ function updateStats(metadata) {
 }
 
 /**
- * Render schools grid
+ * Render schools grid (windowed; see VirtualGrid in common.js)
  */
 function renderSchools(schools) {
-    const grid = document.getElementById('schoolsGrid');
-
-    if (schools.length === 0) {
-        grid.innerHTML = '<div class="loading">未找到匹配的学校</div>';
-        return;
+    if (!schoolGrid) {
+        schoolGrid = new VirtualGrid(document.getElementById('schoolsGrid'), {
+            renderItem: schoolCardHTML,
+            keyOf: school => school.name,
+            emptyHTML: '<div class="loading">未找到匹配的学校</div>',
+            estimatedRowHeight: 180
+        });
     }
+    schoolGrid.setItems(schools);
+}
 
-    grid.innerHTML = schools.map(school => `
+/**
+ * HTML for one school card
+ */
+function schoolCardHTML(school) {
+    return `
         <a href="mentors.html?school=${encodeURIComponent(school.name)}" class="school-card">
             <div class="school-card-header">
                 <div>
@@ -70,7 +79,7 @@ function renderSchools(schools) {
                 </div>
             </div>
         </a>
-    `).join('');
+    `;
 }
 
 /**
@@ -114,7 +123,7 @@ const handleSearch = debounce((event) => {
     const filtered = filterSchools(allSchools, query);
     const sorted = sortSchools(filtered, currentSort);
     renderSchools(sorted);
-}, 300);
+}, 200);
 
 /**
  * Handle sort change
@@ -0,0 +1,180 @@
+/**
+ * Service worker for Mentor Evaluation System
+ *
+ * - Precaches the site shell and index files listed in precache-manifest.json
+ *   (written by generate_web_data.py)
+ * - Serves mentor detail and evaluation page files cache-first, so prefetched
+ *   and previously viewed mentors open instantly and offline
+ * - Index files under data/ go to the network first and fall back to the cache
+ * - Caches are named after the manifest / data version and replaced when it changes
+ */
+
+const MANIFEST_URL = 'precache-manifest.json';
+const SHELL_CACHE_PREFIX = 'mentor-shell-';
+const DETAIL_CACHE_PREFIX = 'mentor-details-';
+
+// Upper bound on cached detail/page files
+const MAX_DETAIL_ENTRIES = 600;
+
+let manifestPromise = null;
+
+/**
+ * Current manifest; falls back to the newest cached copy when offline
+ */
+function getManifest() {
+    if (!manifestPromise) {
+        manifestPromise = fetch(MANIFEST_URL, { cache: 'no-cache' })
+            .then(response => {
+                if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                return response.json();
+            })
+            .catch(async () => {
+                const keys = await caches.keys();
+                const shell = keys.filter(key => key.startsWith(SHELL_CACHE_PREFIX)).pop();
+                const cached = shell && await (await caches.open(shell)).match(MANIFEST_URL);
+                return cached ? cached.json() : { version: 'none', dataVersion: 'none', files: [] };
+            });
+    }
+    return manifestPromise;
+}
+
+function scopeUrl(path) {
+    return new URL(path, self.registration.scope).href;
+}
+
+/**
+ * Cache every shell file of a manifest under its version
+ */
+async function precacheShell(manifest) {
+    const cache = await caches.open(SHELL_CACHE_PREFIX + manifest.version);
+    await cache.addAll(manifest.files.map(file => scopeUrl(file.url)));
+    await cache.put(scopeUrl(MANIFEST_URL), new Response(JSON.stringify(manifest), {
+        headers: { 'Content-Type': 'application/json' }
+    }));
+}
+
+/**
+ * Delete shell and detail caches of other versions
+ */
+async function deleteStaleCaches(manifest) {
+    const keep = new Set([
+        SHELL_CACHE_PREFIX + manifest.version,
+        DETAIL_CACHE_PREFIX + manifest.dataVersion
+    ]);
+    const keys = await caches.keys();
+    await Promise.all(keys
+        .filter(key => (key.startsWith(SHELL_CACHE_PREFIX) || key.startsWith(DETAIL_CACHE_PREFIX)) && !keep.has(key))
+        .map(key => caches.delete(key)));
+}
+
+/**
+ * sw.js itself rarely changes, so a new deploy is detected from the manifest:
+ * on navigation, precache the new version if it is not cached yet
+ */
+async function refreshShell() {
+    const manifest = await getManifest();
+    if (manifest.version === 'none' || await caches.has(SHELL_CACHE_PREFIX + manifest.version)) {
+        return;
+    }
+    await precacheShell(manifest);
+    await deleteStaleCaches(manifest);
+}
+
+self.addEventListener('install', event => {
+    event.waitUntil((async () => {
+        await precacheShell(await getManifest());
+        await self.skipWaiting();
+    })());
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil((async () => {
+        await deleteStaleCaches(await getManifest());
+        await self.clients.claim();
+    })());
+});
+
+/**
+ * Detail and evaluation page files: cache-first, stored on first fetch
+ */
+async function detailResponse(request) {
+    const manifest = await getManifest();
+    const cache = await caches.open(DETAIL_CACHE_PREFIX + manifest.dataVersion);
+    const cached = await cache.match(request);
+    if (cached) return cached;
+
+    const response = await fetch(request);
+    if (response.ok) {
+        await cache.put(request, response.clone());
+        trimCache(cache);
+    }
+    return response;
+}
+
+/**
+ * Drop the oldest entries beyond MAX_DETAIL_ENTRIES (keys are in insertion order)
+ */
+async function trimCache(cache) {
+    const keys = await cache.keys();
+    const excess = keys.length - MAX_DETAIL_ENTRIES;
+    for (let i = 0; i < excess; i++) {
+        await cache.delete(keys[i]);
+    }
+}
+
+/**
+ * Index files (metadata, schools, mentor lists): network first so version
+ * checks see new exports; the precached copy is the offline fallback
+ */
+async function indexResponse(request) {
+    try {
+        const response = await fetch(request);
+        if (response.ok) return response;
+    } catch (error) {
+        // Offline: fall through to the cache
+    }
+    const cached = await caches.match(request, { ignoreSearch: true });
+    if (cached) return cached;
+    return fetch(request);
+}
+
+/**
+ * Everything else: precached copy first, then network, then any cached copy
+ */
+async function shellResponse(request) {
+    const cached = await caches.match(request, { ignoreSearch: request.mode === 'navigate' });
+    if (cached) return cached;
+
+    try {
+        return await fetch(request);
+    } catch (error) {
+        if (request.mode === 'navigate') {
+            const fallback = await caches.match(scopeUrl('index.html'));
+            if (fallback) return fallback;
+        }
+        throw error;
+    }
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') return;
+
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) return;
+
+    // The manifest itself is always revalidated by getManifest()
+    if (url.pathname.endsWith('/' + MANIFEST_URL)) return;
+
+    if (request.mode === 'navigate') {
+        event.waitUntil(refreshShell().catch(() => {}));
+    }
+
+    if (/\/data\/(mentors|mentor_pages)\/[^/]+\.json$/.test(url.pathname)) {
+        event.respondWith(detailResponse(request));
+    } else if (/\/data\/[^/]+\.json$/.test(url.pathname)) {
+        event.respondWith(indexResponse(request));
+    } else {
+        event.respondWith(shellResponse(request));
+    }
+});
@@ -6,45 +6,232 @@ Organizes mentor data by school and creates optimized JSON files
 """
 
 import json
+import glob
+import argparse
+import bisect
+import hashlib
 from collections import defaultdict
 from typing import Dict, List
 import os
+import shutil
+
+
+# Values produced by fillna / str(nan) that mean "missing"
+PLACEHOLDER_VALUES = frozenset({'nan', 'NaN', 'None', '', 'null'})
+SCHOOL_PLACEHOLDERS = PLACEHOLDER_VALUES | {'未知'}
+
+# Evaluations per page in mentor detail exports
+EVALUATION_PAGE_SIZE = 20
+
+DIMENSIONS = [
+    '导师能力',
+    '经费情况',
+    '学生补助',
+    '师生关系',
+    '工作时间',
+    '毕业去向'
+]
+
+# Score metrics summarized in distributions.json and ranked per school
+SCORE_METRICS = ['totalScore'] + DIMENSIONS
+
+# Fixed histogram bins over the 0-10 score range (bin width 0.5)
+HISTOGRAM_BINS = 20
+SCORE_RANGE = (0.0, 10.0)
+
+# Quantiles stored per distribution
+QUANTILES = [0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95]
+
+# Marker of the columnar mentors_by_school.json payload (see encode_mentor_lists)
+MENTOR_LIST_FORMAT = 'columnar-v1'
+
+# Columns of the normalized mentor frame, in detail file order
+FRAME_COLUMNS = [
+    'id',
+    'name',
+    'school',
+    'department',
+    'evaluationCount',
+    'totalScore',
+    'dimensionScores',
+    'dimensionReasons',
+    'overallRecommendation',
+    'evaluations'
+]
+
+# Source keys of the scored columns in the Qwen and rule engine metric formats
+QWEN_KEYS = {
+    'evaluationCount': 'evaluationCount',
+    'totalScore': 'totalScore',
+    'dimensionScores': 'dimensionScores',
+    'dimensionReasons': 'dimensionReasons',
+    'overallRecommendation': 'overallRecommendation'
+}
+RULE_KEYS = {
+    'evaluationCount': 'evaluation_count',
+    'totalScore': 'total_score',
+    'dimensionScores': 'dimension_scores',
+    'dimensionReasons': 'dimension_reasons',
+    'overallRecommendation': 'overall_recommendation'
+}
+
+
+def clean_field(value, default: str, placeholders: frozenset = PLACEHOLDER_VALUES) -> str:
+    """Stringify a field, replacing NaN/None placeholders with a default"""
+    if value.__class__ is not str:
+        value = '' if value is None else str(value)
+    return default if value in placeholders else value
+
+
+def normalize_mentor(mentor_id: str, data: Dict) -> Dict:
+    """
+    Build the detail record for one mentor
+
+    Supports both the rule engine format (evaluation_count, total_score, ...)
+    and the Qwen format (evaluationCount, totalScore, ...); the format is
+    detected once per record.
+    """
+    keys = QWEN_KEYS if 'totalScore' in data or 'evaluationCount' in data else RULE_KEYS
+    return {
+        'id': mentor_id,
+        'name': clean_field(data.get('name'), '未知导师'),
+        'school': clean_field(data.get('school'), '未知学校', SCHOOL_PLACEHOLDERS),
+        'department': clean_field(data.get('department'), '未知院系'),
+        'evaluationCount': data.get(keys['evaluationCount'], 0),
+        'totalScore': data.get(keys['totalScore'], 5.0),
+        'dimensionScores': data.get(keys['dimensionScores']) or {},
+        'dimensionReasons': data.get(keys['dimensionReasons']) or {},
+        'overallRecommendation': data.get(keys['overallRecommendation']) or '',
+        'evaluations': [
+            {
+                'comment': eval_data['comment'],
+                'dimensions': eval_data.get('dimensions', {})
+            }
+            for eval_data in data.get('evaluations', [])
+        ]
+    }
 
 
-def generate_school_data(mentor_metrics: Dict) -> List[Dict]:
-    """Generate school list with statistics"""
-    school_stats = defaultdict(lambda: {
-        'mentor_count': 0,
-        'total_evaluations': 0,
-        'avg_score': [],
-        'departments': set()
-    })
+def build_frame(mentor_metrics: Dict) -> Dict[str, List]:
+    """
+    Normalize every mentor in a single pass into a columnar frame
+
+    Returns:
+        Column name -> list of values, one entry per mentor (see FRAME_COLUMNS).
+        All exported artifacts are derived from this frame.
+    """
+    frame = {column: [] for column in FRAME_COLUMNS}
+    appenders = [(column, frame[column].append) for column in FRAME_COLUMNS]
 
     for mentor_id, data in mentor_metrics.items():
-        school = str(data.get('school', '未知'))
-        # Clean various forms of NaN/None
-        if not school or school in ['nan', 'NaN', 'None', '', 'null', '未知']:
-            school = '未知学校'
+        detail = normalize_mentor(mentor_id, data)
+        for column, append in appenders:
+            append(detail[column])
+
+    return frame
+
+
+def frame_row(frame: Dict[str, List], index: int) -> Dict:
+    """Detail record at one row of the frame"""
+    return {column: frame[column][index] for column in FRAME_COLUMNS}
+
+
+def group_by(frame: Dict[str, List], column: str) -> Dict[str, List[int]]:
+    """Row indexes grouped by the value of one column, in row order"""
+    groups = defaultdict(list)
+    for index, value in enumerate(frame[column]):
+        groups[value].append(index)
+    return groups
+
+
+def metric_values(frame: Dict[str, List], rows: List[int], metric: str) -> List[float]:
+    """Scores of one metric over a set of rows (mentors without the dimension are skipped)"""
+    if metric == 'totalScore':
+        total_scores = frame['totalScore']
+        return [total_scores[i] for i in rows]
+    dimension_scores = frame['dimensionScores']
+    return [
+        score for score in (dimension_scores[i].get(metric) for i in rows)
+        if score is not None
+    ]
+
+
+def percentile_rank(sorted_values: List[float], value: float) -> int:
+    """Mid-rank percentile (0-100) of a value within sorted scores; ties count half"""
+    below = bisect.bisect_left(sorted_values, value)
+    equal = bisect.bisect_right(sorted_values, value) - below
+    return round(100 * (below + equal / 2) / len(sorted_values))
+
+
+def summarize_scores(values: List[float]) -> Dict:
+    """
+    Compact distribution summary of a list of scores
+
+    Returns:
+        {'count', 'mean', 'min', 'max', 'histogram', 'quantiles'}; histogram holds
+        HISTOGRAM_BINS counts over SCORE_RANGE, quantiles follow QUANTILES
+    """
+    if not values:
+        return {'count': 0, 'mean': None, 'min': None, 'max': None,
+                'histogram': [0] * HISTOGRAM_BINS, 'quantiles': []}
+
+    values = sorted(values)
+    low, high = SCORE_RANGE
+    width = (high - low) / HISTOGRAM_BINS
+    histogram = [0] * HISTOGRAM_BINS
+    for value in values:
+        # Scores outside the range land in the edge bins
+        histogram[min(max(int((value - low) / width), 0), HISTOGRAM_BINS - 1)] += 1
+
+    # Linear interpolation between closest ranks
+    quantiles = []
+    last = len(values) - 1
+    for q in QUANTILES:
+        position = q * last
+        lower = int(position)
+        upper = min(lower + 1, last)
+        quantiles.append(round(values[lower] + (values[upper] - values[lower]) * (position - lower), 2))
+
+    return {
+        'count': len(values),
+        'mean': round(sum(values) / len(values), 2),
+        'min': values[0],
+        'max': values[-1],
+        'histogram': histogram,
+        'quantiles': quantiles
+    }
+
+
+def mentor_summary(detail: Dict) -> Dict:
+    """List entry for a mentor (detail record without text fields)"""
+    return {
+        'id': detail['id'],
+        'name': detail['name'],
+        'department': detail['department'],
+        'evaluationCount': detail['evaluationCount'],
+        'totalScore': detail['totalScore'],
+        'dimensionScores': detail['dimensionScores']
+    }
 
-        school_stats[school]['mentor_count'] += 1
-        school_stats[school]['total_evaluations'] += data.get('evaluation_count', 0)
-        school_stats[school]['avg_score'].append(data.get('total_score', 5.0))
 
-        dept = str(data.get('department', '未知'))
-        if dept and dept not in ['nan', 'NaN', 'None', '', 'null', '未知']:
-            school_stats[school]['departments'].add(dept)
+def generate_school_data(frame: Dict[str, List], groups: Dict[str, List[int]] = None) -> List[Dict]:
+    """Generate school list with statistics (group aggregation over the frame)"""
+    groups = groups if groups is not None else group_by(frame, 'school')
+    evaluation_counts = frame['evaluationCount']
+    total_scores = frame['totalScore']
+    departments = frame['department']
 
-    # Convert to list format
     schools = []
-    for school_name, stats in school_stats.items():
-        avg_score = sum(stats['avg_score']) / len(stats['avg_score']) if stats['avg_score'] else 5.0
+    for school_name, rows in groups.items():
+        scores = [total_scores[i] for i in rows]
+        avg_score = sum(scores) / len(scores) if scores else 5.0
 
         schools.append({
             'name': school_name,
-            'mentorCount': stats['mentor_count'],
-            'evaluationCount': stats['total_evaluations'],
+            'mentorCount': len(rows),
+            'evaluationCount': sum(evaluation_counts[i] for i in rows),
             'averageScore': round(avg_score, 2),
-            'departmentCount': len(stats['departments'])
+            'departmentCount': len({departments[i] for i in rows} - {'未知院系', '未知'})
         })
 
     # Sort by mentor count
@@ -53,108 +240,346 @@ def generate_school_data(mentor_metrics: Dict) -> List[Dict]:
     return schools
 
 
-def generate_mentor_list_by_school(mentor_metrics: Dict) -> Dict[str, List]:
-    """Generate mentor lists organized by school"""
-    mentors_by_school = defaultdict(list)
-
-    for mentor_id, data in mentor_metrics.items():
-        school = str(data.get('school', '未知'))
-        if not school or school in ['nan', 'NaN', 'None', '', 'null', '未知']:
-            school = '未知学校'
-
-        name = str(data.get('name', '未知'))
-        if not name or name in ['nan', 'NaN', 'None', '', 'null']:
-            name = '未知导师'
-
-        dept = str(data.get('department', '未知'))
-        if not dept or dept in ['nan', 'NaN', 'None', '', 'null']:
-            dept = '未知院系'
-
-        # Support both old format (evaluation_count) and new format (evaluationCount)
-        eval_count = data.get('evaluationCount', data.get('evaluation_count', 0))
-        total_score = data.get('totalScore', data.get('total_score', 5.0))
-        dim_scores = data.get('dimensionScores', data.get('dimension_scores', {}))
-
-        mentor_summary = {
-            'id': mentor_id,
-            'name': name,
-            'department': dept,
-            'evaluationCount': eval_count,
-            'totalScore': total_score,
-            'dimensionScores': dim_scores
+def generate_mentor_list_by_school(
+    frame: Dict[str, List],
+    groups: Dict[str, List[int]] = None
+) -> Dict[str, List]:
+    """
+    Generate mentor lists organized by school
+
+    Each entry carries its percentile rank within the school for the total
+    score and every scored dimension, so percentile views need no client work.
+    """
+    groups = groups if groups is not None else group_by(frame, 'school')
+    evaluation_counts = frame['evaluationCount']
+    ids, names, departments = frame['id'], frame['name'], frame['department']
+    total_scores, dimension_scores = frame['totalScore'], frame['dimensionScores']
+
+    mentors_by_school = {}
+    for school, rows in groups.items():
+        ranked = {metric: sorted(metric_values(frame, rows, metric)) for metric in SCORE_METRICS}
+
+        # Sort mentors within each school by evaluation count (stable, row order on ties)
+        rows = sorted(rows, key=lambda i: evaluation_counts[i], reverse=True)
+        entries = []
+        for i in rows:
+            percentiles = {'totalScore': percentile_rank(ranked['totalScore'], total_scores[i])}
+            for dimension, score in dimension_scores[i].items():
+                if score is not None and ranked.get(dimension):
+                    percentiles[dimension] = percentile_rank(ranked[dimension], score)
+            entries.append({
+                'id': ids[i],
+                'name': names[i],
+                'department': departments[i],
+                'evaluationCount': evaluation_counts[i],
+                'totalScore': total_scores[i],
+                'dimensionScores': dimension_scores[i],
+                'percentiles': percentiles
+            })
+        mentors_by_school[school] = entries
+
+    return mentors_by_school
+
+
+def _compact_number(value):
+    """Integral floats as ints (7.0 -> 7); JSON numbers parse the same either way"""
+    if value.__class__ is float and value.is_integer():
+        return int(value)
+    return value
+
+
+def encode_mentor_lists(mentors_by_school: Dict[str, List[Dict]]) -> Dict:
+    """
+    Columnar encoding of the per-school mentor lists
+
+    Field names and the six dimension keys are written once instead of per
+    mentor. Each school holds parallel arrays in list order: id, name,
+    department (index into the school's departments table), evaluationCount,
+    totalScore, a score matrix with one row per mentor in DIMENSIONS order
+    (metadata.json 'dimensions') and a percentile matrix in SCORE_METRICS
+    order; missing values are null. docs/js/common.js decodes it back into
+    the generate_mentor_list_by_school() entries.
+    """
+    schools = {}
+    for school, entries in mentors_by_school.items():
+        department_index = {}
+        columns = {
+            'id': [], 'name': [], 'department': [], 'evaluationCount': [],
+            'totalScore': [], 'scores': [], 'percentiles': []
         }
+        for entry in entries:
+            dimension_scores = entry['dimensionScores']
+            percentiles = entry.get('percentiles', {})
+            columns['id'].append(entry['id'])
+            columns['name'].append(entry['name'])
+            columns['department'].append(
+                department_index.setdefault(entry['department'], len(department_index))
+            )
+            columns['evaluationCount'].append(entry['evaluationCount'])
+            columns['totalScore'].append(_compact_number(entry['totalScore']))
+            columns['scores'].append([_compact_number(dimension_scores.get(d)) for d in DIMENSIONS])
+            columns['percentiles'].append([percentiles.get(m) for m in SCORE_METRICS])
+        schools[school] = {'departments': list(department_index), **columns}
+
+    return {'format': MENTOR_LIST_FORMAT, 'schools': schools}
+
+
+def generate_distributions(frame: Dict[str, List], groups: Dict[str, List[int]] = None) -> Dict:
+    """
+    Score distribution summaries per school x metric and over all mentors
+
+    Percentile and histogram views read this small file instead of
+    scanning mentor lists in the browser.
+    """
+    groups = groups if groups is not None else group_by(frame, 'school')
+    return {
+        'bins': {'min': SCORE_RANGE[0], 'max': SCORE_RANGE[1], 'count': HISTOGRAM_BINS},
+        'quantiles': QUANTILES,
+        'global': summarize_rows(frame, range(len(frame['id']))),
+        'schools': {school: summarize_rows(frame, rows) for school, rows in groups.items()}
+    }
+
+
+def summarize_rows(frame: Dict[str, List], rows: List[int]) -> Dict:
+    """Distribution summary of every score metric over a set of rows"""
+    return {
+        metric: summarize_scores(metric_values(frame, rows, metric))
+        for metric in SCORE_METRICS
+    }
+
 
-        mentors_by_school[school].append(mentor_summary)
+def label_evaluations(detail: Dict, extractor) -> Dict[str, int]:
+    """
+    Attach a sentiment label to every evaluation and fill in missing dimension tags
 
-    # Sort mentors within each school by evaluation count
-    for school in mentors_by_school:
-        mentors_by_school[school].sort(
-            key=lambda x: x['evaluationCount'],
-            reverse=True
-        )
+    Returns:
+        Evaluation counts per sentiment label
+    """
+    evaluations = detail['evaluations']
+    labels = extractor.label_evaluations([e['comment'] for e in evaluations])
 
-    return dict(mentors_by_school)
+    counts = {'positive': 0, 'negative': 0, 'neutral': 0}
+    for evaluation, label in zip(evaluations, labels):
+        evaluation['sentiment'] = label['sentiment']
+        if not evaluation['dimensions']:
+            evaluation['dimensions'] = dict(label['dimensions'])
+        counts[label['sentiment']] += 1
 
+    return counts
+
+
+def generate_mentor_details(frame: Dict[str, List], output_dir: str, rows: List[int] = None):
+    """
+    Generate individual mentor detail files
+
+    The detail file holds the header and the first page of evaluations;
+    further pages go to mentor_pages/{mentor_id}_{page}.json (page >= 2).
+
+    Args:
+        frame: Normalized mentor frame
+        output_dir: Data directory (docs/data)
+        rows: Only rewrite the files of these rows (default: full export)
+    """
+    # Only needed for exports; keeps the rule engine off the import path of the API server
+    from data_processor import DimensionExtractor
+    extractor = DimensionExtractor()
 
-def generate_mentor_details(mentor_metrics: Dict, output_dir: str):
-    """Generate individual mentor detail files"""
     details_dir = os.path.join(output_dir, 'mentors')
     os.makedirs(details_dir, exist_ok=True)
 
+    pages_dir = os.path.join(output_dir, 'mentor_pages')
+    if rows is None:
+        # Pages from a previous export may no longer exist
+        shutil.rmtree(pages_dir, ignore_errors=True)
+        rows = range(len(frame['id']))
+    else:
+        for index in rows:
+            for stale in glob.glob(os.path.join(pages_dir, f"{glob.escape(frame['id'][index])}_*.json")):
+                os.remove(stale)
+    os.makedirs(pages_dir, exist_ok=True)
+
     count = 0
-    for mentor_id, data in mentor_metrics.items():
-        # Clean all string fields
-        name = str(data.get('name', '未知'))
-        if not name or name in ['nan', 'NaN', 'None', '', 'null']:
-            name = '未知导师'
-
-        school = str(data.get('school', '未知'))
-        if not school or school in ['nan', 'NaN', 'None', '', 'null']:
-            school = '未知学校'
-
-        dept = str(data.get('department', '未知'))
-        if not dept or dept in ['nan', 'NaN', 'None', '', 'null']:
-            dept = '未知院系'
-
-        # Support both old and new format
-        eval_count = data.get('evaluationCount', data.get('evaluation_count', 0))
-        total_score = data.get('totalScore', data.get('total_score', 5.0))
-        dim_scores = data.get('dimensionScores', data.get('dimension_scores', {}))
-        dim_reasons = data.get('dimensionReasons', data.get('dimension_reasons', {}))
-        overall_rec = data.get('overallRecommendation', data.get('overall_recommendation', ''))
-
-        detail = {
-            'id': mentor_id,
-            'name': name,
-            'school': school,
-            'department': dept,
-            'evaluationCount': eval_count,
-            'totalScore': total_score,
-            'dimensionScores': dim_scores,
-            'dimensionReasons': dim_reasons,  # Add reasons
-            'overallRecommendation': overall_rec,  # Add AI recommendation
-            'evaluations': [
-                {
-                    'comment': eval_data['comment'],
-                    'dimensions': eval_data.get('dimensions', {})
-                }
-                for eval_data in data.get('evaluations', [])
-            ]
-        }
+    page_files = 0
+    for index in rows:
+        detail = frame_row(frame, index)
+        mentor_id = detail['id']
+        # Label copies: the frame stays as data_version() hashes it, whichever path exports
+        detail['evaluations'] = [dict(evaluation) for evaluation in detail['evaluations']]
+        sentiment_counts = label_evaluations(detail, extractor)
+
+        evaluations = detail['evaluations']
+        pages = [
+            evaluations[i:i + EVALUATION_PAGE_SIZE]
+            for i in range(0, len(evaluations), EVALUATION_PAGE_SIZE)
+        ] or [[]]
+
+        detail['evaluations'] = pages[0]
+        detail['evaluationPages'] = len(pages)
+        detail['evaluationPageSize'] = EVALUATION_PAGE_SIZE
+        detail['sentimentCounts'] = sentiment_counts
 
         # Save individual file
         file_path = os.path.join(details_dir, f"{mentor_id}.json")
         with open(file_path, 'w', encoding='utf-8') as f:
             json.dump(detail, f, ensure_ascii=False, indent=2)
 
+        for page_number, page in enumerate(pages[1:], start=2):
+            page_path = os.path.join(pages_dir, f"{mentor_id}_{page_number}.json")
+            with open(page_path, 'w', encoding='utf-8') as f:
+                json.dump(page, f, ensure_ascii=False, separators=(',', ':'))
+            page_files += 1
+
         count += 1
         if count % 1000 == 0:
             print(f"  Generated {count} mentor detail files...")
 
-    print(f"✓ Generated {count} mentor detail files")
+    print(f"✓ Generated {count} mentor detail files ({page_files} evaluation page files)")
+
+
+def row_digest(frame: Dict[str, List], index: int) -> bytes:
+    """Content hash of one mentor's exported record"""
+    return hashlib.sha1(json.dumps(
+        frame_row(frame, index),
+        ensure_ascii=False, sort_keys=True
+    ).encode('utf-8')).digest()
+
+
+def data_version(frame: Dict[str, List], digests: Dict[str, bytes] = None) -> str:
+    """
+    Content hash of the exported data
+
+    Browsers keep their persistent cache for as long as this value is unchanged.
+    Combines the per-mentor row_digest() values in id order, so an incremental
+    export only rehashes the mentors it changed.
+
+    Args:
+        frame: Mentor frame
+        digests: Mentor id -> row_digest() (default: computed from the frame)
+    """
+    if digests is None:
+        digests = {mentor_id: row_digest(frame, i) for i, mentor_id in enumerate(frame['id'])}
+    digest = hashlib.sha1()
+    for mentor_id in sorted(digests):
+        digest.update(digests[mentor_id])
+    return digest.hexdigest()[:12]
+
+
+def generate_metadata(frame: Dict[str, List], schools: List[Dict], version: str = None) -> Dict:
+    """Generate site metadata (version: precomputed data_version(), if known)"""
+    return {
+        'generatedAt': '2026-02-10',
+        'version': version or data_version(frame),
+        'totalMentors': len(frame['id']),
+        'totalSchools': len(schools),
+        'totalEvaluations': sum(school['evaluationCount'] for school in schools),
+        # Column order of the score matrices in mentors_by_school.json
+        'dimensions': DIMENSIONS,
+        'mentorListFormat': MENTOR_LIST_FORMAT
+    }
+
+
+def load_exported_metrics(data_dir: str) -> Dict:
+    """
+    Read exported detail files back into a metrics dict keyed by mentor id
+
+    Evaluation pages from mentor_pages/ are rejoined, so the result can be
+    passed to build_frame() again.
+    """
+    mentor_metrics = {}
+    for path in glob.glob(os.path.join(data_dir, 'mentors', '*.json')):
+        with open(path, 'r', encoding='utf-8') as f:
+            detail = json.load(f)
+        # Later evaluation pages live in mentor_pages/{id}_{page}.json
+        for page in range(2, detail.get('evaluationPages', 1) + 1):
+            page_path = os.path.join(data_dir, 'mentor_pages', f"{detail['id']}_{page}.json")
+            with open(page_path, 'r', encoding='utf-8') as f:
+                detail['evaluations'].extend(json.load(f))
+        mentor_metrics[detail['id']] = detail
+    return mentor_metrics
+
+
+# Site files cached by the service worker on install (paths relative to docs/)
+SHELL_FILES = [
+    'index.html',
+    'mentors.html',
+    'mentor-detail.html',
+    'css/styles.css',
+    'css/mentors.css',
+    'css/mentor-detail.css',
+    'js/common.js',
+    'js/schools.js',
+    'js/mentors.js',
+    'js/mentor-detail.js',
+    'js/radar-chart.js',
+    'js/data-submission.js',
+    'data/metadata.json',
+    'data/schools.json',
+    'data/mentors_by_school.json',
+    'data/distributions.json'
+]
+
+
+def generate_precache_manifest(site_dir: str, data_version: str) -> Dict:
+    """
+    Manifest of files the service worker (docs/sw.js) precaches
+
+    Each file carries a content hash, and the manifest version changes whenever
+    any of them or the data version changes, so the worker knows when to refresh.
+    """
+    files = []
+    digest = hashlib.sha1(data_version.encode('utf-8'))
+    for rel_path in SHELL_FILES:
+        path = os.path.join(site_dir, rel_path)
+        if not os.path.exists(path):
+            continue
+        with open(path, 'rb') as f:
+            revision = hashlib.sha1(f.read()).hexdigest()[:10]
+        files.append({'url': rel_path, 'revision': revision})
+        digest.update(f"{rel_path}:{revision}".encode('utf-8'))
+
+    return {
+        'version': digest.hexdigest()[:12],
+        'dataVersion': data_version,
+        'files': files
+    }
+
+
+def write_precache_manifest(site_dir: str) -> Dict:
+    """
+    Regenerate precache-manifest.json from the files currently in site_dir
+
+    The data version comes from data/metadata.json; exports that predate the
+    'version' field fall back to a hash of the index files.
+    """
+    with open(os.path.join(site_dir, 'data', 'metadata.json'), 'r', encoding='utf-8') as f:
+        version = json.load(f).get('version')
+    if not version:
+        digest = hashlib.sha1()
+        for rel_path in ('data/metadata.json', 'data/schools.json', 'data/mentors_by_school.json'):
+            path = os.path.join(site_dir, rel_path)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+        version = digest.hexdigest()[:12]
+
+    manifest = generate_precache_manifest(site_dir, version)
+    with open(os.path.join(site_dir, 'precache-manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
 
 
 def main():
+    """Generate docs/data from mentor_metrics.json"""
+    parser = argparse.ArgumentParser(description='Generate web data files for GitHub Pages')
+    parser.add_argument('--manifest-only', action='store_true',
+                        help='Only regenerate docs/precache-manifest.json from the current site files')
+    args = parser.parse_args()
+
+    if args.manifest_only:
+        manifest = write_precache_manifest('docs')
+        print(f"✓ Generated precache manifest {manifest['version']} ({len(manifest['files'])} files)")
+        return
+
     print("="*60)
     print("Web Data Generator for Mentor Evaluation System")
     print("="*60)
@@ -165,56 +590,66 @@ def main():
         mentor_metrics = json.load(f)
     print(f"✓ Loaded {len(mentor_metrics)} mentors")
 
+    # Normalize once; every artifact below is derived from the frame
+    print("\n🧮 Normalizing mentor data...")
+    frame = build_frame(mentor_metrics)
+    del mentor_metrics
+    school_groups = group_by(frame, 'school')
+    mentor_count = len(frame['id'])
+    print(f"✓ Normalized {mentor_count} mentors into {len(school_groups)} schools")
+
     # Create output directory
     output_dir = 'docs/data'
     os.makedirs(output_dir, exist_ok=True)
 
     # Generate school list
     print("\n🏫 Generating school list...")
-    schools = generate_school_data(mentor_metrics)
+    schools = generate_school_data(frame, school_groups)
     with open(os.path.join(output_dir, 'schools.json'), 'w', encoding='utf-8') as f:
         json.dump(schools, f, ensure_ascii=False, indent=2)
     print(f"✓ Generated data for {len(schools)} schools")
 
     # Generate mentor lists by school
     print("\n👨‍🏫 Generating mentor lists by school...")
-    mentors_by_school = generate_mentor_list_by_school(mentor_metrics)
+    mentors_by_school = encode_mentor_lists(generate_mentor_list_by_school(frame, school_groups))
     with open(os.path.join(output_dir, 'mentors_by_school.json'), 'w', encoding='utf-8') as f:
-        json.dump(mentors_by_school, f, ensure_ascii=False, indent=2)
-    print(f"✓ Generated mentor lists for {len(mentors_by_school)} schools")
+        json.dump(mentors_by_school, f, ensure_ascii=False, separators=(',', ':'))
+    print(f"✓ Generated mentor lists for {len(mentors_by_school['schools'])} schools")
 
-    # Generate individual mentor detail files
-    print("\n📄 Generating individual mentor detail files...")
-    generate_mentor_details(mentor_metrics, output_dir)
+    # Generate score distributions
+    print("\n📈 Generating score distributions...")
+    distributions = generate_distributions(frame, school_groups)
+    with open(os.path.join(output_dir, 'distributions.json'), 'w', encoding='utf-8') as f:
+        json.dump(distributions, f, ensure_ascii=False, separators=(',', ':'))
+    print(f"✓ Generated distributions for {len(distributions['schools'])} schools")
 
-    # Generate metadata
+    # Generate metadata (the data version hashes the frame without export-time labels)
     print("\n📊 Generating metadata...")
-    metadata = {
-        'generatedAt': '2026-02-10',
-        'totalMentors': len(mentor_metrics),
-        'totalSchools': len(schools),
-        'totalEvaluations': sum(school['evaluationCount'] for school in schools),
-        'dimensions': [
-            '导师能力',
-            '经费情况',
-            '学生补助',
-            '师生关系',
-            '工作时间',
-            '毕业去向'
-        ]
-    }
+    metadata = generate_metadata(frame, schools)
     with open(os.path.join(output_dir, 'metadata.json'), 'w', encoding='utf-8') as f:
         json.dump(metadata, f, ensure_ascii=False, indent=2)
     print("✓ Generated metadata")
 
+    # Generate individual mentor detail files
+    print("\n📄 Generating individual mentor detail files...")
+    generate_mentor_details(frame, output_dir)
+
+    # Generate service worker precache manifest (after all data files exist)
+    print("\n📦 Generating precache manifest...")
+    manifest = write_precache_manifest(os.path.dirname(output_dir))
+    print(f"✓ Generated precache manifest ({len(manifest['files'])} files)")
+
     print("\n" + "="*60)
     print("✅ Web Data Generation Complete!")
     print("="*60)
     print(f"\nGenerated files:")
     print(f"  - docs/data/schools.json ({len(schools)} schools)")
     print(f"  - docs/data/mentors_by_school.json")
-    print(f"  - docs/data/mentors/*.json ({len(mentor_metrics)} files)")
+    print(f"  - docs/data/distributions.json")
+    print(f"  - docs/data/mentors/*.json ({mentor_count} files)")
+    print(f"  - docs/data/mentor_pages/*.json")
     print(f"  - docs/data/metadata.json")
+    print(f"  - docs/precache-manifest.json")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hierarchical (map-reduce) Qwen scoring for heavily reviewed mentors
+- Map: split all comments into token-bounded chunks and extract
+  per-chunk dimension evidence concurrently
+- Reduce: combine chunk evidence into final scores, weighted by comment count
+- Chunk results are cached on disk so only new chunks are reprocessed
+"""
+
+import json
+import asyncio
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from comment_preprocessor import CommentPreprocessor, estimate_tokens
+from response_parser import ResponseParseError, load_json_lenient
+from async_io import write_json_file
+
+
+# Bump when CHUNK_SYSTEM_PROMPT changes so stale cache entries are not reused
+CHUNK_PROMPT_VERSION = 1
+
+CHUNK_SYSTEM_PROMPT = """你是专业的研究生导师评价专家。用户会给出同一位导师的一部分学生评价，请从中提取6个维度的评价证据：
+1. 导师能力（科研能力、学术水平、指导能力）
+2. 经费情况（科研经费充足程度）
+3. 学生补助（每月补贴、工资发放情况）
+4. 师生关系（导师对学生的态度和尊重程度）
+5. 工作时间（工作强度、加班情况、休息时间，分数越高代表工作时间越合理）
+6. 毕业去向（对学生职业发展的支持和关注）
+
+对每个维度：mentioned 表示这部分评价是否明确提及该维度；提及时按 明确正面6-10分、明确负面0-4分 打分，未提及时打5分。
+
+必须严格按照以下JSON格式输出，不要包含任何其他文字：
+{"导师能力": {"mentioned": true, "score": 分数, "reason": "证据摘要（不超过30字）"}, "经费情况": {...}, "学生补助": {...}, "师生关系": {...}, "工作时间": {...}, "毕业去向": {...}, "overall_recommendation": "整体建议（不超过50字）"}"""
+
+# Fixed per-request overhead (system prompt + message framing), in estimated tokens
+CHUNK_PROMPT_OVERHEAD = estimate_tokens(CHUNK_SYSTEM_PROMPT) + 20
+
+
+class HierarchicalScorer:
+    """Map-reduce scoring over every comment of a mentor"""
+
+    def __init__(
+        self,
+        client,
+        model: str = "qwen-plus",
+        chunk_tokens: int = 1500,
+        max_output_tokens: int = 800,
+        concurrency: int = 5,
+        cache_dir: str = "qwen_chunk_cache"
+    ):
+        """
+        Args:
+            client: AsyncOpenAI-compatible client
+            model: Model name
+            chunk_tokens: Upper bound on estimated comment tokens per chunk
+            max_output_tokens: max_tokens for each chunk request
+            concurrency: Concurrent chunk requests
+            cache_dir: Directory for cached chunk results
+        """
+        self.client = client
+        self.model = model
+        self.chunk_tokens = chunk_tokens
+        self.max_output_tokens = max_output_tokens
+        self.concurrency = concurrency
+        self._semaphore = None
+        self._loop = None
+        self.cache_dir = Path(cache_dir)
+
+        self.dimensions = [
+            "导师能力",
+            "经费情况",
+            "学生补助",
+            "师生关系",
+            "工作时间",
+            "毕业去向"
+        ]
+
+        self.stats = {'chunks': 0, 'cached_chunks': 0, 'failed_chunks': 0, 'input_tokens': 0}
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Concurrency limiter bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    def chunk_comments(self, comments: List[str]) -> List[List[str]]:
+        """
+        Greedily pack comments, in order, into token-bounded chunks
+
+        Packing in the original order means new comments only change the
+        trailing chunk, so earlier chunks keep hitting the cache.
+        """
+        chunks = []
+        current = []
+        current_tokens = 0
+
+        for comment in comments:
+            tokens = estimate_tokens(comment)
+            if tokens > self.chunk_tokens:
+                # A single oversized comment is cut to the bound (CJK ≈ 1 token/char)
+                comment = comment[:self.chunk_tokens]
+                tokens = estimate_tokens(comment)
+
+            if current and current_tokens + tokens > self.chunk_tokens:
+                chunks.append(current)
+                current = []
+                current_tokens = 0
+
+            current.append(comment)
+            current_tokens += tokens
+
+        if current:
+            chunks.append(current)
+
+        return chunks
+
+    def estimate_cost(self, comments: List[str]) -> Dict:
+        """
+        Upper bound on the tokens needed to score a comment set
+
+        Every chunk costs at most chunk_tokens + CHUNK_PROMPT_OVERHEAD input
+        tokens and max_output_tokens output tokens; cached chunks cost nothing.
+        """
+        chunks = self.chunk_comments(comments)
+        uncached = [c for c in chunks if not self._cache_path(c).exists()]
+        input_tokens = sum(
+            sum(estimate_tokens(comment) for comment in chunk) + CHUNK_PROMPT_OVERHEAD
+            for chunk in uncached
+        )
+        return {
+            'chunks': len(chunks),
+            'cached_chunks': len(chunks) - len(uncached),
+            'input_tokens': input_tokens,
+            'max_output_tokens': len(uncached) * self.max_output_tokens
+        }
+
+    def _cache_path(self, chunk: List[str]) -> Path:
+        """Cache file for a chunk, keyed by model, prompt version and content"""
+        key = hashlib.sha1(
+            f"{self.model}\n{CHUNK_PROMPT_VERSION}\n".encode('utf-8') +
+            "\n␞\n".join(chunk).encode('utf-8')
+        ).hexdigest()
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    async def extract_chunk(self, chunk: List[str]) -> Tuple[Dict, bool]:
+        """
+        Extract dimension evidence from one chunk
+
+        Returns:
+            (evidence dict, whether it came from cache)
+        """
+        cache_path = self._cache_path(chunk)
+        if cache_path.exists():
+            return await asyncio.to_thread(self._read_cache, cache_path), True
+
+        comments_text = "\n".join(f"  - {c}" for c in chunk)
+        self.stats['input_tokens'] += estimate_tokens(comments_text) + CHUNK_PROMPT_OVERHEAD
+
+        async with self._get_semaphore():
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": CHUNK_SYSTEM_PROMPT},
+                    {"role": "user", "content": f"学生评价（共{len(chunk)}条）：\n{comments_text}"}
+                ],
+                temperature=0.3,
+                max_tokens=self.max_output_tokens
+            )
+
+        result_text = response.choices[0].message.content.strip()
+
+        # Tolerates code fences, trailing prose, bad escapes and truncation;
+        # parsing and the cache write run off the event loop
+        evidence = await asyncio.to_thread(load_json_lenient, result_text)
+        if not isinstance(evidence, dict):
+            raise ResponseParseError("chunk response is not a JSON object")
+
+        await asyncio.to_thread(write_json_file, str(cache_path), evidence)
+
+        return evidence, False
+
+    @staticmethod
+    def _read_cache(cache_path: Path) -> Dict:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def reduce(self, chunk_results: List[Tuple[Dict, int]]) -> Tuple[Dict, Dict, str]:
+        """
+        Combine chunk evidence into final scores
+
+        Args:
+            chunk_results: (evidence, number of comments in chunk) pairs
+
+        Returns:
+            (dimension scores, dimension reasons, overall recommendation)
+        """
+        dimension_scores = {}
+        dimension_reasons = {}
+
+        for dim in self.dimensions:
+            weighted = 0.0
+            weight = 0
+            best_reason, best_weight = '', 0
+
+            for evidence, size in chunk_results:
+                item = evidence.get(dim)
+                if not isinstance(item, dict) or not item.get('mentioned', True):
+                    continue
+                try:
+                    score = float(item.get('score', 5.0))
+                except (TypeError, ValueError):
+                    continue
+
+                weighted += score * size
+                weight += size
+                if size > best_weight:
+                    best_reason, best_weight = item.get('reason', ''), size
+
+            if weight:
+                dimension_scores[dim] = round(weighted / weight, 2)
+                dimension_reasons[dim] = best_reason
+            else:
+                dimension_scores[dim] = 5.0
+                dimension_reasons[dim] = '评价中未提及'
+
+        # Recommendation from the chunk backed by the most comments
+        recommendation = ''
+        if chunk_results:
+            evidence, _ = max(chunk_results, key=lambda x: x[1])
+            recommendation = evidence.get('overall_recommendation', '')
+
+        return dimension_scores, dimension_reasons, recommendation
+
+    async def score_mentor(self, mentor: Dict) -> Dict:
+        """
+        Score one mentor over all of their comments
+
+        Args:
+            mentor: Mentor dict with id, name, school, department, comments
+                    (and optionally preprocessed prompt_comments)
+
+        Returns:
+            Mentor metric in the same format as QwenBatchProcessor
+        """
+        comments = mentor.get('prompt_comments', mentor['comments'])
+        chunks = self.chunk_comments(comments)
+        if not chunks:
+            return CommentPreprocessor.neutral_metric(mentor, self.dimensions)
+
+        outcomes = await asyncio.gather(
+            *[self.extract_chunk(chunk) for chunk in chunks],
+            return_exceptions=True
+        )
+
+        chunk_results = []
+        cached = 0
+        for chunk, outcome in zip(chunks, outcomes):
+            self.stats['chunks'] += 1
+            if isinstance(outcome, Exception):
+                self.stats['failed_chunks'] += 1
+                print(f"  ⚠️ Chunk error for {mentor['name']}: {outcome}")
+                continue
+            evidence, from_cache = outcome
+            cached += from_cache
+            chunk_results.append((evidence, len(chunk)))
+
+        if not chunk_results:
+            raise RuntimeError(f"all {len(chunks)} chunks failed")
+
+        dimension_scores, dimension_reasons, recommendation = self.reduce(chunk_results)
+        self.stats['cached_chunks'] += cached
+
+        scores = list(dimension_scores.values())
+        total_score = sum(scores) / len(scores) if scores else 5.0
+
+        return {
+            'id': mentor['id'],
+            'name': mentor['name'],
+            'school': mentor['school'],
+            'department': mentor['department'],
+            'evaluationCount': len(mentor['comments']),
+            'dimensionScores': dimension_scores,
+            'dimensionReasons': dimension_reasons,
+            'totalScore': round(total_score, 2),
+            'overallRecommendation': recommendation,
+            'evaluations': [{'comment': c, 'dimensions': {}} for c in mentor['comments']],
+            'provenance': {
+                'engine': 'qwen',
+                'model': self.model,
+                'mode': 'hierarchical',
+                'chunks': len(chunks),
+                'cachedChunks': cached,
+                'failedChunks': len(chunks) - len(chunk_results)
+            }
+        }
+
+    async def score_mentors(self, mentors: List[Dict]) -> Dict:
+        """Score several mentors; failures are reported and skipped"""
+        results = await asyncio.gather(
+            *[self.score_mentor(m) for m in mentors],
+            return_exceptions=True
+        )
+
+        metrics = {}
+        for mentor, result in zip(mentors, results):
+            if isinstance(result, Exception):
+                print(f"  ✗ Hierarchical scoring failed for {mentor['name']}: {result}")
+                continue
+            metrics[mentor['id']] = result
+
+        return metrics
+
+    def report(self):
+        """Print chunk and token usage summary"""
+        s = self.stats
+        print(f"\n🧩 Hierarchical scoring:")
+        print(f"   Chunks: {s['chunks']} ({s['cached_chunks']} from cache, {s['failed_chunks']} failed)")
+        print(f"   Estimated input tokens sent: {s['input_tokens']}")
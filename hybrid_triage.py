@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hybrid Triage Processor for Mentor Evaluation System
+- Rule engine (or the distilled scorer, --distilled-model) pre-scores every mentor
+- Only ambiguous, low-confidence or high-traffic mentors are sent to Qwen
+- Both outputs are merged into one metrics file with provenance
+"""
+
+import asyncio
+import argparse
+import time
+from typing import Dict, List, Tuple
+
+from data_processor import DimensionExtractor
+from comment_preprocessor import PLACEHOLDER_COMMENTS
+
+
+class TriageRouter:
+    """Decide per mentor whether the rule engine result is good enough"""
+
+    DIMENSIONS = list(DimensionExtractor.DIMENSIONS.keys())
+
+    # Free-text comments up to this length are treated as simple remarks
+    SHORT_COMMENT_CHARS = 50
+
+    # Comments longer than this are checked for text the keyword rules cannot parse
+    LONG_COMMENT_CHARS = 200
+
+    def __init__(
+        self,
+        ambiguity_threshold: float = 0.5,
+        high_traffic_count: int = 5,
+        distilled=None,
+        min_confidence: float = 0.2
+    ):
+        """
+        Args:
+            ambiguity_threshold: Mentors at or above this ambiguity go to the LLM
+            high_traffic_count: Mentors with at least this many evaluations always go to the LLM
+            distilled: DistilledScorer for the first pass instead of the rule engine
+            min_confidence: Distilled results below this confidence go to the LLM
+        """
+        self.extractor = DimensionExtractor()
+        self.ambiguity_threshold = ambiguity_threshold
+        self.high_traffic_count = high_traffic_count
+        self.distilled = distilled
+        self.min_confidence = min_confidence
+
+    def measure_ambiguity(self, comments: List[str]) -> Tuple[float, List[str], List[Dict]]:
+        """
+        Score how unreliable the rule engine is for a set of comments
+
+        Returns:
+            (ambiguity in 0-1, triggered signal names, extracted dimensions per comment)
+        """
+        signals = set()
+        ambiguity = 0.0
+        extracted = []
+
+        # Sign of every dimension score seen, to detect disagreement across comments
+        dimension_signs = {}
+        content_count = 0
+        conflict_count = 0
+        silent_count = 0
+
+        for comment in comments:
+            dimensions = self.extractor.extract_dimensions(comment)
+            extracted.append(dimensions)
+
+            if comment.strip() in PLACEHOLDER_COMMENTS:
+                continue
+
+            if not dimensions and len(comment.strip()) > 10:
+                # Free text without any "维度：内容" structure - rules see nothing.
+                # Short one-directional remarks add little; mixed or longer ones need the LLM.
+                signals.add('unstructured')
+                positive, negative = self.extractor.count_sentiment_hits(comment)
+                mixed = positive and negative
+                if mixed or len(comment) > self.SHORT_COMMENT_CHARS:
+                    ambiguity = max(ambiguity, 0.7)
+                else:
+                    ambiguity = max(ambiguity, 0.3)
+
+            parsed_chars = sum(len(content) for content in dimensions.values())
+            if len(comment) > self.LONG_COMMENT_CHARS and parsed_chars < len(comment) / 2:
+                # Mostly free text the regexes skipped over
+                signals.add('long_text')
+                ambiguity = max(ambiguity, 0.6)
+
+            for dim_key, content in dimensions.items():
+                content_count += 1
+                positive, negative = self.extractor.count_sentiment_hits(content)
+
+                if positive and negative:
+                    conflict_count += 1
+                elif not positive and not negative and content not in ('不了解', '不清楚', ''):
+                    silent_count += 1
+
+                score = self.extractor.analyze_sentiment(content)
+                if score != 5.0:
+                    dimension_signs.setdefault(dim_key, set()).add(score > 5.0)
+
+        if content_count:
+            if conflict_count:
+                signals.add('conflict')
+                ambiguity = max(ambiguity, 0.4 + 0.6 * conflict_count / content_count)
+            if silent_count:
+                signals.add('no_sentiment')
+                ambiguity = max(ambiguity, 0.4 * silent_count / content_count)
+
+        if any(len(signs) > 1 for signs in dimension_signs.values()):
+            signals.add('disagreement')
+            ambiguity = max(ambiguity, 0.8)
+
+        return round(min(ambiguity, 1.0), 3), sorted(signals), extracted
+
+    def score_with_rules(self, mentor: Dict) -> Tuple[Dict, float, List[str]]:
+        """
+        Score one mentor with the rule engine
+
+        Args:
+            mentor: Mentor dict with id, name, school, department, comments
+
+        Returns:
+            (metric in the Qwen output format, ambiguity, signals)
+        """
+        comments = mentor['comments']
+        ambiguity, signals, extracted = self.measure_ambiguity(comments)
+
+        dimension_values = {}
+        dimension_reasons = {}
+        for dimensions in extracted:
+            for dim_key, content in dimensions.items():
+                dimension_values.setdefault(dim_key, []).append(
+                    self.extractor.analyze_sentiment(content)
+                )
+                if content and dim_key not in dimension_reasons:
+                    dimension_reasons[dim_key] = content[:30]
+
+        dimension_scores = {
+            dim: round(sum(dimension_values[dim]) / len(dimension_values[dim]), 2)
+            for dim in self.DIMENSIONS
+            if dimension_values.get(dim)
+        }
+        scores = list(dimension_scores.values())
+        total_score = sum(scores) / len(scores) if scores else 5.0
+
+        metric = {
+            'id': mentor['id'],
+            'name': mentor['name'],
+            'school': mentor['school'],
+            'department': mentor['department'],
+            'evaluationCount': len(comments),
+            'dimensionScores': dimension_scores,
+            'dimensionReasons': dimension_reasons,
+            'totalScore': round(total_score, 2),
+            'overallRecommendation': '',
+            'evaluations': [
+                {'comment': c, 'dimensions': d}
+                for c, d in zip(comments, extracted)
+            ]
+        }
+
+        return metric, ambiguity, signals
+
+    def route(self, mentors: List[Dict]) -> Tuple[Dict, List[Dict], Dict]:
+        """
+        Split mentors into first-pass results and mentors needing the LLM
+
+        With a distilled scorer its metrics replace the rule scores; the rule
+        engine's ambiguity still marks text that is hard to score, and
+        distilled results below min_confidence are routed as well.
+
+        Returns:
+            (first-pass metrics for every mentor, mentors to send to Qwen, triage info by mentor id)
+        """
+        rule_metrics = {}
+        llm_mentors = []
+        triage = {}
+        distilled = self.distilled.score(mentors) if self.distilled is not None else {}
+
+        for mentor in mentors:
+            metric, ambiguity, signals = self.score_with_rules(mentor)
+            info = {'ambiguity': ambiguity}
+            uncertain = ambiguity >= self.ambiguity_threshold
+
+            if distilled:
+                metric = distilled[mentor['id']]
+                info['confidence'] = metric['provenance']['confidence']
+                if info['confidence'] < self.min_confidence:
+                    signals = signals + ['low_confidence']
+                    uncertain = True
+            rule_metrics[mentor['id']] = metric
+
+            high_traffic = len(mentor['comments']) >= self.high_traffic_count
+            if high_traffic:
+                signals = signals + ['high_traffic']
+
+            triage[mentor['id']] = {**info, 'signals': signals}
+
+            if high_traffic or uncertain:
+                llm_mentors.append(mentor)
+
+        return rule_metrics, llm_mentors, triage
+
+    @staticmethod
+    def merge_results(
+        rule_metrics: Dict,
+        llm_metrics: Dict,
+        triage: Dict,
+        llm_ids: List[str],
+        model: str
+    ) -> Dict:
+        """
+        Merge first-pass and LLM metrics into one dict with provenance
+
+        LLM-routed mentors whose batch failed keep their first-pass score and
+        are marked as a fallback so they can be retried later.
+        """
+        merged = {}
+        llm_ids = set(llm_ids)
+
+        for mentor_id, rule_metric in rule_metrics.items():
+            info = triage.get(mentor_id, {})
+
+            if mentor_id in llm_metrics:
+                metric = llm_metrics[mentor_id]
+                provenance = metric.get('provenance') or {'engine': 'qwen', 'model': model}
+                metric['provenance'] = {**provenance, **info}
+            else:
+                metric = rule_metric
+                metric['provenance'] = {**(metric.get('provenance') or {'engine': 'rules'}), **info}
+                if mentor_id in llm_ids:
+                    metric['provenance']['fallback'] = True
+
+            merged[mentor_id] = metric
+
+        return merged
+
+
+async def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description='Hybrid rule/Qwen mentor scoring')
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help='Ambiguity at or above which a mentor is sent to Qwen (default: 0.5)')
+    parser.add_argument('--high-traffic', type=int, default=5,
+                        help='Evaluation count at or above which a mentor is always sent to Qwen (default: 5)')
+    parser.add_argument('--distilled-model',
+                        help='Pre-score with this distilled_scorer.py model instead of the rule engine')
+    parser.add_argument('--min-confidence', type=float, default=0.2,
+                        help='Distilled confidence below which a mentor is sent to Qwen (default: 0.2)')
+    parser.add_argument('--batch-size', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=5)
+    parser.add_argument('--hierarchical', action='store_true',
+                        help='Score mentors with many comments over all of them (map-reduce)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Only report the routing split, do not call Qwen')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Hybrid Triage Processor ({'Distilled' if args.distilled_model else 'Rules'} + Qwen)")
+    print("=" * 60)
+
+    from data_processor_qwen_batch import EnhancedMentorDataProcessor
+
+    api_key = ''
+    if not args.dry_run:
+        api_key = input("\n请输入您的阿里云API Key (sk-xxx): ").strip()
+        if not api_key or not api_key.startswith('sk-'):
+            print("❌ Invalid API key!")
+            return
+
+    processor = EnhancedMentorDataProcessor(api_key or 'sk-dry-run')
+    processor.load_data('导师信息.xls', '评价信息.xls')
+    mentors_list = processor.prepare_mentors_data()
+
+    # Route
+    print("\n🔀 Routing mentors...")
+    distilled = None
+    if args.distilled_model:
+        # numpy is only needed for the distilled first pass
+        from distilled_scorer import DistilledScorer
+
+        distilled = DistilledScorer.load(args.distilled_model)
+    router = TriageRouter(
+        ambiguity_threshold=args.threshold,
+        high_traffic_count=args.high_traffic,
+        distilled=distilled,
+        min_confidence=args.min_confidence
+    )
+    rule_metrics, llm_mentors, triage = router.route(mentors_list)
+
+    signal_counts = {}
+    for info in triage.values():
+        for signal in info['signals']:
+            signal_counts[signal] = signal_counts.get(signal, 0) + 1
+
+    total = len(mentors_list)
+    print(f"✓ {'Distilled scorer' if distilled else 'Rule engine'}: {total - len(llm_mentors)} mentors")
+    print(f"✓ Qwen: {len(llm_mentors)} mentors "
+          f"({len(llm_mentors) / total * 100 if total else 0:.1f}%, "
+          f"{-(-len(llm_mentors) // args.batch_size)} batches instead of {-(-total // args.batch_size)})")
+    for signal, count in sorted(signal_counts.items(), key=lambda x: x[1], reverse=True):
+        print(f"  - {signal}: {count}")
+
+    if args.dry_run:
+        return
+
+    start_time = time.time()
+
+    llm_metrics = {}
+    if llm_mentors:
+        llm_metrics = await processor.processor.process_all_batches(
+            llm_mentors,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            hierarchical=args.hierarchical
+        )
+
+    merged = TriageRouter.merge_results(
+        rule_metrics,
+        llm_metrics,
+        triage,
+        [m['id'] for m in llm_mentors],
+        processor.processor.model
+    )
+
+    elapsed = time.time() - start_time
+
+    output_file = f'mentor_metrics_hybrid_{len(merged)}.json'
+    processor.export_metrics(merged, output_file)
+
+    engines = {}
+    for metric in merged.values():
+        engine = metric['provenance']['engine']
+        engines[engine] = engines.get(engine, 0) + 1
+
+    print("\n" + "=" * 60)
+    print("✅ Processing Complete!")
+    print("=" * 60)
+    print(f"\n生成的文件: {output_file}")
+    for engine, count in engines.items():
+        print(f"  {engine}: {count} 位导师")
+    fallback = sum(1 for m in merged.values() if m['provenance'].get('fallback'))
+    if fallback:
+        print(f"  (其中 {fallback} 位 Qwen 失败，已回退为{'蒸馏模型' if distilled else '规则'}评分)")
+    print(f"耗时: {elapsed:.1f} 秒 ({elapsed/60:.1f} 分钟)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,719 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ingest Service for Anonymous Evaluation Submissions
+- POST /api/submissions/evaluations accepts one evaluation
+  (docs/js/data-submission.js); it is acknowledged only after it has been
+  appended and fsynced to a write-ahead log (group commit)
+- Accepted submissions are coalesced into micro-batches (time- or
+  size-triggered); only the affected mentors are rescored, with the rule
+  engine or optionally with Qwen (similarity cache reuse), and only their
+  detail files plus the school-level indexes are republished
+- Each applied batch is logged too, with the scores it produced (rule engine
+  or Qwen) and the pre-ingest record of mentors touched for the first time, so
+  a restart rebuilds the same state from the log without rescoring, whether the
+  base metrics are a metrics file or the export the service keeps rewriting;
+  a checkpoint records what has been published
+- Standard library only (asyncio), like api_server.py
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+import argparse
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from async_io import write_json_file
+from data_processor import DimensionExtractor
+from generate_web_data import DIMENSIONS, load_exported_metrics, normalize_mentor
+from progressive_publisher import ProgressivePublisher
+
+
+# Request limits
+MAX_BODY_BYTES = 16 * 1024
+MAX_COMMENT_CHARS = 2000
+
+# Same patterns as FormValidation.isSpam in data-submission.js
+SPAM_PATTERNS = [re.compile(r'(.)\1{10,}'), re.compile(r'https?://', re.IGNORECASE)]
+
+# Mentor fields produced by rescoring; logged with each applied batch
+RESULT_KEYS = ('totalScore', 'dimensionScores', 'dimensionReasons', 'overallRecommendation')
+
+STATUS_TEXT = {
+    200: 'OK',
+    202: 'Accepted',
+    204: 'No Content',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error'
+}
+
+
+class SubmissionError(Exception):
+    """Submission rejected; returned to the client as a JSON body"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class WriteAheadLog:
+    """
+    Append-only JSONL log with a publish checkpoint
+
+    Holds accepted submissions ({'seq', 'mentorId', ...}) and, after each
+    applied batch, one {'type': 'applied', ...} entry (see IngestService._apply).
+    """
+
+    def __init__(self, path: str = 'submissions.wal'):
+        """
+        Args:
+            path: Log file; the checkpoint is kept next to it (<path>.checkpoint)
+        """
+        self.path = path
+        self.checkpoint_path = path + '.checkpoint'
+
+    def replay(self) -> Iterator[Dict]:
+        """
+        Records in log order
+
+        A torn last line (crash during append) is cut off; it was never acknowledged.
+        """
+        if not os.path.exists(self.path):
+            return
+        valid_bytes = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                valid_bytes += len(line)
+                yield record
+        if valid_bytes < os.path.getsize(self.path):
+            print(f"  ⚠️ Truncating torn tail of {self.path} at byte {valid_bytes}")
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_bytes)
+
+    def append(self, records: List[Dict]):
+        """Append records and fsync once for the whole group (blocking)"""
+        body = ''.join(json.dumps(r, ensure_ascii=False, separators=(',', ':')) + '\n' for r in records)
+        with open(self.path, 'ab') as f:
+            f.write(body.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def published(self) -> int:
+        """Sequence number of the last published record (0 if none)"""
+        if not os.path.exists(self.checkpoint_path):
+            return 0
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            return json.load(f)['published']
+
+    def checkpoint(self, seq: int):
+        """Record that every submission up to seq is visible on the site (blocking)"""
+        write_json_file(self.checkpoint_path, {'published': seq, 'at': time.time()})
+
+
+class IngestService:
+    """Validates, logs, batches and applies evaluation submissions"""
+
+    def __init__(
+        self,
+        base_metrics: Dict,
+        wal: WriteAheadLog,
+        output_dir: str = 'docs/data',
+        batch_seconds: float = 2.0,
+        batch_size: int = 50,
+        llm=None
+    ):
+        """
+        Args:
+            base_metrics: Exported metrics (rule engine or Qwen format) the log is applied to
+            wal: Write-ahead log of submissions
+            output_dir: Data directory of the site
+            batch_seconds: Longest wait after the first pending submission before applying
+            batch_size: Pending submissions that trigger a batch immediately
+            llm: QwenBatchProcessor for rescoring affected mentors (None: rule engine only)
+        """
+        self.wal = wal
+        self.batch_seconds = batch_seconds
+        self.batch_size = batch_size
+        self.llm = llm
+        self.extractor = DimensionExtractor()
+        self.publisher = ProgressivePublisher(output_dir=output_dir)
+
+        # Normalized mentors; engine decides how a mentor is rescored
+        self.metrics = {}
+        self.engines = {}
+        for mentor_id, data in base_metrics.items():
+            self.metrics[mentor_id] = normalize_mentor(mentor_id, data)
+            engine = (data.get('provenance') or {}).get('engine')
+            self.engines[mentor_id] = engine or ('rules' if 'total_score' in data else 'qwen')
+
+        # Mentors whose pre-ingest record is already in the log
+        self.logged_bases = set()
+
+        self.seq = 0
+        self.pending = []
+        self.pending_since = 0.0
+        self.wakeup = None
+        self.unlogged = []
+        self.logging = False
+        self.closing = False
+        self.task = None
+
+        self.stats = {
+            'accepted': 0, 'rejected': 0, 'batches': 0, 'mentors_rescored': 0,
+            'log_groups': 0, 'max_visibility_lag': 0.0
+        }
+
+    @classmethod
+    def from_sources(cls, metrics_path: str, data_dir: str, wal: WriteAheadLog, **kwargs) -> 'IngestService':
+        """Base metrics from a metrics file if it exists, else from the exported detail files"""
+        if os.path.exists(metrics_path):
+            with open(metrics_path, 'r', encoding='utf-8') as f:
+                base_metrics = json.load(f)
+        else:
+            base_metrics = load_exported_metrics(data_dir)
+        return cls(base_metrics, wal, output_dir=data_dir, **kwargs)
+
+    # Lifecycle
+
+    async def start(self):
+        """Replay the log, apply and publish anything left over and start batching"""
+        published = await asyncio.to_thread(self.wal.published)
+        records = await asyncio.to_thread(lambda: list(self.wal.replay()))
+        submissions = [r for r in records if r.get('type') != 'applied']
+        applied = [r for r in records if r.get('type') == 'applied']
+
+        # Start from the pre-ingest records: an exported base already contains published submissions
+        for entry in applied:
+            for mentor_id, base in entry['bases'].items():
+                if mentor_id not in self.logged_bases:
+                    self.metrics[mentor_id] = base['metric']
+                    self.engines[mentor_id] = base['engine']
+                    self.logged_bases.add(mentor_id)
+
+        # Re-add applied submissions and restore the scores they produced, in log order
+        unapplied = {}
+        unpublished = set()
+        for record in records:
+            if record.get('type') != 'applied':
+                if record['mentorId'] in self.metrics:
+                    unapplied[record['seq']] = record
+                continue
+            for mentor_id, result in record['mentors'].items():
+                mentor_records = [unapplied.pop(seq) for seq in result['seqs'] if seq in unapplied]
+                self._restore(mentor_id, mentor_records, result)
+                if record['seq'] > published:
+                    unpublished.add(mentor_id)
+
+        self.seq = max((r['seq'] for r in submissions), default=0)
+        print(f"✓ Replayed {len(submissions)} logged submissions and {len(applied)} applied batches "
+              f"({len(unapplied)} submissions not yet applied, {len(unpublished)} mentors not yet published)")
+
+        if unpublished:
+            await self._publish(unpublished, max(r['seq'] for r in applied))
+        if unapplied:
+            # Rescored like any new batch (with Qwen when configured)
+            await self._apply([unapplied[seq] for seq in sorted(unapplied)])
+
+        self.wakeup = asyncio.Event()
+        self.task = asyncio.ensure_future(self._batcher())
+
+    async def close(self):
+        """Let a running batch finish, apply whatever is pending and stop batching"""
+        if self.task is not None:
+            self.closing = True
+            self.wakeup.set()
+            await self.task
+            self.task = None
+        if self.pending:
+            batch, self.pending = self.pending, []
+            await self._apply(batch)
+
+    # Intake
+
+    def validate(self, payload: Dict) -> Dict:
+        """
+        Check a submission (EvaluationSubmission.toJSON()) and build its log record
+
+        Raises:
+            SubmissionError: invalid or unknown mentor
+        """
+        if not isinstance(payload, dict):
+            raise SubmissionError(400, 'body must be a JSON object')
+
+        mentor_id = str(payload.get('mentorId') or '').strip()
+        if mentor_id not in self.metrics:
+            raise SubmissionError(404, f"unknown mentor: {mentor_id}")
+
+        comment = str(payload.get('comment') or '').strip()
+        if len(comment) > MAX_COMMENT_CHARS:
+            raise SubmissionError(400, f"comment longer than {MAX_COMMENT_CHARS} characters")
+        if any(pattern.search(comment) for pattern in SPAM_PATTERNS):
+            raise SubmissionError(400, 'comment looks like spam')
+
+        ratings = {}
+        for dim, value in (payload.get('dimensions') or {}).items():
+            if value is None:
+                continue
+            if dim not in DIMENSIONS:
+                raise SubmissionError(400, f"unknown dimension: {dim}")
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 10:
+                raise SubmissionError(400, f"{dim} must be a number between 0 and 10")
+            ratings[dim] = float(value)
+
+        if not comment and not ratings:
+            raise SubmissionError(400, 'a rating or a comment is required')
+
+        return {
+            'mentorId': mentor_id,
+            'comment': comment,
+            'ratings': ratings,
+            'submittedAt': str(payload.get('submittedAt') or ''),
+            'received': time.time()
+        }
+
+    async def submit(self, payload: Dict) -> int:
+        """
+        Accept a submission once it is durable in the log
+
+        Returns:
+            Sequence number of the submission
+        """
+        try:
+            record = self.validate(payload)
+        except SubmissionError:
+            self.stats['rejected'] += 1
+            raise
+
+        # Sequence numbers follow log order because groups are written in arrival order
+        self.seq += 1
+        record['seq'] = self.seq
+        await self._log(record)
+
+        self.stats['accepted'] += 1
+        if not self.pending:
+            self.pending_since = asyncio.get_running_loop().time()
+        self.pending.append(record)
+        self.wakeup.set()
+        return record['seq']
+
+    async def _log(self, record: Dict):
+        """Group commit: records arriving during an fsync share the next one"""
+        done = asyncio.get_running_loop().create_future()
+        self.unlogged.append((record, done))
+        if not self.logging:
+            # Set before the task runs, so later records join this flusher
+            self.logging = True
+            asyncio.ensure_future(self._flush_log())
+        await done
+
+    async def _flush_log(self):
+        try:
+            while self.unlogged:
+                group, self.unlogged = self.unlogged, []
+                try:
+                    await asyncio.to_thread(self.wal.append, [record for record, _ in group])
+                except Exception as e:
+                    for _, done in group:
+                        done.set_exception(e)
+                else:
+                    self.stats['log_groups'] += 1
+                    for _, done in group:
+                        done.set_result(None)
+        finally:
+            self.logging = False
+
+    # Micro-batching
+
+    async def _batcher(self):
+        loop = asyncio.get_running_loop()
+        while not self.closing:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            if self.closing or not self.pending:
+                continue
+
+            # Wait for more submissions until the batch is full or the oldest one is due
+            delay = self.pending_since + self.batch_seconds - loop.time()
+            if len(self.pending) < self.batch_size and delay > 0:
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), delay)
+                    continue
+                except asyncio.TimeoutError:
+                    pass
+
+            batch, self.pending = self.pending, []
+            try:
+                await self._apply(batch)
+            except Exception as e:
+                # Logged records are replayed on the next start
+                print(f"  ⚠️ Applying {len(batch)} submissions failed: {e}")
+
+    async def _apply(self, batch: List[Dict]):
+        """
+        Rescore the mentors of a batch, log the result and publish them
+
+        The applied entry lists, per mentor, the submissions it covers and the
+        resulting scores and engine, plus the pre-ingest record of mentors not
+        logged before; start() rebuilds the state from these without rescoring.
+        """
+        by_mentor = defaultdict(list)
+        for record in batch:
+            by_mentor[record['mentorId']].append(record)
+
+        bases = {
+            mentor_id: {'metric': self.metrics[mentor_id], 'engine': self.engines[mentor_id]}
+            for mentor_id in by_mentor if mentor_id not in self.logged_bases
+        }
+
+        llm_ids = set()
+        if self.llm is not None:
+            llm_ids = await self._rescore_with_llm(by_mentor)
+        for mentor_id, records in by_mentor.items():
+            if mentor_id not in llm_ids:
+                self.rescore_with_rules(mentor_id, records)
+
+        await self._log({
+            'type': 'applied',
+            'seq': batch[-1]['seq'],
+            'mentors': {
+                mentor_id: {
+                    'seqs': [record['seq'] for record in records],
+                    'engine': self.engines[mentor_id],
+                    **{key: self.metrics[mentor_id][key] for key in RESULT_KEYS}
+                }
+                for mentor_id, records in by_mentor.items()
+            },
+            'bases': bases
+        })
+        self.logged_bases.update(bases)
+
+        await self._publish(set(by_mentor), batch[-1]['seq'])
+
+        lag = time.time() - min(record['received'] for record in batch)
+        self.stats['batches'] += 1
+        self.stats['mentors_rescored'] += len(by_mentor)
+        self.stats['max_visibility_lag'] = max(self.stats['max_visibility_lag'], lag)
+        print(f"  📥 Applied {len(batch)} submissions to {len(by_mentor)} mentors "
+              f"({len(llm_ids)} via Qwen), visible {lag:.1f}s after the first was received")
+
+    async def _publish(self, changed: set, seq: int):
+        snapshot = dict(self.metrics)
+        await asyncio.to_thread(self.publisher.publish_changes, snapshot, changed)
+        await asyncio.to_thread(self.wal.checkpoint, seq)
+
+    # Rescoring
+
+    def _add_evaluations(self, mentor: Dict, records: List[Dict]) -> List[Dict]:
+        """Append submissions to a mentor as evaluations (ratings kept for rescoring)"""
+        added = [
+            {
+                'comment': record['comment'],
+                'dimensions': self.extractor.extract_dimensions(record['comment']),
+                'ratings': record['ratings']
+            }
+            for record in records
+        ]
+        mentor['evaluations'] = mentor['evaluations'] + added
+        return added
+
+    def _combine(
+        self,
+        prior: Dict[str, float],
+        prior_weight: int,
+        evaluations: List[Dict],
+        text: bool = True
+    ) -> Dict[str, float]:
+        """
+        Weighted mean per dimension of prior scores and evaluation observations
+
+        Each evaluation contributes the rule-engine sentiment of its dimension
+        texts (if text) and its submitted ratings, one observation each.
+        """
+        observations = defaultdict(list)
+        for dim, score in prior.items():
+            observations[dim].append((score, max(prior_weight, 1)))
+        for evaluation in evaluations:
+            if text:
+                for dim, content in evaluation['dimensions'].items():
+                    observations[dim].append((self.extractor.analyze_sentiment(content), 1))
+            for dim, rating in evaluation.get('ratings', {}).items():
+                observations[dim].append((rating, 1))
+
+        return {
+            dim: round(sum(s * w for s, w in values) / sum(w for _, w in values), 2)
+            for dim, values in observations.items()
+        }
+
+    @staticmethod
+    def _set_scores(mentor: Dict, dimension_scores: Dict[str, float]):
+        scores = list(dimension_scores.values())
+        mentor['dimensionScores'] = dimension_scores
+        mentor['totalScore'] = round(sum(scores) / len(scores), 2) if scores else 5.0
+
+    def _restore(self, mentor_id: str, records: List[Dict], result: Dict):
+        """Re-add logged submissions to a mentor with the scores they were applied with"""
+        mentor = dict(self.metrics[mentor_id])
+        previous_count = mentor['evaluationCount']
+        self._add_evaluations(mentor, records)
+        mentor.update({key: result[key] for key in RESULT_KEYS})
+        mentor['evaluationCount'] = previous_count + len(records)
+        self.metrics[mentor_id] = mentor
+        self.engines[mentor_id] = result['engine']
+
+    def rescore_with_rules(self, mentor_id: str, records: List[Dict]):
+        """
+        Add submissions to a mentor and update its scores with the rule engine
+
+        Rule-scored mentors are rescored over all their evaluations. LLM-scored
+        mentors keep their dimension scores as a prior weighted by their earlier
+        evaluation count, so a few submissions shift them instead of replacing them.
+        """
+        mentor = dict(self.metrics[mentor_id])
+        previous_count = mentor['evaluationCount']
+        added = self._add_evaluations(mentor, records)
+
+        if self.engines[mentor_id] == 'rules':
+            scores = self._combine({}, 0, mentor['evaluations'])
+        else:
+            scores = self._combine(mentor['dimensionScores'], previous_count, added)
+
+        self._set_scores(mentor, scores)
+        mentor['evaluationCount'] = previous_count + len(added)
+        self.metrics[mentor_id] = mentor
+
+    async def _rescore_with_llm(self, by_mentor: Dict[str, List[Dict]]) -> set:
+        """
+        Rescore affected mentors over all their comments with Qwen
+
+        Submitted ratings are blended in as in rescore_with_rules. Results the
+        model did not produce for these comments (similarity-cache reuse, which
+        would match the mentor's own earlier entry, or neutral scores) count as
+        not rescored, so their new comments go through the rule engine.
+
+        Returns:
+            Ids of the mentors rescored this way
+        """
+        mentors = []
+        for mentor_id, records in by_mentor.items():
+            mentor = self.metrics[mentor_id]
+            comments = [e['comment'] for e in mentor['evaluations']] + [r['comment'] for r in records]
+            mentors.append({
+                'id': mentor_id,
+                'name': mentor['name'],
+                'school': mentor['school'],
+                'department': mentor['department'],
+                'comments': [c for c in comments if c]
+            })
+
+        try:
+            results = await self.llm.process_all_batches(mentors, prioritize=False)
+        except Exception as e:
+            print(f"  ⚠️ Qwen rescoring failed, using the rule engine: {e}")
+            return set()
+
+        rescored = set()
+        for mentor_id, records in by_mentor.items():
+            metric = results.get(mentor_id)
+            engine = ((metric or {}).get('provenance') or {}).get('engine', 'qwen')
+            if not metric or engine in ('neutral', 'similarity_cache'):
+                continue
+            mentor = dict(self.metrics[mentor_id])
+            previous_count = mentor['evaluationCount']
+            self._add_evaluations(mentor, records)
+
+            # The model scored every comment; ratings are the only extra observations
+            rated = [e for e in mentor['evaluations'] if e.get('ratings')]
+            self._set_scores(mentor, self._combine(
+                metric['dimensionScores'], metric['evaluationCount'], rated, text=False
+            ))
+            mentor['dimensionReasons'] = metric['dimensionReasons']
+            mentor['overallRecommendation'] = metric['overallRecommendation']
+            mentor['evaluationCount'] = previous_count + len(records)
+
+            self.metrics[mentor_id] = mentor
+            self.engines[mentor_id] = engine
+            rescored.add(mentor_id)
+        return rescored
+
+    def report(self):
+        """Print ingest summary"""
+        s = self.stats
+        print(f"\n📥 Submission ingest:")
+        print(f"   Accepted: {s['accepted']} ({s['rejected']} rejected), log seq {self.seq}, "
+              f"{s['log_groups']} fsync groups")
+        print(f"   Batches applied: {s['batches']} ({s['mentors_rescored']} mentor rescorings)")
+        print(f"   Max visibility lag: {s['max_visibility_lag']:.1f}s")
+
+
+class IngestServer:
+    """Minimal HTTP/1.1 JSON endpoint in front of an IngestService"""
+
+    def __init__(self, service: IngestService):
+        self.service = service
+
+    async def respond(self, method: str, target: str, body: bytes) -> Tuple[int, Optional[Dict]]:
+        """(status, JSON payload) for a request"""
+        path = urlsplit(target).path
+
+        if path == '/api/submissions/status' and method == 'GET':
+            service = self.service
+            return 200, {
+                'seq': service.seq,
+                'pending': len(service.pending),
+                'published': await asyncio.to_thread(service.wal.published),
+                **service.stats
+            }
+
+        if path != '/api/submissions/evaluations':
+            return 404, {'error': f"not found: {path}"}
+        if method == 'OPTIONS':
+            return 204, None
+        if method != 'POST':
+            return 405, {'error': f"method not allowed: {method}"}
+
+        try:
+            payload = json.loads(body.decode('utf-8'))
+        except ValueError:
+            return 400, {'error': 'body must be JSON'}
+        try:
+            seq = await self.service.submit(payload)
+        except SubmissionError as e:
+            return e.status, {'error': e.message}
+        return 202, {'seq': seq, 'status': 'queued', 'batchSeconds': self.service.batch_seconds}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests on one connection until the client closes it"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get('content-length', 0))
+                except ValueError:
+                    break
+                if length > MAX_BODY_BYTES:
+                    status, payload = 413, {'error': f"body larger than {MAX_BODY_BYTES} bytes"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    try:
+                        status, payload = await self.respond(method, target, body)
+                    except Exception as e:
+                        status, payload = 500, {'error': str(e)}
+                    keep_alive = (version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close')
+
+                response_body = b'' if payload is None else json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                response_headers = {
+                    'Content-Type': 'application/json; charset=utf-8',
+                    'Content-Length': str(len(response_body)),
+                    'Cache-Control': 'no-store',
+                    'Access-Control-Allow-Origin': '*',
+                    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+                    'Access-Control-Allow-Headers': 'Content-Type',
+                    'Connection': 'keep-alive' if keep_alive else 'close'
+                }
+                head = f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n" + ''.join(
+                    f"{k}: {v}\r\n" for k, v in response_headers.items()
+                ) + "\r\n"
+
+                writer.write(head.encode('latin-1') + response_body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description='Ingest service for anonymous evaluation submissions')
+    parser.add_argument('--metrics', default='mentor_metrics.json',
+                        help='Base metrics (default: mentor_metrics.json, else the exported detail files)')
+    parser.add_argument('--data-dir', default='docs/data', help='Site data directory to update')
+    parser.add_argument('--wal', default='submissions.wal', help='Write-ahead log (default: submissions.wal)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--batch-seconds', type=float, default=2.0,
+                        help='Longest wait before pending submissions are applied (default: 2)')
+    parser.add_argument('--batch-size', type=int, default=50,
+                        help='Pending submissions that are applied immediately (default: 50)')
+    parser.add_argument('--llm', action='store_true',
+                        help='Rescore affected mentors with Qwen instead of the rule engine')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Evaluation Submission Ingest")
+    print("=" * 60)
+
+    llm = None
+    if args.llm:
+        # Qwen is optional; the rule engine needs neither openai nor an API key
+        from data_processor_qwen_batch import QwenBatchProcessor
+        from qwen_client_pool import QwenClientPool
+
+        client_pool = QwenClientPool.from_environment()
+        api_key = None
+        if client_pool is None:
+            api_key = os.environ.get('DASHSCOPE_API_KEY') or input("请输入您的阿里云API Key (sk-xxx): ").strip()
+            if not api_key.startswith('sk-'):
+                print("❌ Invalid API key!")
+                return
+        # No similarity index: a mentor's grown comment set would match its own old entry
+        llm = QwenBatchProcessor(api_key, client_pool=client_pool, similarity_index=None)
+
+    print("\n📂 Loading mentor data...")
+    service = IngestService.from_sources(
+        args.metrics, args.data_dir, WriteAheadLog(args.wal),
+        batch_seconds=args.batch_seconds, batch_size=args.batch_size, llm=llm
+    )
+    print(f"✓ Loaded {len(service.metrics)} mentors")
+    await service.start()
+
+    server = IngestServer(service)
+    tcp_server = await asyncio.start_server(server.handle_connection, args.host, args.port)
+    print(f"\n🚀 Accepting submissions on http://{args.host}:{args.port}/api/submissions/evaluations")
+    print(f"   Point the site at it with: window.MENTOR_INGEST_BASE = 'http://{args.host}:{args.port}'")
+
+    try:
+        async with tcp_server:
+            await tcp_server.serve_forever()
+    finally:
+        await service.close()
+        service.report()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n👋 Ingest service stopped")
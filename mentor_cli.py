@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unified Command Line for the Mentor Evaluation Pipelines
+- One entry point for every script: python3 mentor_cli.py <command> [args...]
+- A command's module (and pandas / openai behind it) is imported only when
+  that command runs, so --help and light commands start in milliseconds
+- Remaining arguments are passed to the module's own command line; commands
+  whose script takes no arguments (or asks interactively) reject them
+"""
+
+import sys
+import argparse
+import importlib
+
+
+# command -> (module, description)
+COMMANDS = {
+    'process': ('data_processor', 'Rule-based processing of the XLS files (merged_data.csv, mentor_metrics.json)'),
+    'qwen': ('data_processor_qwen', 'Score mentors one by one with Qwen'),
+    'batch': ('data_processor_qwen_batch', 'Score mentors in async batches with Qwen'),
+    'batchjob': ('qwen_batch_jobs', 'Offline Batch-API job files (prepare / ingest / fixture)'),
+    'triage': ('hybrid_triage', 'Rule engine or distilled scorer first, Qwen only for uncertain mentors'),
+    'distill': ('distilled_scorer', 'CPU scorer distilled from Qwen scores (train / evaluate / score)'),
+    'web': ('generate_web_data', 'Generate docs/data from a metrics file'),
+    'serve': ('api_server', 'Read API for the site data (/data/... and /api/mentors queries)'),
+    'ingest': ('ingest_service', 'Accept evaluation submissions and publish them in micro-batches'),
+    'analytics': ('analytics_store', 'Query or rebuild the SQLite analytics store'),
+    'queue': ('batch_queue', 'Distributed scoring queue (work / status)'),
+    'archive': ('qwen_archive', 'Raw Qwen response archive (import / mentor / batch / stats)'),
+    'similarity': ('similarity_cache', 'Build or inspect the similarity index'),
+    'analyze': ('analyze_data', 'Inspect the structure of the XLS files'),
+}
+
+# Commands whose main() reads no command line (fixed file names or interactive prompts)
+NO_ARGUMENTS = {'process', 'qwen', 'batch', 'analyze'}
+
+
+def run(command: str, args: list):
+    """Import a command's module and run its main with the remaining arguments"""
+    module_name, description = COMMANDS[command]
+    if command in NO_ARGUMENTS and args:
+        if args in (['-h'], ['--help']):
+            print(f"usage: mentor_cli.py {command}\n\n{description}. Takes no arguments.")
+            return
+        sys.exit(f"mentor_cli.py {command}: takes no arguments (got: {' '.join(args)})")
+    module = importlib.import_module(module_name)
+    # The module's own argparse sees itself as the program
+    sys.argv = [f"{module_name}.py", *args]
+    result = module.main()
+    # Async mains (batch, triage, serve) return a coroutine
+    if hasattr(result, '__await__'):
+        import asyncio
+
+        try:
+            asyncio.run(result)
+        except KeyboardInterrupt:
+            pass
+
+
+def main():
+    """Command line interface"""
+    parser = argparse.ArgumentParser(
+        description='Mentor evaluation pipelines',
+        epilog="Run 'mentor_cli.py <command> --help' for a command's own options."
+    )
+    sub = parser.add_subparsers(dest='command', required=True, metavar='command')
+    for command, (_, description) in COMMANDS.items():
+        sub.add_parser(command, help=description, add_help=False)
+
+    args, rest = parser.parse_known_args()
+    run(args.command, rest)
+
+
+if __name__ == "__main__":
+    main()
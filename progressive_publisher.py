@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Priority scheduling and progressive publishing for long Qwen runs
+- Orders mentors by expected page traffic (evaluation count, school size)
+  so the most viewed mentors are scored first
+- Streams completed batches into the web export (docs/data) while the run
+  is still going, instead of only after the last batch
+"""
+
+import os
+import json
+import math
+import time
+import asyncio
+from collections import Counter
+from typing import Dict, List
+
+from generate_web_data import (
+    FRAME_COLUMNS,
+    HISTOGRAM_BINS,
+    MENTOR_LIST_FORMAT,
+    QUANTILES,
+    SCORE_RANGE,
+    normalize_mentor,
+    build_frame,
+    group_by,
+    generate_school_data,
+    generate_mentor_list_by_school,
+    encode_mentor_lists,
+    summarize_rows,
+    row_digest,
+    data_version,
+    generate_metadata,
+    generate_mentor_details,
+    generate_precache_manifest
+)
+
+
+def expected_traffic(mentor: Dict, school_sizes: Dict[str, int]) -> float:
+    """
+    Traffic estimate used as scheduling priority
+
+    Mentor lists are sorted by evaluation count and the school list by mentor
+    count, so heavily reviewed mentors of large schools get the most views.
+    """
+    return len(mentor['comments']) * math.log2(1 + school_sizes.get(mentor['school'], 1))
+
+
+def prioritize_mentors(mentors: List[Dict], school_sizes: Dict[str, int] = None) -> List[Dict]:
+    """
+    Mentors in descending expected traffic (stable, input order on ties)
+
+    Args:
+        mentors: Mentor dicts with school and comments
+        school_sizes: Mentors per school (default: counted from mentors)
+    """
+    if school_sizes is None:
+        school_sizes = Counter(m['school'] for m in mentors)
+    return sorted(mentors, key=lambda m: expected_traffic(m, school_sizes), reverse=True)
+
+
+def write_text(path: str, text: str):
+    """Write a file via a temporary file so the site never serves a partial file"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def write_json(path: str, data, **kwargs):
+    """Write JSON atomically (serialized in one call: the C encoder, unlike json.dump)"""
+    write_text(path, json.dumps(data, ensure_ascii=False, **kwargs))
+
+
+def compact_object(members: Dict[str, str]) -> str:
+    """Compact JSON object from already serialized member values"""
+    return '{' + ','.join(
+        f"{json.dumps(key, ensure_ascii=False)}:{value}" for key, value in members.items()
+    ) + '}'
+
+
+def compact_json(data) -> str:
+    """JSON with separators=(',', ':'), as the index files are written"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+class ExportIndex:
+    """
+    Index artifacts of the web export, kept per school
+
+    Each school's mentor list block and distribution summary are cached
+    serialized, so updating a few mentors recomputes only their schools and
+    rehashes only their rows; the index files are spliced from the cached
+    blocks. The output is identical to a full export of the same metrics.
+    """
+
+    def __init__(self, metrics: Dict):
+        self.frame = build_frame(metrics)
+        self.groups = group_by(self.frame, 'school')
+        self.row_of = {mentor_id: i for i, mentor_id in enumerate(self.frame['id'])}
+        self.digests = {mentor_id: row_digest(self.frame, i) for mentor_id, i in self.row_of.items()}
+        self.school_entries = {}
+        self.list_blocks = {}
+        self.distribution_blocks = {}
+        self._refresh(self.groups)
+
+    def covers(self, metrics: Dict, changed: set) -> bool:
+        """Whether update() can apply: same mentors, and no changed mentor moved school"""
+        if len(metrics) != len(self.row_of) or not all(m in self.row_of for m in metrics):
+            return False
+        schools = self.frame['school']
+        return all(
+            normalize_mentor(m, metrics[m])['school'] == schools[self.row_of[m]] for m in changed
+        )
+
+    def update(self, metrics: Dict, changed: set) -> List[int]:
+        """
+        Replace changed mentors' rows and refresh their schools
+
+        Returns:
+            Frame rows of the changed mentors
+        """
+        rows = sorted(self.row_of[m] for m in changed)
+        for i in rows:
+            detail = normalize_mentor(self.frame['id'][i], metrics[self.frame['id'][i]])
+            for column in FRAME_COLUMNS:
+                self.frame[column][i] = detail[column]
+            self.digests[detail['id']] = row_digest(self.frame, i)
+        affected = {self.frame['school'][i] for i in rows}
+        self._refresh({school: self.groups[school] for school in affected})
+        return rows
+
+    def _refresh(self, groups: Dict[str, List[int]]):
+        lists = encode_mentor_lists(generate_mentor_list_by_school(self.frame, groups))['schools']
+        for school, block in lists.items():
+            self.list_blocks[school] = compact_json(block)
+        for school, rows in groups.items():
+            self.distribution_blocks[school] = compact_json(summarize_rows(self.frame, rows))
+        for entry in generate_school_data(self.frame, groups):
+            self.school_entries[entry['name']] = entry
+
+    def schools(self) -> List[Dict]:
+        """schools.json content, as generate_school_data() orders it"""
+        schools = [self.school_entries[school] for school in self.groups]
+        schools.sort(key=lambda x: x['mentorCount'], reverse=True)
+        return schools
+
+    def mentor_lists(self) -> str:
+        """Serialized mentors_by_school.json"""
+        return compact_object({
+            'format': compact_json(MENTOR_LIST_FORMAT),
+            'schools': compact_object({school: self.list_blocks[school] for school in self.groups})
+        })
+
+    def distributions(self) -> str:
+        """Serialized distributions.json (the global summary is always recomputed)"""
+        return compact_object({
+            'bins': compact_json({'min': SCORE_RANGE[0], 'max': SCORE_RANGE[1], 'count': HISTOGRAM_BINS}),
+            'quantiles': compact_json(QUANTILES),
+            'global': compact_json(summarize_rows(self.frame, range(len(self.frame['id'])))),
+            'schools': compact_object({school: self.distribution_blocks[school] for school in self.groups})
+        })
+
+    def metadata(self, schools: List[Dict]) -> Dict:
+        return generate_metadata(self.frame, schools, data_version(self.frame, self.digests))
+
+
+class ProgressivePublisher:
+    """Incrementally refresh the web export with newly scored mentors"""
+
+    def __init__(
+        self,
+        base_metrics: Dict = None,
+        output_dir: str = 'docs/data',
+        interval: float = 120.0
+    ):
+        """
+        Args:
+            base_metrics: Previously exported metrics; mentors not rescored yet
+                          keep these values in the published site
+            output_dir: Data directory of the site
+            interval: Minimum seconds between two publishes
+        """
+        self.metrics = dict(base_metrics or {})
+        self.output_dir = output_dir
+        self.interval = interval
+
+        self.index = None
+        self.pending = set()
+        self.last_publish = 0.0
+        self.task = None
+        self.stats = {'publishes': 0, 'mentors_published': 0, 'seconds': 0.0}
+
+    @classmethod
+    def from_metrics_file(cls, path: str, **kwargs) -> 'ProgressivePublisher':
+        """Start from an existing metrics file (e.g. mentor_metrics.json), if present"""
+        base_metrics = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                base_metrics = json.load(f)
+        return cls(base_metrics, **kwargs)
+
+    def submit(self, metrics: Dict):
+        """
+        Record newly scored mentors and publish in the background when due
+
+        Must be called from the event loop; never blocks on disk I/O.
+        """
+        if not metrics:
+            return
+        self.metrics.update(metrics)
+        self.pending.update(metrics)
+
+        due = time.monotonic() - self.last_publish >= self.interval
+        if due and (self.task is None or self.task.done()):
+            self.task = asyncio.ensure_future(self._publish_pending())
+
+    async def flush(self):
+        """Wait for a running publish and publish whatever is still pending"""
+        if self.task is not None:
+            await self.task
+        if self.pending:
+            await self._publish_pending()
+
+    async def _publish_pending(self):
+        # Snapshot on the loop thread; submit() may keep mutating while the export runs
+        snapshot = dict(self.metrics)
+        changed = self.pending
+        self.pending = set()
+        self.last_publish = time.monotonic()
+        try:
+            await asyncio.to_thread(self.publish_changes, snapshot, changed)
+        except Exception as e:
+            print(f"  ⚠️ Progressive publish failed: {e}")
+            self.pending |= changed
+
+    def publish(self, metrics: Dict, changed: set):
+        """
+        Write index files for all mentors and detail files for changed mentors
+
+        Args:
+            metrics: Full metrics snapshot (base metrics plus scored mentors)
+            changed: Mentor ids whose detail files must be rewritten
+        """
+        start = time.time()
+        self.index = ExportIndex(metrics)
+        rows = [i for i, mentor_id in enumerate(self.index.frame['id']) if mentor_id in changed]
+        self._write(rows, start)
+
+    def publish_changes(self, metrics: Dict, changed: set):
+        """
+        Like publish(), but only recompute what the changed mentors touch
+
+        Reuses the index of the previous publish: only the changed mentors'
+        schools are recomputed and only their rows rehashed. Falls back to a
+        full publish() on the first call or when mentors were added, removed
+        or moved to another school.
+        """
+        if self.index is None or not self.index.covers(metrics, changed):
+            self.publish(metrics, changed)
+            return
+        start = time.time()
+        self._write(self.index.update(metrics, changed), start)
+
+    def _write(self, rows: List[int], start: float):
+        index = self.index
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        # Details first, so index entries never point at files that are not written yet
+        generate_mentor_details(index.frame, self.output_dir, rows)
+
+        schools = index.schools()
+        write_json(os.path.join(self.output_dir, 'schools.json'), schools, indent=2)
+        write_text(os.path.join(self.output_dir, 'mentors_by_school.json'), index.mentor_lists())
+        write_text(os.path.join(self.output_dir, 'distributions.json'), index.distributions())
+
+        # A new data version makes browsers drop cached files of this run's earlier publishes
+        metadata = index.metadata(schools)
+        write_json(os.path.join(self.output_dir, 'metadata.json'), metadata, indent=2)
+
+        site_dir = os.path.dirname(self.output_dir)
+        write_json(
+            os.path.join(site_dir, 'precache-manifest.json'),
+            generate_precache_manifest(site_dir, metadata['version']), indent=2
+        )
+
+        elapsed = time.time() - start
+        self.stats['publishes'] += 1
+        self.stats['mentors_published'] += len(rows)
+        self.stats['seconds'] += elapsed
+        print(f"  📰 Published {len(rows)} refreshed mentors ({len(index.frame['id'])} total) "
+              f"to {self.output_dir} in {elapsed:.1f}s")
+
+    def report(self):
+        """Print publishing summary"""
+        s = self.stats
+        print(f"\n📰 Progressive publishing:")
+        print(f"   Publishes: {s['publishes']} ({s['seconds']:.1f}s total)")
+        print(f"   Mentor detail files refreshed: {s['mentors_published']}")
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compressed Archive of Raw Qwen Batch Responses
+- Append-only SQLite file; each batch record is stored once as compact,
+  zlib-compressed JSON (about a fifth of the pretty-printed files)
+- Indexed by mentor id, mentor name, batch id, model and prompt version,
+  so one mentor's raw output is an indexed lookup plus one decompression
+- Imports the legacy qwen_outputs/batch_*.json directory (which names
+  mentors only by name; ids are resolved from a metrics file when unique)
+- CLI: import, mentor, batch, stats
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import zlib
+import sqlite3
+import hashlib
+import argparse
+import threading
+from typing import Dict, List, Optional
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS batch_response (
+    id INTEGER PRIMARY KEY,
+    batch_id INTEGER,
+    model TEXT,
+    prompt_version TEXT,
+    run TEXT,
+    created REAL NOT NULL,
+    source TEXT UNIQUE,
+    record BLOB NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS mentor_response (
+    response_id INTEGER NOT NULL REFERENCES batch_response(id),
+    mentor_index INTEGER NOT NULL,
+    mentor_id TEXT,
+    name TEXT,
+    has_result INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_batch_response_batch ON batch_response(batch_id);
+CREATE INDEX IF NOT EXISTS idx_batch_response_prompt ON batch_response(model, prompt_version);
+CREATE INDEX IF NOT EXISTS idx_mentor_response_id ON mentor_response(mentor_id);
+CREATE INDEX IF NOT EXISTS idx_mentor_response_name ON mentor_response(name);
+CREATE INDEX IF NOT EXISTS idx_mentor_response_response ON mentor_response(response_id, mentor_index);
+"""
+
+
+def prompt_version(prompt: str) -> str:
+    """Short content hash identifying a prompt template"""
+    return hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:10]
+
+
+def pack(data) -> bytes:
+    """Compact JSON, zlib-compressed"""
+    return zlib.compress(json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 6)
+
+
+def unpack(blob: bytes):
+    return json.loads(zlib.decompress(blob))
+
+
+def _results_by_index(record: Dict) -> Dict[int, Dict]:
+    """Mentor objects of a batch response keyed by their 1-based mentor_index"""
+    results = {}
+    for result in (record.get('response') or {}).get('mentors', []):
+        index = result.get('mentor_index')
+        if isinstance(index, int):
+            results[index] = result
+    return results
+
+
+class QwenArchive:
+    """Append-only store of raw batch responses"""
+
+    def __init__(self, path: str = 'qwen_outputs.db'):
+        """
+        Args:
+            path: SQLite archive file
+        """
+        self.path = path
+        # Appends come from executor threads of the async pipeline
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(
+        self,
+        record: Dict,
+        model: str = None,
+        prompt_version: str = None,
+        run: str = None,
+        source: str = None
+    ) -> Optional[int]:
+        """
+        Archive one batch record
+
+        Args:
+            record: Batch output ({'batch_id', 'mentors', 'mentor_ids', 'usage',
+                    'parse_stats', 'response': {'mentors': [...]}})
+            model: Model name
+            prompt_version: Prompt template version (see prompt_version())
+            run: Run label (e.g. start time of the run)
+            source: Unique origin of the record; a record whose source is
+                    already archived is skipped
+
+        Returns:
+            Row id of the archived record, or None if it was a duplicate
+        """
+        names = record.get('mentors') or []
+        mentor_ids = record.get('mentor_ids') or []
+        answered = set(_results_by_index(record))
+
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO batch_response "
+                "(batch_id, model, prompt_version, run, created, source, record) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (record.get('batch_id'), model, prompt_version, run, time.time(), source, pack(record))
+            )
+            if cursor.rowcount != 1:
+                return None
+            response_id = cursor.lastrowid
+
+            rows = []
+            for index in range(1, max([len(names), *answered], default=0) + 1):
+                name = names[index - 1] if index <= len(names) else None
+                mentor_id = mentor_ids[index - 1] if index <= len(mentor_ids) else None
+                rows.append((response_id, index, mentor_id, name, int(index in answered)))
+            self.conn.executemany("INSERT INTO mentor_response VALUES (?, ?, ?, ?, ?)", rows)
+
+        return response_id
+
+    def mentor(self, key: str, by: str = 'id') -> List[Dict]:
+        """
+        Raw response objects of one mentor, newest first
+
+        Args:
+            key: Mentor id or name
+            by: 'id' or 'name'
+        """
+        column = {'id': 'm.mentor_id', 'name': 'm.name'}[by]
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT b.id, b.batch_id, b.model, b.prompt_version, b.run, b.created, "
+                f"m.mentor_index, m.mentor_id, m.name, b.record "
+                f"FROM mentor_response m JOIN batch_response b ON b.id = m.response_id "
+                f"WHERE {column} = ? ORDER BY b.created DESC, b.id DESC",
+                (key,)
+            ).fetchall()
+        return [
+            {
+                'responseId': response_id, 'batchId': batch_id, 'model': model,
+                'promptVersion': version, 'run': run, 'created': created,
+                'mentorIndex': index, 'mentorId': mentor_id, 'name': name,
+                'result': _results_by_index(unpack(record)).get(index)
+            }
+            for response_id, batch_id, model, version, run, created, index, mentor_id, name, record in rows
+        ]
+
+    def batch(self, batch_id: int, model: str = None, prompt_version: str = None) -> List[Dict]:
+        """Archived records of a batch id (all runs unless filtered), newest first"""
+        query = "SELECT id, model, prompt_version, run, created, record FROM batch_response WHERE batch_id = ?"
+        params = [batch_id]
+        if model:
+            query += " AND model = ?"
+            params.append(model)
+        if prompt_version:
+            query += " AND prompt_version = ?"
+            params.append(prompt_version)
+        with self.lock:
+            rows = self.conn.execute(query + " ORDER BY created DESC, id DESC", params).fetchall()
+        return [
+            {'responseId': response_id, 'model': model, 'promptVersion': version,
+             'run': run, 'created': created, 'record': unpack(record)}
+            for response_id, model, version, run, created, record in rows
+        ]
+
+    def stats(self) -> Dict:
+        """Record counts, distinct keys and archive size"""
+        with self.lock:
+            records, batches = self.conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT batch_id) FROM batch_response"
+            ).fetchone()
+            mentors, with_id, with_result = self.conn.execute(
+                "SELECT COUNT(*), COUNT(mentor_id), COALESCE(SUM(has_result), 0) FROM mentor_response"
+            ).fetchone()
+            versions = self.conn.execute(
+                "SELECT model, prompt_version, COUNT(*) FROM batch_response "
+                "GROUP BY model, prompt_version ORDER BY 3 DESC"
+            ).fetchall()
+        return {
+            'records': records,
+            'batches': batches,
+            'mentorEntries': mentors,
+            'entriesWithId': with_id,
+            'entriesWithResult': with_result,
+            'versions': versions,
+            'bytes': os.path.getsize(self.path)
+        }
+
+    def import_directory(
+        self,
+        directory: str = 'qwen_outputs',
+        metrics: Dict = None,
+        model: str = None,
+        prompt_version: str = None
+    ) -> Dict[str, int]:
+        """
+        Import batch_*.json files
+
+        Files without mentor_ids get ids resolved from metrics by name
+        (only when the name belongs to exactly one mentor there).
+
+        Returns:
+            {'files', 'imported', 'skipped', 'resolved_ids'}
+        """
+        ids_by_name = {}
+        for mentor_id, data in (metrics or {}).items():
+            ids_by_name.setdefault(str(data.get('name')), []).append(mentor_id)
+
+        counts = {'files': 0, 'imported': 0, 'skipped': 0, 'resolved_ids': 0}
+        for path in sorted(glob.glob(os.path.join(directory, 'batch_*.json'))):
+            counts['files'] += 1
+            with open(path, 'rb') as f:
+                raw = f.read()
+            record = json.loads(raw)
+
+            if 'mentor_ids' not in record and ids_by_name:
+                mentor_ids = []
+                for name in record.get('mentors', []):
+                    candidates = ids_by_name.get(str(name), [])
+                    mentor_ids.append(candidates[0] if len(candidates) == 1 else None)
+                record['mentor_ids'] = mentor_ids
+                counts['resolved_ids'] += sum(1 for mid in mentor_ids if mid)
+
+            source = f"{os.path.basename(path)}:{hashlib.sha1(raw).hexdigest()[:16]}"
+            if self.append(record, model=model, prompt_version=prompt_version, source=source) is None:
+                counts['skipped'] += 1
+            else:
+                counts['imported'] += 1
+
+        return counts
+
+
+def _print_json(data):
+    print(json.dumps(data, ensure_ascii=False, indent=2))
+
+
+def main():
+    """Command line interface"""
+    parser = argparse.ArgumentParser(description='Archive of raw Qwen batch responses')
+    parser.add_argument('--db', default='qwen_outputs.db', help='Archive file (default: qwen_outputs.db)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    imp = sub.add_parser('import', help='Import a qwen_outputs/ directory')
+    imp.add_argument('directory', nargs='?', default='qwen_outputs')
+    imp.add_argument('--metrics', help='Metrics JSON used to resolve mentor names to ids')
+    imp.add_argument('--model', default='qwen-plus')
+    imp.add_argument('--prompt-version', default='legacy')
+
+    mentor = sub.add_parser('mentor', help='Raw responses of one mentor')
+    mentor.add_argument('key', help='Mentor id (or name with --name)')
+    mentor.add_argument('--name', action='store_true', help='Look up by mentor name')
+
+    batch = sub.add_parser('batch', help='Archived records of one batch id')
+    batch.add_argument('batch_id', type=int)
+    batch.add_argument('--model')
+    batch.add_argument('--prompt-version')
+
+    sub.add_parser('stats', help='Archive summary')
+
+    args = parser.parse_args()
+
+    with QwenArchive(args.db) as archive:
+        if args.command == 'import':
+            metrics = None
+            if args.metrics:
+                with open(args.metrics, 'r', encoding='utf-8') as f:
+                    metrics = json.load(f)
+            start = time.time()
+            counts = archive.import_directory(args.directory, metrics, args.model, args.prompt_version)
+            print(f"✓ Imported {counts['imported']}/{counts['files']} files "
+                  f"({counts['skipped']} already archived, {counts['resolved_ids']} mentor ids resolved) "
+                  f"in {time.time() - start:.1f}s")
+        elif args.command == 'mentor':
+            results = archive.mentor(args.key, by='name' if args.name else 'id')
+            if not results:
+                print(f"No archived responses for {args.key}", file=sys.stderr)
+                sys.exit(1)
+            _print_json(results)
+        elif args.command == 'batch':
+            results = archive.batch(args.batch_id, args.model, args.prompt_version)
+            if not results:
+                print(f"No archived records for batch {args.batch_id}", file=sys.stderr)
+                sys.exit(1)
+            _print_json(results)
+        else:
+            s = archive.stats()
+            print(f"Records: {s['records']} ({s['batches']} distinct batch ids), {s['bytes'] / 1024:.0f} KB")
+            print(f"Mentor entries: {s['mentorEntries']} ({s['entriesWithId']} with id, "
+                  f"{s['entriesWithResult']} with a response object)")
+            for model, version, count in s['versions']:
+                print(f"  {model or '-'} / {version or '-'}: {count} records")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline Batch-API Jobs for Qwen Scoring
+- prepare: writes every mentor batch prompt as one OpenAI-Batch-compatible
+  JSONL line (POST /v1/chat/completions) with a stable custom_id, plus a
+  manifest mapping each custom_id to the mentors of its batch
+- ingest: reads the provider's results file(s), parses every response with
+  the same validation as the streaming path and maps mentor objects back to
+  mentor ids via QwenBatchProcessor.aggregate_batch; failed requests are
+  written to retry.jsonl for resubmission
+- fixture: builds a local results file from the requests, for testing the
+  ingest path without the provider
+
+Upload requests.jsonl to the provider's batch endpoint (DashScope supports the
+OpenAI Batch file format), then ingest the downloaded output / error files.
+"""
+
+import os
+import json
+import time
+import hashlib
+import argparse
+from typing import Dict, List, Optional
+
+from comment_preprocessor import CommentPreprocessor
+from data_processor_qwen_batch import (
+    BATCH_SYSTEM_PROMPT,
+    MAX_PROMPT_COMMENTS,
+    EnhancedMentorDataProcessor,
+    QwenBatchProcessor
+)
+from qwen_archive import prompt_version
+from response_parser import DIMENSIONS, MentorStreamParser
+
+
+JOB_DIR = 'qwen_batch_jobs'
+REQUESTS_FILE = 'requests.jsonl'
+MANIFEST_FILE = 'manifest.json'
+RETRY_FILE = 'retry.jsonl'
+
+BATCH_ENDPOINT = '/v1/chat/completions'
+
+
+def custom_id(batch_id: int, mentors: List[Dict], version: str) -> str:
+    """Stable request id: batch position plus a hash of the prompt version and mentor ids"""
+    digest = hashlib.sha1(version.encode('utf-8'))
+    for mentor in mentors:
+        digest.update(f"\n{mentor['id']}".encode('utf-8'))
+    return f"mentor-batch-{batch_id:05d}-{digest.hexdigest()[:10]}"
+
+
+def write_jsonl(path: str, lines: List[Dict]):
+    """Write JSON lines via a temporary file"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for line in lines:
+            f.write(json.dumps(line, ensure_ascii=False, separators=(',', ':')) + '\n')
+    os.replace(tmp_path, path)
+
+
+def read_jsonl(path: str) -> List[Dict]:
+    """JSON lines of a file; blank lines are skipped"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class BatchJob:
+    """One offline batch job: request file, manifest and ingestion of results"""
+
+    def __init__(self, processor: QwenBatchProcessor, directory: str = JOB_DIR):
+        """
+        Args:
+            processor: Builds prompts and aggregates results (no client needed)
+            directory: Job directory holding requests.jsonl, manifest.json and retry.jsonl
+        """
+        self.processor = processor
+        self.directory = directory
+        self.stats = {
+            'requests': 0, 'succeeded': 0, 'failed': 0, 'unknown': 0, 'duplicates': 0,
+            'mentors_scored': 0, 'mentors_missing': 0, 'prompt_tokens': 0, 'completion_tokens': 0
+        }
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def prepare(self, mentors: List[Dict], batch_size: int = 20) -> Dict:
+        """
+        Write the request file and manifest for a set of mentors
+
+        Mentors without usable text get neutral scores and near-identical
+        comment sets reuse scores (similarity cache) as in an interactive run;
+        neither produces a request. Comments beyond MAX_PROMPT_COMMENTS are not
+        sent (hierarchical mode needs interactive calls).
+
+        Returns:
+            The manifest
+        """
+        processor = self.processor
+        processor.preprocessor.reset_stats()
+        usable, empty = processor.preprocessor.prepare_mentors(mentors)
+
+        reused, followers = {}, {}
+        if processor.similarity_cache:
+            usable, reused, followers = processor.similarity_cache.partition(usable)
+
+        long_count = sum(1 for m in usable if len(m['prompt_comments']) > MAX_PROMPT_COMMENTS)
+        if long_count:
+            print(f"⚠️ {long_count} mentors have more than {MAX_PROMPT_COMMENTS} comments; "
+                  f"only the first {MAX_PROMPT_COMMENTS} are sent")
+
+        version = prompt_version(BATCH_SYSTEM_PROMPT)
+        batches = {}
+        lines = []
+        for batch_id, start in enumerate(range(0, len(usable), batch_size)):
+            batch = usable[start:start + batch_size]
+            request_id = custom_id(batch_id, batch, version)
+            batches[request_id] = {'batch_id': batch_id, 'mentors': batch}
+            lines.append({
+                'custom_id': request_id,
+                'method': 'POST',
+                'url': BATCH_ENDPOINT,
+                'body': processor.request_params(processor.create_batch_prompt(batch))
+            })
+
+        manifest = {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'model': processor.model,
+            'promptVersion': version,
+            'batchSize': batch_size,
+            'batches': batches,
+            'neutral': empty,
+            'reused': reused,
+            'followers': {
+                mentor_id: [mentor, leader_id, similarity]
+                for mentor_id, (mentor, leader_id, similarity) in followers.items()
+            }
+        }
+
+        os.makedirs(self.directory, exist_ok=True)
+        write_jsonl(self.path(REQUESTS_FILE), lines)
+        with open(self.path(MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+
+        self.stats['requests'] = len(lines)
+        return manifest
+
+    def load_manifest(self) -> Dict:
+        with open(self.path(MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def response_text(line: Dict) -> str:
+        """
+        Message content of a successful result line
+
+        Raises:
+            ValueError: The request failed or the body has no message content
+        """
+        if line.get('error'):
+            raise ValueError(f"request error: {line['error']}")
+        response = line.get('response') or {}
+        if response.get('status_code') != 200:
+            body = response.get('body') or {}
+            raise ValueError(f"HTTP {response.get('status_code')}: {body.get('error', body)}")
+        try:
+            return response['body']['choices'][0]['message']['content'] or ''
+        except (KeyError, IndexError, TypeError):
+            raise ValueError('response body has no message content') from None
+
+    def ingest(self, result_files: List[str]) -> Dict:
+        """
+        Build metrics from the provider's result files
+
+        Several files may be given (output, error and retry outputs); a
+        custom_id that already succeeded is not applied again. Requests
+        without a successful result are written to retry.jsonl.
+
+        Returns:
+            Metrics dict keyed by mentor id
+        """
+        processor = self.processor
+        manifest = self.load_manifest()
+        batches = manifest['batches']
+        run = f"batch-job:{manifest['created']}"
+
+        metrics = {
+            mentor['id']: CommentPreprocessor.neutral_metric(mentor, processor.dimensions)
+            for mentor in manifest['neutral']
+        }
+        metrics.update(manifest['reused'])
+
+        succeeded = set()
+        errors = {}
+        for path in result_files:
+            for line in read_jsonl(path):
+                request_id = line.get('custom_id')
+                if request_id not in batches:
+                    self.stats['unknown'] += 1
+                    continue
+                if request_id in succeeded:
+                    self.stats['duplicates'] += 1
+                    continue
+
+                batch = batches[request_id]['mentors']
+                parser = MentorStreamParser(len(batch), processor.dimensions)
+                try:
+                    parser.feed(self.response_text(line))
+                    parser.close()
+                    if not parser.mentors:
+                        raise ValueError('no valid mentor objects in response')
+                except ValueError as e:
+                    errors[request_id] = str(e)
+                    continue
+
+                succeeded.add(request_id)
+                errors.pop(request_id, None)
+                result = {'mentors': parser.mentors}
+                metrics.update(processor.aggregate_batch(batch, result))
+
+                usage = ((line.get('response') or {}).get('body') or {}).get('usage') or {}
+                self.stats['prompt_tokens'] += usage.get('prompt_tokens', 0)
+                self.stats['completion_tokens'] += usage.get('completion_tokens', 0)
+                missing = len(batch) - len(parser.mentors)
+                self.stats['mentors_scored'] += len(parser.mentors)
+                self.stats['mentors_missing'] += missing
+
+                if processor.archive:
+                    processor.archive.append({
+                        'batch_id': batches[request_id]['batch_id'],
+                        'mentors': [m['name'] for m in batch],
+                        'mentor_ids': [m['id'] for m in batch],
+                        'parse_stats': parser.stats,
+                        'usage': usage,
+                        'response': result
+                    }, model=manifest['model'], prompt_version=manifest['promptVersion'],
+                        run=run, source=f"{run}/{request_id}")
+
+        # Near-identical mentors copy their leader's score, as after an interactive run
+        if processor.similarity_cache:
+            followers = {
+                mentor_id: (mentor, leader_id, similarity)
+                for mentor_id, (mentor, leader_id, similarity) in manifest['followers'].items()
+            }
+            metrics.update(processor.similarity_cache.resolve(followers, metrics))
+            scored = [m for request_id in succeeded for m in batches[request_id]['mentors']]
+            processor.similarity_cache.record(scored, metrics)
+            processor.similarity_cache.save()
+
+        self.stats['requests'] = len(batches)
+        self.stats['succeeded'] = len(succeeded)
+        self.stats['failed'] = len(batches) - len(succeeded)
+
+        retry_path = self.path(RETRY_FILE)
+        if self.stats['failed']:
+            retry = [
+                line for line in read_jsonl(self.path(REQUESTS_FILE))
+                if line['custom_id'] not in succeeded
+            ]
+            write_jsonl(retry_path, retry)
+            for request_id, error in list(errors.items())[:5]:
+                print(f"  ✗ {request_id}: {error}")
+        elif os.path.exists(retry_path):
+            os.remove(retry_path)
+
+        return metrics
+
+    def report(self):
+        """Print request and mentor statistics of the last prepare / ingest"""
+        s = self.stats
+        print(f"\n📮 Batch job ({self.directory}):")
+        print(f"   Requests: {s['requests']}, succeeded: {s['succeeded']}, failed: {s['failed']}")
+        if s['unknown'] or s['duplicates']:
+            print(f"   Ignored result lines: {s['unknown']} unknown custom_id, {s['duplicates']} already applied")
+        print(f"   Mentors scored: {s['mentors_scored']}, missing from responses: {s['mentors_missing']}")
+        print(f"   Tokens: {s['prompt_tokens']} prompt, {s['completion_tokens']} completion")
+        if s['failed']:
+            print(f"   Resubmit {self.path(RETRY_FILE)} and ingest its results together with these")
+
+
+def build_fixture(directory: str = JOB_DIR, fail_every: int = 0) -> List[Dict]:
+    """
+    Result lines for every request of a job, in the provider's output format
+
+    Every mentor gets neutral scores. With fail_every=N every Nth request
+    fails with HTTP 500, to exercise the retry path.
+    """
+    with open(os.path.join(directory, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        batches = json.load(f)['batches']
+
+    lines = []
+    for n, request in enumerate(read_jsonl(os.path.join(directory, REQUESTS_FILE)), 1):
+        request_id = request['custom_id']
+        if fail_every and n % fail_every == 0:
+            lines.append({
+                'id': f"batch_req_{n:05d}",
+                'custom_id': request_id,
+                'response': {'status_code': 500, 'request_id': f"fixture-{n}",
+                             'body': {'error': {'message': 'fixture failure'}}},
+                'error': None
+            })
+            continue
+
+        mentors = [
+            {
+                'mentor_index': index,
+                'name': mentor['name'],
+                **{dim: {'score': 5, 'reason': '未提及'} for dim in DIMENSIONS},
+                'overall_recommendation': '测试数据'
+            }
+            for index, mentor in enumerate(batches[request_id]['mentors'], 1)
+        ]
+        content = json.dumps({'mentors': mentors}, ensure_ascii=False)
+        lines.append({
+            'id': f"batch_req_{n:05d}",
+            'custom_id': request_id,
+            'response': {
+                'status_code': 200,
+                'request_id': f"fixture-{n}",
+                'body': {
+                    'object': 'chat.completion',
+                    'model': request['body']['model'],
+                    'choices': [{'index': 0, 'finish_reason': 'stop',
+                                 'message': {'role': 'assistant', 'content': content}}],
+                    'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+                }
+            },
+            'error': None
+        })
+    return lines
+
+
+def load_mentors(metrics_file: Optional[str], sample_size: Optional[int]):
+    """Mentors from a metrics file, or from the XLS files; returns (mentors, data processor)"""
+    processor = EnhancedMentorDataProcessor(None)
+    if not metrics_file:
+        processor.load_data('导师信息.xls', '评价信息.xls')
+        return processor.prepare_mentors_data(sample_size), processor
+
+    with open(metrics_file, 'r', encoding='utf-8') as f:
+        metrics = json.load(f)
+    mentors = [
+        {
+            'id': data.get('id', mentor_id),
+            'name': data.get('name', '未知'),
+            'school': data.get('school', '未知'),
+            'department': data.get('department', '未知'),
+            'comments': [e.get('comment', '') for e in data.get('evaluations', [])]
+        }
+        for mentor_id, data in metrics.items()
+    ]
+    return mentors[:sample_size] if sample_size else mentors, processor
+
+
+def main():
+    """Command line interface"""
+    parser = argparse.ArgumentParser(description='Offline Batch-API jobs for Qwen scoring')
+    parser.add_argument('--dir', default=JOB_DIR, help=f'Job directory (default: {JOB_DIR})')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    prepare = sub.add_parser('prepare', help='Write requests.jsonl and manifest.json')
+    prepare.add_argument('--metrics', help='Take mentors and comments from a metrics file instead of the XLS files')
+    prepare.add_argument('--sample', type=int, help='Only the first N mentors')
+    prepare.add_argument('--batch-size', type=int, default=20)
+
+    ingest = sub.add_parser('ingest', help="Build metrics from the provider's result files")
+    ingest.add_argument('results', nargs='+', help='Output / error JSONL files of the batch')
+    ingest.add_argument('--output', help='Output file (default: mentor_metrics_qwen_batch_<n>.json)')
+
+    fixture = sub.add_parser('fixture', help='Write a local results file for testing ingest')
+    fixture.add_argument('--output', default=None, help='Default: <dir>/results_fixture.jsonl')
+    fixture.add_argument('--fail-every', type=int, default=0, help='Fail every Nth request (HTTP 500)')
+
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Qwen Batch-API Jobs")
+    print("=" * 60)
+
+    if args.command == 'fixture':
+        output = args.output or os.path.join(args.dir, 'results_fixture.jsonl')
+        lines = build_fixture(args.dir, args.fail_every)
+        write_jsonl(output, lines)
+        print(f"✓ Wrote {len(lines)} result lines → {output}")
+        return
+
+    if args.command == 'prepare':
+        mentors, data_processor = load_mentors(args.metrics, args.sample)
+        job = BatchJob(data_processor.processor, args.dir)
+        manifest = job.prepare(mentors, args.batch_size)
+        print(f"✓ {len(mentors)} mentors: {len(manifest['batches'])} requests, "
+              f"{len(manifest['neutral'])} neutral, {len(manifest['reused'])} reused, "
+              f"{len(manifest['followers'])} sharing a score within the job")
+        print(f"✓ Wrote {job.path(REQUESTS_FILE)} and {job.path(MANIFEST_FILE)}")
+        data_processor.processor.preprocessor.report()
+        return
+
+    data_processor = EnhancedMentorDataProcessor(None)
+    job = BatchJob(data_processor.processor, args.dir)
+    metrics = job.ingest(args.results)
+    job.report()
+
+    output_file = args.output or f'mentor_metrics_qwen_batch_{len(metrics)}.json'
+    data_processor.export_metrics(metrics, output_file)
+
+
+if __name__ == "__main__":
+    main()
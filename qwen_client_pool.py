@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pooled Client for OpenAI-Compatible Endpoints
+- Spreads requests over several API keys / base URLs (DashScope or any
+  OpenAI-compatible server, e.g. a local stand-in)
+- Per-key quotas: requests and tokens per minute, concurrent requests
+- Health tracking: throttled keys (429) cool down and are routed around,
+  failing endpoints back off exponentially, rejected keys are disabled
+- One shared keep-alive HTTP connection pool for all endpoints
+- Drop-in for AsyncOpenAI / OpenAI: pool.chat.completions.create(...)
+  and pool.sync.chat.completions.create(...)
+
+Endpoints are configured in qwen_endpoints.json:
+    [{"api_key": "sk-...", "rpm": 60},
+     {"api_key": "sk-...", "base_url": "http://127.0.0.1:8000/v1", "model": "qwen2.5-7b-instruct"}]
+"""
+
+import os
+import json
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# openai / httpx are imported when the pool is built, so importing this module stays cheap
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+
+DASHSCOPE_BASE_URL = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+
+# Sliding quota window in seconds
+QUOTA_WINDOW = 60.0
+
+# Cooldown bounds in seconds
+THROTTLE_COOLDOWN = (5.0, 120.0)
+FAILURE_COOLDOWN = (1.0, 60.0)
+
+
+class Endpoint:
+    """One API key at one base URL, with its quota and health state"""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = DASHSCOPE_BASE_URL,
+        model: str = None,
+        rpm: int = None,
+        tpm: int = None,
+        max_concurrency: int = None,
+        name: str = None
+    ):
+        """
+        Args:
+            api_key: API key for this endpoint
+            base_url: OpenAI-compatible base URL
+            model: Model name to use here instead of the requested one
+            rpm: Requests per minute (None = unlimited)
+            tpm: Tokens per minute, counted from reported usage (None = unlimited)
+            max_concurrency: Requests in flight at once (None = unlimited)
+            name: Label in reports (default: key suffix @ host)
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrency = max_concurrency
+        self.name = name or f"…{api_key[-4:]}@{urlsplit(base_url).hostname}"
+
+        self.requests = deque()
+        self.tokens = deque()
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+        self.consecutive_throttles = 0
+        self.consecutive_failures = 0
+        self.disabled = None
+
+        self.stats = {'requests': 0, 'tokens': 0, 'throttled': 0, 'errors': 0}
+
+    def available_in(self, now: float) -> float:
+        """Seconds until this endpoint may take a request (0 = now, inf = disabled)"""
+        if self.disabled:
+            return float('inf')
+
+        while self.requests and self.requests[0] <= now - QUOTA_WINDOW:
+            self.requests.popleft()
+        while self.tokens and self.tokens[0][0] <= now - QUOTA_WINDOW:
+            self.tokens.popleft()
+
+        wait = max(self.cooldown_until - now, 0.0)
+        if self.rpm and len(self.requests) >= self.rpm:
+            wait = max(wait, self.requests[0] + QUOTA_WINDOW - now)
+        if self.tpm and self.tokens and sum(n for _, n in self.tokens) >= self.tpm:
+            wait = max(wait, self.tokens[0][0] + QUOTA_WINDOW - now)
+        if self.max_concurrency and self.in_flight >= self.max_concurrency:
+            # Freed when a request finishes; poll shortly
+            wait = max(wait, 0.05)
+        return wait
+
+    def load(self) -> float:
+        """Routing cost: in-flight requests, then quota usage"""
+        rpm_used = len(self.requests) / self.rpm if self.rpm else 0.0
+        return self.in_flight + rpm_used
+
+    def state(self, now: float) -> str:
+        if self.disabled:
+            return f"disabled ({self.disabled})"
+        if self.cooldown_until > now:
+            return f"cooling down {self.cooldown_until - now:.0f}s"
+        return "healthy"
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Retry-After header of an API error, in seconds"""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+class QwenClientPool:
+    """Routes chat completions across endpoints with quotas and health tracking"""
+
+    def __init__(
+        self,
+        endpoints: List[Endpoint],
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 60.0,
+        timeout: float = 120.0,
+        max_attempts: int = None
+    ):
+        """
+        Args:
+            endpoints: Configured endpoints
+            max_connections: Connection limit of the shared HTTP pool
+            max_keepalive_connections: Idle connections kept open for reuse
+            keepalive_expiry: Seconds an idle connection is kept
+            timeout: Request timeout in seconds
+            max_attempts: Attempts per request across endpoints (default: endpoints + 2)
+        """
+        if not endpoints:
+            raise ValueError("QwenClientPool needs at least one endpoint")
+        import httpx
+
+        self.endpoints = endpoints
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.timeout = httpx.Timeout(timeout, connect=10.0)
+        self.max_attempts = max_attempts or len(endpoints) + 2
+        self.lock = threading.Lock()
+
+        # Clients are bound to the shared HTTP pool; async ones to the running event loop
+        self._loop = None
+        self._async_clients = {}
+        self._sync_clients = {}
+        self._sync_http = None
+
+        self.chat = _Chat(_Completions(self, sync=False))
+        self.sync = _SyncFacade(_Chat(_Completions(self, sync=True)))
+
+    @classmethod
+    def from_config(cls, path: str = 'qwen_endpoints.json', **kwargs) -> 'QwenClientPool':
+        """Build the pool from a JSON list of endpoint settings"""
+        with open(path, 'r', encoding='utf-8') as f:
+            settings = json.load(f)
+        return cls([Endpoint(**entry) for entry in settings], **kwargs)
+
+    @classmethod
+    def from_keys(cls, api_keys: List[str], base_url: str = DASHSCOPE_BASE_URL, **kwargs) -> 'QwenClientPool':
+        """Build the pool from plain API keys at one base URL"""
+        return cls([Endpoint(key, base_url) for key in api_keys], **kwargs)
+
+    @classmethod
+    def from_environment(cls, config_path: str = 'qwen_endpoints.json') -> Optional['QwenClientPool']:
+        """Pool from qwen_endpoints.json or DASHSCOPE_API_KEYS (comma separated), if configured"""
+        if os.path.exists(config_path):
+            return cls.from_config(config_path)
+        keys = [k.strip() for k in os.environ.get('DASHSCOPE_API_KEYS', '').split(',') if k.strip()]
+        return cls.from_keys(keys) if keys else None
+
+    # Clients
+
+    def _async_client(self, endpoint: Endpoint) -> 'AsyncOpenAI':
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            import httpx
+            from openai import AsyncOpenAI
+
+            http_client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            self._async_clients = {
+                id(e): AsyncOpenAI(api_key=e.api_key, base_url=e.base_url,
+                                   http_client=http_client, max_retries=0)
+                for e in self.endpoints
+            }
+            self._loop = loop
+        return self._async_clients[id(endpoint)]
+
+    def _sync_client(self, endpoint: Endpoint) -> 'OpenAI':
+        with self.lock:
+            if self._sync_http is None:
+                import httpx
+                from openai import OpenAI
+
+                self._sync_http = httpx.Client(limits=self.limits, timeout=self.timeout)
+                self._sync_clients = {
+                    id(e): OpenAI(api_key=e.api_key, base_url=e.base_url,
+                                  http_client=self._sync_http, max_retries=0)
+                    for e in self.endpoints
+                }
+            return self._sync_clients[id(endpoint)]
+
+    # Routing
+
+    def _select(self) -> Tuple[Optional[Endpoint], float]:
+        """Reserve the least loaded available endpoint, or return the wait until one frees up"""
+        with self.lock:
+            now = time.monotonic()
+            waits = [(endpoint.available_in(now), endpoint) for endpoint in self.endpoints]
+            ready = [endpoint for wait, endpoint in waits if wait == 0.0]
+            if not ready:
+                return None, min(wait for wait, _ in waits)
+
+            endpoint = min(ready, key=Endpoint.load)
+            endpoint.in_flight += 1
+            endpoint.requests.append(now)
+            endpoint.stats['requests'] += 1
+            return endpoint, 0.0
+
+    def _release(self, endpoint: Endpoint, usage=None, error: Exception = None) -> bool:
+        """
+        Record the outcome of a request
+
+        Returns:
+            True if the error is worth retrying on another endpoint
+        """
+        with self.lock:
+            now = time.monotonic()
+            endpoint.in_flight -= 1
+
+            total_tokens = getattr(usage, 'total_tokens', None)
+            if total_tokens:
+                endpoint.tokens.append((now, total_tokens))
+                endpoint.stats['tokens'] += total_tokens
+
+            if error is None:
+                endpoint.consecutive_throttles = 0
+                endpoint.consecutive_failures = 0
+                return False
+
+            import openai
+
+            if isinstance(error, openai.RateLimitError):
+                endpoint.stats['throttled'] += 1
+                low, high = THROTTLE_COOLDOWN
+                cooldown = _retry_after(error) or min(low * 2 ** endpoint.consecutive_throttles, high)
+                endpoint.consecutive_throttles += 1
+                endpoint.cooldown_until = now + cooldown
+                return True
+
+            endpoint.stats['errors'] += 1
+            if isinstance(error, (openai.AuthenticationError, openai.PermissionDeniedError)):
+                endpoint.disabled = type(error).__name__
+                return True
+            if isinstance(error, (openai.APIConnectionError, openai.InternalServerError)):
+                low, high = FAILURE_COOLDOWN
+                endpoint.cooldown_until = now + min(low * 2 ** endpoint.consecutive_failures, high)
+                endpoint.consecutive_failures += 1
+                return True
+
+            # Bad request and the like: the same request fails everywhere
+            return False
+
+    def _no_endpoint_error(self) -> RuntimeError:
+        return RuntimeError("no usable endpoint: " + ", ".join(
+            f"{e.name} {e.state(time.monotonic())}" for e in self.endpoints
+        ))
+
+    def _request_kwargs(self, endpoint: Endpoint, kwargs: Dict) -> Dict:
+        return {**kwargs, 'model': endpoint.model or kwargs.get('model')}
+
+    async def create_async(self, **kwargs):
+        """chat.completions.create over the pool (AsyncOpenAI semantics)"""
+        for attempt in range(1, self.max_attempts + 1):
+            endpoint, wait = self._select()
+            while endpoint is None:
+                if wait == float('inf'):
+                    raise self._no_endpoint_error()
+                await asyncio.sleep(wait)
+                endpoint, wait = self._select()
+
+            try:
+                response = await self._async_client(endpoint).chat.completions.create(
+                    **self._request_kwargs(endpoint, kwargs)
+                )
+            except Exception as e:
+                if not self._release(endpoint, error=e) or attempt == self.max_attempts:
+                    raise
+                continue
+
+            if kwargs.get('stream'):
+                return self._track_stream(endpoint, response)
+            self._release(endpoint, usage=response.usage)
+            return response
+
+    async def _track_stream(self, endpoint: Endpoint, stream):
+        """Pass chunks through; the request is released when the stream ends"""
+        usage = None
+        error = None
+        try:
+            async for chunk in stream:
+                if getattr(chunk, 'usage', None):
+                    usage = chunk.usage
+                yield chunk
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._release(endpoint, usage=usage, error=error)
+
+    def create_sync(self, **kwargs):
+        """chat.completions.create over the pool (OpenAI semantics, non-streaming)"""
+        for attempt in range(1, self.max_attempts + 1):
+            endpoint, wait = self._select()
+            while endpoint is None:
+                if wait == float('inf'):
+                    raise self._no_endpoint_error()
+                time.sleep(wait)
+                endpoint, wait = self._select()
+
+            try:
+                response = self._sync_client(endpoint).chat.completions.create(
+                    **self._request_kwargs(endpoint, kwargs)
+                )
+            except Exception as e:
+                if not self._release(endpoint, error=e) or attempt == self.max_attempts:
+                    raise
+                continue
+
+            self._release(endpoint, usage=getattr(response, 'usage', None))
+            return response
+
+    def report(self):
+        """Print per-endpoint usage and health"""
+        now = time.monotonic()
+        print(f"\n🔑 Client pool ({len(self.endpoints)} endpoints):")
+        for endpoint in self.endpoints:
+            s = endpoint.stats
+            print(f"   {endpoint.name}: {s['requests']} requests, {s['tokens']} tokens, "
+                  f"{s['throttled']} throttled, {s['errors']} errors — {endpoint.state(now)}")
+
+
+class _Completions:
+    def __init__(self, pool: QwenClientPool, sync: bool):
+        self.create = pool.create_sync if sync else pool.create_async
+
+
+class _Chat:
+    def __init__(self, completions: _Completions):
+        self.completions = completions
+
+
+class _SyncFacade:
+    """Synchronous view of the pool (OpenAI client shape)"""
+
+    def __init__(self, chat: _Chat):
+        self.chat = chat
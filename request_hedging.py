@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hedged Requests for Qwen Batch Scoring
+- Tracks observed batch latencies and their p95
+- A batch still running past the p95 gets a duplicate request; the first
+  valid response wins and the other request is cancelled
+- Extra calls are capped by a budget (fraction of primary requests)
+- Reports the wasted tokens of losing requests against the latency saved
+"""
+
+import math
+import asyncio
+from typing import Optional
+
+from comment_preprocessor import estimate_tokens
+
+
+class HedgingPolicy:
+    """Latency tracker and budget for duplicate (hedge) requests"""
+
+    def __init__(self, budget: float = 0.1, quantile: float = 0.95, min_samples: int = 10):
+        """
+        Args:
+            budget: Maximum hedge requests as a fraction of primary requests
+            quantile: Latency quantile after which a batch is hedged
+            min_samples: Completed requests needed before hedging starts
+        """
+        self.budget = budget
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.latencies = []
+
+        self.stats = {
+            'requests': 0,
+            'hedges': 0,
+            'hedge_wins': 0,
+            'primary_wins': 0,
+            'budget_denied': 0,
+            'wasted_tokens': 0,
+            'latency_saved': 0.0
+        }
+
+    def record_latency(self, seconds: float):
+        """Record the latency of a completed request"""
+        self.latencies.append(seconds)
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds after which a running batch is hedged (None until enough samples)"""
+        if len(self.latencies) < self.min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        rank = max(math.ceil(self.quantile * len(ordered)) - 1, 0)
+        return ordered[rank]
+
+    def start_request(self):
+        """Count a primary request towards the budget base"""
+        self.stats['requests'] += 1
+
+    def acquire(self) -> bool:
+        """Take one hedge from the budget; False when it is exhausted"""
+        if self.stats['hedges'] + 1 > self.budget * self.stats['requests']:
+            self.stats['budget_denied'] += 1
+            return False
+        self.stats['hedges'] += 1
+        return True
+
+    def estimate_saved(self, win_time: float) -> float:
+        """
+        Estimated seconds saved when a hedge wins at win_time
+
+        The cancelled primary would have run past win_time; its remaining time is
+        estimated from observed latencies beyond win_time (0 when there are none).
+        """
+        tail = [latency for latency in self.latencies if latency > win_time]
+        if not tail:
+            return 0.0
+        return sum(tail) / len(tail) - win_time
+
+    def record_outcome(self, hedge_won: bool, wasted_tokens: int, saved_seconds: float):
+        """Record which request of a hedged batch won and what the loser cost"""
+        self.stats['hedge_wins' if hedge_won else 'primary_wins'] += 1
+        self.stats['wasted_tokens'] += wasted_tokens
+        self.stats['latency_saved'] += saved_seconds
+
+    @staticmethod
+    def wasted_tokens(system_prompt: str, prompt: str, usage: Optional[dict], output_text: str) -> int:
+        """Tokens spent by a losing request (reported usage, else estimated from the text)"""
+        if usage and usage.get('total_tokens'):
+            return usage['total_tokens']
+        return estimate_tokens(system_prompt) + estimate_tokens(prompt) + estimate_tokens(output_text)
+
+    @staticmethod
+    async def cancel(task: asyncio.Task):
+        """Cancel a losing request and wait until it has stopped"""
+        task.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            pass
+
+    def report(self):
+        """Print hedging summary"""
+        s = self.stats
+        delay = self.hedge_delay()
+        print(f"\n🪁 Hedged requests:")
+        print(f"   p{round(self.quantile * 100)} latency: "
+              f"{f'{delay:.1f}s' if delay is not None else 'n/a'} ({len(self.latencies)} samples)")
+        print(f"   Hedges: {s['hedges']}/{s['requests']} requests "
+              f"(budget {self.budget:.0%}, {s['budget_denied']} denied)")
+        print(f"   Winners: {s['hedge_wins']} hedge, {s['primary_wins']} primary")
+        print(f"   Wasted tokens: {s['wasted_tokens']}")
+        print(f"   Estimated latency saved: {s['latency_saved']:.1f}s")
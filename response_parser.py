@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tolerant JSON extraction for Qwen responses
+- Incremental parser for streamed batch responses: yields each mentor
+  object as soon as its closing brace arrives
+- Schema validation (6 dimensions, score in 0-10, mentor_index in range)
+- Repairs common defects: code fences, trailing prose, trailing commas,
+  bad escapes, string scores, truncated output
+"""
+
+import re
+import json
+from typing import Dict, List, Optional
+
+
+DIMENSIONS = [
+    "导师能力",
+    "经费情况",
+    "学生补助",
+    "师生关系",
+    "工作时间",
+    "毕业去向"
+]
+
+INVALID_ESCAPE = re.compile(r'\\(?!["\\/bfnrtu])')
+TRAILING_COMMA = re.compile(r',\s*([}\]])')
+NUMBER = re.compile(r'-?\d+(?:\.\d+)?')
+
+
+class ResponseParseError(ValueError):
+    """Raised when no usable JSON can be recovered from a response"""
+
+
+def close_truncated(text: str) -> str:
+    """Close an unterminated string and any open containers at the end of text"""
+    stack = []
+    in_string = False
+    escape = False
+
+    for ch in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in '{[':
+            stack.append('}' if ch == '{' else ']')
+        elif ch in '}]' and stack:
+            stack.pop()
+
+    if escape:
+        text = text[:-1]
+    if in_string:
+        text += '"'
+    text = text.rstrip().rstrip(',:')
+    return text + ''.join(reversed(stack))
+
+
+def load_json_lenient(text: str, allow_truncated: bool = True):
+    """
+    Parse the first JSON value in text, repairing common defects
+
+    Raises:
+        ResponseParseError: if nothing parseable remains after repairs
+    """
+    start = min((i for i in (text.find('{'), text.find('[')) if i >= 0), default=-1)
+    if start < 0:
+        raise ResponseParseError("no JSON object in response")
+    text = text[start:]
+
+    # Cut at the end of the first complete top-level value (drops trailing prose/fences)
+    end = _find_value_end(text)
+    truncated = end is None
+    if not truncated:
+        text = text[:end]
+    elif not allow_truncated:
+        raise ResponseParseError("response is truncated")
+
+    candidates = [text]
+    repaired = TRAILING_COMMA.sub(r'\1', INVALID_ESCAPE.sub(r'\\\\', text))
+    candidates.append(repaired)
+    if truncated:
+        candidates.append(TRAILING_COMMA.sub(r'\1', close_truncated(repaired)))
+
+    last_error = None
+    for candidate in candidates:
+        try:
+            return json.loads(candidate, strict=False)
+        except json.JSONDecodeError as e:
+            last_error = e
+
+    raise ResponseParseError(f"unparseable JSON: {last_error}")
+
+
+def _find_value_end(text: str) -> Optional[int]:
+    """Index just past the first balanced top-level value, or None if it never closes"""
+    depth = 0
+    in_string = False
+    escape = False
+
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in '{[':
+            depth += 1
+        elif ch in '}]':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+
+    return None
+
+
+def coerce_score(value) -> Optional[float]:
+    """Turn 8, "8", "8分" or "8/10" into a float clamped to 0-10"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        score = float(value)
+    else:
+        match = NUMBER.search(str(value))
+        if not match:
+            return None
+        score = float(match.group())
+    return max(0.0, min(10.0, score))
+
+
+def normalize_dimensions(obj: Dict, dimensions: List[str] = DIMENSIONS) -> int:
+    """
+    Coerce every dimension of a result object to {"score": float, "reason": str} in place
+
+    Missing or unusable dimensions become neutral (5.0).
+
+    Returns:
+        Number of dimensions that had to be repaired
+    """
+    repairs = 0
+
+    for dim in dimensions:
+        item = obj.get(dim)
+        raw = item.get('score') if isinstance(item, dict) else item
+        reason = item.get('reason', '') if isinstance(item, dict) else ''
+
+        score = coerce_score(raw) if raw is not None else None
+        if score is None:
+            score = 5.0
+
+        exact = isinstance(item, dict) and isinstance(raw, (int, float)) \
+            and not isinstance(raw, bool) and float(raw) == score
+        if not exact:
+            repairs += 1
+
+        obj[dim] = {'score': score, 'reason': str(reason or '')}
+
+    recommendation = obj.get('overall_recommendation', '')
+    obj['overall_recommendation'] = str(recommendation or '')
+
+    return repairs
+
+
+def validate_mentor(obj, expected_count: int, dimensions: List[str] = DIMENSIONS) -> Optional[Dict]:
+    """
+    Validate and repair one mentor object from a batch response
+
+    Returns:
+        The repaired object, or None if it cannot be mapped to a mentor
+    """
+    if not isinstance(obj, dict):
+        return None
+
+    index = obj.get('mentor_index')
+    if isinstance(index, str):
+        match = NUMBER.search(index)
+        index = int(float(match.group())) if match else None
+    elif isinstance(index, float) and index.is_integer():
+        index = int(index)
+    if not isinstance(index, int) or isinstance(index, bool) or not 1 <= index <= expected_count:
+        return None
+
+    # An object with no dimension at all is not a mentor result
+    if not any(dim in obj for dim in dimensions):
+        return None
+
+    obj['mentor_index'] = index
+    obj['_repairs'] = normalize_dimensions(obj, dimensions)
+    return obj
+
+
+class MentorStreamParser:
+    """
+    Incremental parser for streamed batch responses
+
+    Feed text deltas as they arrive; every mentor object (an object directly
+    inside an array) is parsed, validated and returned as soon as it closes.
+    """
+
+    def __init__(self, expected_count: int, dimensions: List[str] = DIMENSIONS):
+        self.expected_count = expected_count
+        self.dimensions = dimensions
+
+        self.text = ''
+        self.pos = 0
+        self.stack = []
+        self.in_string = False
+        self.escape = False
+        self.object_start = None
+        self.object_depth = None
+        self.finished = False
+
+        self.mentors = []
+        self.seen_indexes = set()
+        self.stats = {'objects': 0, 'accepted': 0, 'repaired': 0, 'rejected': 0, 'duplicates': 0, 'salvaged': 0}
+
+    def feed(self, delta: str) -> List[Dict]:
+        """Consume a text delta and return newly completed mentor objects"""
+        if self.finished or not delta:
+            return []
+
+        self.text += delta
+        completed = []
+        text = self.text
+
+        while self.pos < len(text):
+            ch = text[self.pos]
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif not self.stack:
+                # Skip prose and code fences before the JSON starts
+                if ch in '{[':
+                    self.stack.append(ch)
+            elif ch == '"':
+                self.in_string = True
+            elif ch in '{[':
+                if ch == '{' and self.stack[-1] == '[' and self.object_start is None:
+                    # Start of a mentor object
+                    self.object_start = self.pos
+                    self.object_depth = len(self.stack)
+                self.stack.append(ch)
+            elif ch in '}]':
+                self.stack.pop()
+                if self.object_start is not None and len(self.stack) == self.object_depth:
+                    mentor = self._accept(text[self.object_start:self.pos + 1])
+                    self.object_start = None
+                    if mentor:
+                        completed.append(mentor)
+                if not self.stack:
+                    # Top-level value closed; anything after is trailing prose
+                    self.finished = True
+                    self.pos += 1
+                    break
+
+            self.pos += 1
+
+        return completed
+
+    def close(self) -> List[Dict]:
+        """
+        End of stream: salvage a truncated final mentor object if it is complete enough
+
+        A truncated object is only kept if all dimensions made it into the text.
+        """
+        if self.finished or self.object_start is None:
+            return []
+
+        fragment = self.text[self.object_start:]
+        self.object_start = None
+        try:
+            obj = load_json_lenient(fragment)
+        except ResponseParseError:
+            self.stats['rejected'] += 1
+            return []
+
+        if not isinstance(obj, dict) or not all(isinstance(obj.get(dim), dict) for dim in self.dimensions):
+            self.stats['rejected'] += 1
+            return []
+
+        mentor = self._register(obj)
+        if mentor:
+            self.stats['salvaged'] += 1
+            return [mentor]
+        return []
+
+    def _accept(self, fragment: str) -> Optional[Dict]:
+        """Parse, validate and register one closed object"""
+        self.stats['objects'] += 1
+        try:
+            obj = load_json_lenient(fragment, allow_truncated=False)
+        except ResponseParseError:
+            self.stats['rejected'] += 1
+            return None
+        return self._register(obj)
+
+    def _register(self, obj) -> Optional[Dict]:
+        """Validate an object and drop repeats of an index already seen"""
+        mentor = validate_mentor(obj, self.expected_count, self.dimensions)
+        if mentor is None:
+            self.stats['rejected'] += 1
+            return None
+
+        if mentor['mentor_index'] in self.seen_indexes:
+            self.stats['duplicates'] += 1
+            return None
+
+        self.seen_indexes.add(mentor['mentor_index'])
+        self.stats['accepted'] += 1
+        if mentor.pop('_repairs'):
+            self.stats['repaired'] += 1
+        self.mentors.append(mentor)
+        return mentor
+
+
+def parse_batch_response(text: str, expected_count: int, dimensions: List[str] = DIMENSIONS) -> Dict:
+    """Parse a complete (non-streamed) batch response with the same validation"""
+    parser = MentorStreamParser(expected_count, dimensions)
+    parser.feed(text)
+    parser.close()
+    if not parser.mentors:
+        raise ResponseParseError(f"no valid mentor objects ({parser.stats})")
+    return {'mentors': parser.mentors}
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Similarity Cache for Qwen Scoring
+- MinHash LSH index over each mentor's normalized comment set (no network)
+- Mentors whose comments are near-identical to an already scored set reuse
+  that score instead of triggering a new LLM call
+- Near-identical sets within one run are scored once and shared
+- Entries record the model and prompt version that produced the score; entries
+  of another model or prompt are ignored (but kept in the file)
+- Reuse is recorded in provenance and hit rates are reported
+"""
+
+import os
+import json
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+from comment_preprocessor import CommentPreprocessor, MinHasher, normalize_text
+
+
+# Fields copied from the source mentor when a score is reused
+SCORE_FIELDS = ['dimensionScores', 'dimensionReasons', 'totalScore', 'overallRecommendation']
+
+
+class SimilarityCache:
+    """Persistent MinHash LSH index of scored comment sets"""
+
+    def __init__(
+        self,
+        path: str = 'qwen_similarity_index.json',
+        threshold: float = 0.9,
+        bands: int = 16,
+        scorer: Optional[str] = None
+    ):
+        """
+        Args:
+            path: JSON file the index is persisted to
+            threshold: Estimated Jaccard similarity required to reuse a score
+            bands: LSH bands (num_perm must be divisible by this)
+            scorer: Model and prompt version of the scores (see scorer_key());
+                    entries scored by anything else are not reused.
+                    None accepts every entry.
+        """
+        self.path = path
+        self.scorer = scorer
+        self.threshold = threshold
+        self.hasher = MinHasher()
+        self.bands = bands
+        self.rows = self.hasher.num_perm // bands
+
+        self.entries = {}   # mentor_id -> {'signature': [...], 'metric': {...} or None}
+        self.buckets = {}   # band key -> [mentor_id, ...]
+        # Entries of other scorers, written back on save unless re-scored
+        self.stale = {}
+
+        self.stats = {'lookups': 0, 'cache_hits': 0, 'run_hits': 0}
+
+        if path and os.path.exists(path):
+            self.load()
+
+    def signature(self, comments: List[str]) -> Optional[List[int]]:
+        """Signature of a comment set (order-insensitive); None if there is no text"""
+        normalized = sorted({normalize_text(c) for c in comments} - {''})
+        if not normalized:
+            return None
+        return self.hasher.signature('\n'.join(normalized))
+
+    def _band_keys(self, signature: List[int]) -> List[str]:
+        """LSH bucket keys, one per band"""
+        return [
+            f"{b}:" + ','.join(str(v) for v in signature[b * self.rows:(b + 1) * self.rows])
+            for b in range(self.bands)
+        ]
+
+    def _insert(self, mentor_id: str, signature: List[int], metric: Optional[Dict]):
+        """Add or replace an entry and its bucket memberships"""
+        if mentor_id in self.entries:
+            self._remove(mentor_id)
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, []).append(mentor_id)
+        self.entries[mentor_id] = {'signature': signature, 'metric': metric}
+
+    def find(self, signature: List[int]) -> Tuple[Optional[str], float]:
+        """Most similar indexed entry at or above the threshold"""
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self.buckets.get(key, ()))
+
+        best_id, best_sim = None, 0.0
+        for candidate in candidates:
+            sim = MinHasher.similarity(signature, self.entries[candidate]['signature'])
+            if sim >= self.threshold and sim > best_sim:
+                best_id, best_sim = candidate, sim
+
+        return best_id, best_sim
+
+    def add(self, mentor_id: str, comments: List[str], metric: Dict):
+        """Index a scored mentor"""
+        signature = self.signature(comments)
+        if signature is None:
+            return
+        self._insert(mentor_id, signature, {
+            **{field: metric.get(field) for field in SCORE_FIELDS},
+            'engine': (metric.get('provenance') or {}).get('engine', 'qwen'),
+            'scorer': self.scorer
+        })
+
+    @staticmethod
+    def reuse_metric(mentor: Dict, source_id: str, source: Dict, similarity: float, scope: str) -> Dict:
+        """Metric for a mentor built from a near-identical mentor's score"""
+        return {
+            'id': mentor['id'],
+            'name': mentor['name'],
+            'school': mentor['school'],
+            'department': mentor['department'],
+            'evaluationCount': len(mentor['comments']),
+            **{field: source.get(field) for field in SCORE_FIELDS},
+            'evaluations': [{'comment': c, 'dimensions': {}} for c in mentor['comments']],
+            'provenance': {
+                'engine': 'similarity_cache',
+                'scope': scope,
+                'sourceId': source_id,
+                'sourceEngine': source.get('engine', 'qwen'),
+                'similarity': round(similarity, 3)
+            }
+        }
+
+    def partition(self, mentors: List[Dict]) -> Tuple[List[Dict], Dict, Dict]:
+        """
+        Split mentors into those that still need scoring and those that can reuse a score
+
+        Args:
+            mentors: Mentor dicts (prompt_comments used when present)
+
+        Returns:
+            (mentors to score, metrics reused from the index,
+             follower mentor -> (leader id, similarity) for in-run near-duplicates)
+        """
+        to_score = []
+        reused = {}
+        followers = {}
+
+        for mentor in mentors:
+            comments = mentor.get('prompt_comments', mentor['comments'])
+            signature = self.signature(comments)
+            if signature is None:
+                to_score.append(mentor)
+                continue
+
+            self.stats['lookups'] += 1
+            # A mentor whose comments are unchanged since the last run matches its own entry
+            match_id, similarity = self.find(signature)
+
+            if match_id is None:
+                # Leader for this comment set; scored by the model
+                self._insert(mentor['id'], signature, None)
+                to_score.append(mentor)
+            elif self.entries[match_id]['metric'] is not None:
+                self.stats['cache_hits'] += 1
+                reused[mentor['id']] = self.reuse_metric(
+                    mentor, match_id, self.entries[match_id]['metric'], similarity, 'index'
+                )
+            else:
+                self.stats['run_hits'] += 1
+                followers[mentor['id']] = (mentor, match_id, similarity)
+
+        return to_score, reused, followers
+
+    def resolve(self, followers: Dict, metrics: Dict) -> Dict:
+        """
+        Copy leader scores to in-run followers
+
+        Followers whose leader failed stay unscored, like the mentors of a failed batch.
+        """
+        resolved = {}
+        for mentor_id, (mentor, leader_id, similarity) in followers.items():
+            if leader_id in metrics:
+                leader = metrics[leader_id]
+                source = {**{f: leader.get(f) for f in SCORE_FIELDS},
+                          'engine': (leader.get('provenance') or {}).get('engine', 'qwen')}
+                resolved[mentor_id] = self.reuse_metric(mentor, leader_id, source, similarity, 'run')
+        return resolved
+
+    def record(self, mentors: List[Dict], metrics: Dict):
+        """Index freshly scored mentors and drop leaders that never got a score"""
+        for mentor in mentors:
+            metric = metrics.get(mentor['id'])
+            entry = self.entries.get(mentor['id'])
+            if metric is not None and (metric.get('provenance') or {}).get('engine') != 'similarity_cache':
+                self.add(mentor['id'], mentor.get('prompt_comments', mentor['comments']), metric)
+            elif entry is not None and entry['metric'] is None:
+                self._remove(mentor['id'])
+
+    def _remove(self, mentor_id: str):
+        """Remove an entry from the index"""
+        entry = self.entries.pop(mentor_id, None)
+        if entry is None:
+            return
+        for key in self._band_keys(entry['signature']):
+            members = self.buckets.get(key, [])
+            if mentor_id in members:
+                members.remove(mentor_id)
+
+    def load(self):
+        """Load the index from disk"""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        for mentor_id, entry in data.get('entries', {}).items():
+            # Scores of another model or prompt (or of unknown origin) must not be reused
+            if self.scorer is not None and (entry['metric'] or {}).get('scorer') != self.scorer:
+                self.stale[mentor_id] = entry
+                continue
+            self._insert(mentor_id, entry['signature'], entry['metric'])
+
+    def save(self):
+        """Persist scored entries (pending leaders are not saved)"""
+        entries = dict(self.stale)
+        entries.update(
+            (mentor_id, entry)
+            for mentor_id, entry in self.entries.items()
+            if entry['metric'] is not None
+        )
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'threshold': self.threshold, 'entries': entries}, f, ensure_ascii=False)
+
+    def report(self):
+        """Print reuse statistics"""
+        s = self.stats
+        hits = s['cache_hits'] + s['run_hits']
+        rate = hits / s['lookups'] * 100 if s['lookups'] else 0.0
+        print(f"\n♻️ Similarity cache:")
+        print(f"   Lookups: {s['lookups']}, hits: {hits} ({rate:.1f}%)")
+        print(f"   From index: {s['cache_hits']}, shared within run: {s['run_hits']}")
+        print(f"   Indexed comment sets: {sum(1 for e in self.entries.values() if e['metric'] is not None)}")
+        if self.stale:
+            print(f"   Ignored {len(self.stale)} entries scored by another model / prompt version")
+
+
+def scorer_key(model: str, prompt_version: str) -> str:
+    """Scorer identity stored with index entries"""
+    return f"{model}:{prompt_version}"
+
+
+def main():
+    """Build or inspect the similarity index from an existing metrics file"""
+    parser = argparse.ArgumentParser(description='Similarity cache for Qwen scoring')
+    parser.add_argument('metrics_file', help='mentor_metrics_*.json with Qwen scores to index')
+    parser.add_argument('--index', default='qwen_similarity_index.json')
+    parser.add_argument('--threshold', type=float, default=0.9)
+    parser.add_argument('--model', default='qwen-plus', help='Model that produced the scores (default: qwen-plus)')
+    parser.add_argument('--prompt-version', default=None,
+                        help='Prompt version of the scores (default: the current batch system prompt)')
+    args = parser.parse_args()
+
+    prompt = args.prompt_version
+    if prompt is None:
+        from qwen_archive import prompt_version
+        from data_processor_qwen_batch import BATCH_SYSTEM_PROMPT
+
+        prompt = prompt_version(BATCH_SYSTEM_PROMPT)
+
+    print("=" * 60)
+    print("Similarity Cache Builder")
+    print("=" * 60)
+
+    with open(args.metrics_file, 'r', encoding='utf-8') as f:
+        metrics = json.load(f)
+    print(f"✓ Loaded {len(metrics)} mentors")
+
+    cache = SimilarityCache(args.index, threshold=args.threshold, scorer=scorer_key(args.model, prompt))
+    preprocessor = CommentPreprocessor()
+
+    for mentor_id, metric in metrics.items():
+        if not metric.get('dimensionScores'):
+            continue
+        comments = preprocessor.preprocess([e['comment'] for e in metric.get('evaluations', [])])
+        cache.add(mentor_id, comments, metric)
+
+    cache.save()
+    print(f"✓ Indexed {len(cache.entries)} comment sets ({cache.scorer}) → {args.index}")
+
+
+if __name__ == "__main__":
+    main()
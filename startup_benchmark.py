@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Startup-Time Budget Check for the Pipeline Entry Points
+- Imports each entry module in a fresh interpreter under `python -X importtime`
+  and compares the cumulative import time with its budget
+- Fails any module that pulls pandas / numpy / openai / httpx / xlrd at
+  import time (they must be imported by the code that uses them)
+- Times small command invocations (--help) against a bare interpreter start
+
+Usage: python3 startup_benchmark.py [--repeat 5] [--top 8]
+Exit status is 1 when a budget is exceeded.
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+from typing import Dict, List, Tuple
+
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Dependencies that must only load inside the commands that need them
+HEAVY_MODULES = ('pandas', 'numpy', 'openai', 'httpx', 'xlrd')
+
+# module -> cumulative import time budget (ms, as reported by -X importtime)
+IMPORT_BUDGETS = {
+    'mentor_cli': 30,
+    'generate_web_data': 60,
+    'analytics_store': 70,
+    'qwen_archive': 70,
+    'similarity_cache': 60,
+    'distilled_scorer': 80,
+    'data_processor': 70,
+    'batch_queue': 120,
+    'api_server': 160,
+    'ingest_service': 160,
+    'hybrid_triage': 160,
+    'data_processor_qwen': 160,
+    'data_processor_qwen_batch': 220,
+    'qwen_batch_jobs': 230,
+}
+
+# command line -> wall-clock budget (ms above a bare `python -c pass`)
+COMMAND_BUDGETS = {
+    ('mentor_cli.py', '--help'): 40,
+    ('qwen_archive.py', '--help'): 80,
+    ('distilled_scorer.py', '--help'): 90,
+    ('batch_queue.py', '--help'): 140,
+}
+
+
+def _run(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True)
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """(module, self µs, cumulative µs) per line of -X importtime output"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header line
+        entries.append((parts[2].strip(), int(parts[0]), int(parts[1])))
+    return entries
+
+
+def measure_import(module: str, repeat: int) -> Dict:
+    """Best-of-repeat cumulative import time of a module and what it imported"""
+    best = None
+    for _ in range(repeat):
+        result = _run(['-X', 'importtime', '-c', f'import {module}'])
+        if result.returncode != 0:
+            return {'error': result.stderr.strip().splitlines()[-1]}
+        entries = parse_importtime(result.stderr)
+        total = next((cumulative for name, _, cumulative in entries if name == module), 0)
+        if best is None or total < best['us']:
+            best = {'us': total, 'entries': entries}
+
+    imported = {name.split('.')[0] for name, _, _ in best['entries']}
+    best['heavy'] = sorted(imported.intersection(HEAVY_MODULES))
+    return best
+
+
+def measure_command(args: Tuple[str, ...], repeat: int) -> float:
+    """Best-of-repeat wall-clock milliseconds of a command"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _run(list(args))
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    """Command line interface"""
+    parser = argparse.ArgumentParser(description='Startup-time budget check for the entry points')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement, best one counts (default: 5)')
+    parser.add_argument('--top', type=int, default=8, help='Heaviest imports shown for failing modules (default: 8)')
+    args = parser.parse_args()
+
+    failures = 0
+
+    print(f"📦 Import time (python -X importtime, best of {args.repeat}):")
+    for module, budget in IMPORT_BUDGETS.items():
+        result = measure_import(module, args.repeat)
+        if 'error' in result:
+            failures += 1
+            print(f"  ✗ {module:<28} import failed: {result['error']}")
+            continue
+
+        ms = result['us'] / 1000
+        ok = ms <= budget and not result['heavy']
+        failures += not ok
+        heavy = f"  loads {', '.join(result['heavy'])}" if result['heavy'] else ''
+        print(f"  {'✓' if ok else '✗'} {module:<28} {ms:7.1f}ms / {budget}ms{heavy}")
+        if not ok:
+            nested = [e for e in result['entries'] if e[0] != module]
+            for name, _, cumulative in sorted(nested, key=lambda e: -e[2])[:args.top]:
+                print(f"      {cumulative / 1000:7.1f}ms  {name}")
+
+    baseline = measure_command(('-c', 'pass'), args.repeat)
+    print(f"\n⏱️ Command startup (wall clock above bare interpreter, {baseline:.0f}ms):")
+    for command, budget in COMMAND_BUDGETS.items():
+        ms = measure_command(command, args.repeat) - baseline
+        ok = ms <= budget
+        failures += not ok
+        print(f"  {'✓' if ok else '✗'} {' '.join(command):<28} {ms:7.1f}ms / {budget}ms")
+
+    print(f"\n{'✅ All startup budgets met' if not failures else f'❌ {failures} budget(s) exceeded'}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+The exported data and its version must not depend on which export path wrote the files
+
+Run from the repository root: python3 -m unittest discover tests
+"""
+
+import os
+import sys
+import json
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_web_data import build_frame, generate_metadata, generate_school_data, group_by
+from progressive_publisher import ProgressivePublisher
+
+
+METRICS = {
+    f"m{i}": {
+        'name': f"导师{i}",
+        'school': ['东南大学', '南京大学'][i % 2],
+        'department': '计算机学院',
+        'evaluationCount': 2,
+        'totalScore': 5.0 + i / 10,
+        'dimensionScores': {'导师能力': 5.0 + i / 10},
+        'evaluations': [{'comment': '导师人很好，很负责'}, {'comment': '导师能力：一般 经费：不足'}]
+    }
+    for i in range(6)
+}
+
+
+class DataVersionTest(unittest.TestCase):
+
+    def test_progressive_publish_matches_full_export(self):
+        frame = build_frame(METRICS)
+        expected = generate_metadata(frame, generate_school_data(frame, group_by(frame, 'school')))['version']
+
+        with tempfile.TemporaryDirectory() as tmp:
+            data_dir = os.path.join(tmp, 'docs', 'data')
+            publisher = ProgressivePublisher(output_dir=data_dir)
+            for changed in (set(METRICS), {'m0', 'm3'}, set()):
+                publisher.publish(METRICS, changed)
+                with open(os.path.join(data_dir, 'metadata.json'), 'r', encoding='utf-8') as f:
+                    self.assertEqual(json.load(f)['version'], expected, sorted(changed))
+
+    def test_incremental_publish_matches_full_publish(self):
+        index_files = ['schools.json', 'mentors_by_school.json', 'distributions.json', 'metadata.json']
+
+        def read(data_dir, name):
+            with open(os.path.join(data_dir, name), 'r', encoding='utf-8') as f:
+                return f.read()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            incremental_dir = os.path.join(tmp, 'incremental', 'data')
+            full_dir = os.path.join(tmp, 'full', 'data')
+            incremental = ProgressivePublisher(output_dir=incremental_dir)
+            incremental.publish_changes(METRICS, set(METRICS))
+
+            metrics = dict(METRICS)
+            metrics['m3'] = {**METRICS['m3'], 'evaluationCount': 3, 'totalScore': 9.5,
+                             'dimensionScores': {'导师能力': 9.5, '学术水平': 8.0}}
+            incremental.publish_changes(metrics, {'m3'})
+            ProgressivePublisher(output_dir=full_dir).publish(metrics, set(metrics))
+
+            for name in index_files + [os.path.join('mentors', 'm3.json')]:
+                self.assertEqual(read(incremental_dir, name), read(full_dir, name), name)
+            # The first call was a full publish, the second refreshed one detail file
+            self.assertEqual(incremental.stats['mentors_published'], len(METRICS) + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Restart behaviour of ingest_service.py
+
+Run from the repository root: python3 -m unittest discover tests
+"""
+
+import os
+import sys
+import json
+import asyncio
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingest_service import IngestService, WriteAheadLog
+from progressive_publisher import ProgressivePublisher
+
+
+BASE_METRICS = {
+    f"m{i}": {
+        'name': f"导师{i}",
+        'school': '东南大学',
+        'department': '计算机学院',
+        'evaluationCount': 2,
+        'totalScore': 6.0,
+        'dimensionScores': {'导师能力': 6.0, '师生关系': 6.0},
+        'dimensionReasons': {'导师能力': '基础理由'},
+        'overallRecommendation': '基础推荐',
+        'evaluations': [{'comment': '导师人很好'}, {'comment': '经费一般'}]
+    }
+    for i in range(3)
+}
+
+SUBMISSION = {'mentorId': 'm0', 'comment': '导师很负责，经费充足', 'dimensions': {'导师能力': 9}}
+
+
+class FakeQwen:
+    """Stands in for QwenBatchProcessor; every mentor gets the same scores"""
+
+    def __init__(self, delay: float = 0.0, engine: str = 'qwen'):
+        self.delay = delay
+        self.engine = engine
+        self.calls = 0
+
+    async def process_all_batches(self, mentors, prioritize=True):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {
+            mentor['id']: {
+                'evaluationCount': len(mentor['comments']),
+                'dimensionScores': {'导师能力': 8.0, '经费情况': 7.0},
+                'dimensionReasons': {'导师能力': 'Qwen 理由'},
+                'overallRecommendation': 'Qwen 推荐',
+                'provenance': {'engine': self.engine}
+            }
+            for mentor in mentors
+        }
+
+
+class IngestRestartTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_dir = os.path.join(self.tmp.name, 'docs', 'data')
+        self.metrics_path = os.path.join(self.tmp.name, 'mentor_metrics.json')
+        self.wal_path = os.path.join(self.tmp.name, 'submissions.wal')
+        ProgressivePublisher(output_dir=self.data_dir).publish(BASE_METRICS, set(BASE_METRICS))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_service(self, submissions=(), llm=None, metrics_path=None) -> IngestService:
+        """Start a service on the current files, submit, and close it"""
+        async def session():
+            service = IngestService.from_sources(
+                metrics_path or self.metrics_path, self.data_dir, WriteAheadLog(self.wal_path),
+                batch_seconds=0.01, llm=llm
+            )
+            await service.start()
+            for payload in submissions:
+                await service.submit(payload)
+            await service.close()
+            return service
+        return asyncio.run(session())
+
+    def published(self, mentor_id: str) -> dict:
+        with open(os.path.join(self.data_dir, 'mentors', f"{mentor_id}.json"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def assert_applied_once(self, detail: dict):
+        self.assertEqual(detail['evaluationCount'], 3)
+        self.assertEqual([e['comment'] for e in detail['evaluations']].count(SUBMISSION['comment']), 1)
+
+    def test_restarts_on_exported_base_do_not_reapply(self):
+        service = self.run_service([SUBMISSION])
+        self.assert_applied_once(self.published('m0'))
+        scores = service.metrics['m0']['dimensionScores']
+
+        for _ in range(2):
+            service = self.run_service()
+            self.assert_applied_once(service.metrics['m0'])
+            self.assert_applied_once(self.published('m0'))
+            self.assertEqual(service.metrics['m0']['dimensionScores'], scores)
+        self.assertEqual(WriteAheadLog(self.wal_path).published(), 1)
+
+    def test_restarts_on_metrics_file_do_not_reapply(self):
+        with open(self.metrics_path, 'w', encoding='utf-8') as f:
+            json.dump(BASE_METRICS, f, ensure_ascii=False)
+        self.run_service([SUBMISSION])
+        for _ in range(2):
+            service = self.run_service()
+            self.assert_applied_once(service.metrics['m0'])
+            self.assert_applied_once(self.published('m0'))
+
+    def test_qwen_rescoring_survives_restart(self):
+        service = self.run_service([SUBMISSION], llm=FakeQwen())
+        self.assertEqual(service.engines['m0'], 'qwen')
+        rescored = service.metrics['m0']
+
+        # Restarted without Qwen: the logged result is restored, not rescored by rules
+        service = self.run_service()
+        for key in ('totalScore', 'dimensionScores', 'dimensionReasons', 'overallRecommendation'):
+            self.assertEqual(service.metrics['m0'][key], rescored[key])
+        self.assertEqual(self.published('m0')['dimensionReasons'], {'导师能力': 'Qwen 理由'})
+
+    def test_similarity_cache_result_is_not_a_rescoring(self):
+        # The grown comment set matched the mentor's own old entry: nothing new was scored
+        service = self.run_service([SUBMISSION], llm=FakeQwen(engine='similarity_cache'))
+        self.assertEqual(service.engines['m0'], 'qwen')
+        mentor = service.metrics['m0']
+        self.assertEqual(mentor['dimensionReasons'], {'导师能力': '基础理由'})
+        # Rule engine path: the 9 rating moves the prior (6.0 over 2 evaluations)
+        self.assertEqual(mentor['dimensionScores']['导师能力'], 7.0)
+        self.assert_applied_once(self.published('m0'))
+
+    def test_unapplied_submissions_are_applied_on_start(self):
+        # Logged and acknowledged, but the service stopped before applying it
+        WriteAheadLog(self.wal_path).append([{**SUBMISSION, 'ratings': {'导师能力': 9.0},
+                                              'submittedAt': '', 'received': 0.0, 'seq': 1}])
+        service = self.run_service()
+        self.assertEqual(service.seq, 1)
+        self.assert_applied_once(self.published('m0'))
+        self.assertEqual(WriteAheadLog(self.wal_path).published(), 1)
+
+        self.run_service()
+        self.assert_applied_once(self.published('m0'))
+
+    def test_close_finishes_running_batch(self):
+        llm = FakeQwen(delay=0.2)
+
+        async def session():
+            service = IngestService.from_sources(
+                self.metrics_path, self.data_dir, WriteAheadLog(self.wal_path),
+                batch_seconds=0.0, llm=llm
+            )
+            await service.start()
+            await service.submit(SUBMISSION)
+            # Let the batcher pick the submission up, then close while Qwen is running
+            while service.pending:
+                await asyncio.sleep(0.01)
+            await service.close()
+
+        asyncio.run(session())
+        self.assertEqual(llm.calls, 1)
+        self.assertEqual(WriteAheadLog(self.wal_path).published(), 1)
+        self.assert_applied_once(self.published('m0'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Export-time sentiment labels must match the detail page's keyword filter
+
+Run from the repository root: python3 -m unittest discover tests
+"""
+
+import os
+import re
+import sys
+import json
+import shutil
+import subprocess
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from data_processor import DimensionExtractor
+
+
+DETAIL_JS = os.path.join(ROOT, 'docs', 'js', 'mentor-detail.js')
+
+# (comment, label the client-side filter has always given it)
+PINNED = [
+    ('导师人很好，很负责', 'positive'),
+    ('经费不足，压榨学生，经常延期', 'negative'),
+    ('学生补助少', 'neutral'),
+    ('导师水平高，补助低', 'neutral'),
+    ('无', 'neutral'),
+    ('人不错但是要求苛刻', 'neutral'),
+    ('不好说', 'neutral'),
+    ('', 'neutral'),
+]
+
+
+def js_keyword_lists():
+    """positiveKeywords / negativeKeywords of legacySentiment() in mentor-detail.js"""
+    with open(DETAIL_JS, 'r', encoding='utf-8') as f:
+        source = f.read()
+    body = source[source.index('function legacySentiment'):]
+    lists = {}
+    for name in ('positiveKeywords', 'negativeKeywords'):
+        match = re.search(name + r"\s*=\s*\[([^\]]*)\]", body)
+        lists[name] = re.findall(r"'([^']*)'", match.group(1))
+    return lists['positiveKeywords'], lists['negativeKeywords']
+
+
+class SentimentLabelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.extractor = DimensionExtractor()
+
+    def test_keyword_lists_match_detail_page(self):
+        positive, negative = js_keyword_lists()
+        self.assertEqual(DimensionExtractor.LABEL_POSITIVE_KEYWORDS, positive)
+        self.assertEqual(DimensionExtractor.LABEL_NEGATIVE_KEYWORDS, negative)
+
+    def test_pinned_labels(self):
+        for comment, label in PINNED:
+            self.assertEqual(self.extractor.sentiment_label(comment), label, comment)
+
+    @unittest.skipUnless(shutil.which('node'), 'node not installed')
+    def test_labels_match_legacy_sentiment(self):
+        with open(DETAIL_JS, 'r', encoding='utf-8') as f:
+            source = f.read()
+        start = source.index('function legacySentiment')
+        function = source[start:source.index('\n}\n', start) + 3]
+        comments = [comment for comment, _ in PINNED]
+        script = function + f"\nconsole.log(JSON.stringify({json.dumps(comments, ensure_ascii=False)}.map(legacySentiment)));"
+        output = subprocess.run(['node', '-e', script], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(json.loads(output), [self.extractor.sentiment_label(c) for c in comments])
+
+
+if __name__ == '__main__':
+    unittest.main()